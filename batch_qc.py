@@ -0,0 +1,203 @@
+"""
+批量质控（无界面）：文件夹中每个体扫的全部仰角做质控，结果写入分块压缩的输出目录。
+
+示例：
+    python batch_qc.py /data/ZA702 -o ./qc -j 4
+    python batch_qc.py /data/ZA702 -o ./qc -p REF ZDR -s clutter attenuation smooth --param smooth.sigma=1.5
+中断后以相同参数重新运行即可从未完成的体扫继续。
+"""
+import os
+import sys
+import time
+import argparse
+import traceback
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from iodata.read_radar import load_radar_file
+from iodata.catalog import collect_files
+from qc.pipeline import QCPipeline, QCStep, QC_STEPS, QC_PRODUCTS
+from qc.store import QCVolumeStore
+
+# 输出数据类型（质控结果精度远低于 float32 的有效位数）
+STORE_DTYPE = "float32"
+
+
+def qc_config(products, steps, drange):
+    """:return: 写入清单、用于判断是否需要重新处理的配置"""
+    return {"products": list(products), "steps": [[name, params] for name, params in steps],
+            "range": drange, "dtype": STORE_DTYPE}
+
+
+def qc_file(radar_file, out_dir, products, steps, drange):
+    """
+    在工作进程中处理一个体扫：各产品的全部仰角堆叠后一次通过流水线，逐仰角写入压缩块。
+    :param steps: [(步骤名称, 参数 dict), ...]
+    :return: dict 包含 file、skipped、errors、timings（各阶段秒数）、seconds
+    """
+    start = time.perf_counter()
+    result = {"file": radar_file, "skipped": False, "errors": [], "timings": {}, "seconds": 0.0}
+    store = QCVolumeStore(out_dir)
+    config = qc_config(products, steps, drange)
+    if store.is_complete(radar_file, config):
+        result["skipped"] = True
+        return result
+
+    timings = result["timings"]
+    t0 = time.perf_counter()
+    radar = load_radar_file(radar_file, lazy=True)
+    timings["load"] = time.perf_counter() - t0
+    if radar is None:
+        result["errors"].append("文件解析失败")
+        result["seconds"] = time.perf_counter() - start
+        return result
+
+    pipeline = QCPipeline([QCStep(name, **params) for name, params in steps])
+    tilts = list(range(len(radar.el)))
+    inputs = {}
+    coords = {}
+    fields = {}
+    for product in products:
+        if not any(product in radar.available_product(t) for t in tilts):
+            result["errors"].append(f"{product}: 无此数据")
+            continue
+        fields[product] = pipeline.run_volume(radar, product, drange, tilts, inputs, coords, timings)
+    # 各产品（含额外输入）已堆叠完毕，释放体扫与原始字段
+    del radar, inputs
+
+    t0 = time.perf_counter()
+    store.begin(radar_file)
+    for tilt in tilts:
+        if tilt not in coords:
+            continue
+        azimuth, distance = coords[tilt]
+        naz, ngate = len(azimuth), len(distance)
+        arrays = {p: f[tilt, :naz, :ngate].astype(STORE_DTYPE) for p, f in fields.items()}
+        store.write_tilt(radar_file, tilt, dict(arrays, azimuth=azimuth, distance=distance))
+    timings["write"] = time.perf_counter() - t0
+    result["seconds"] = time.perf_counter() - start
+    store.finish(radar_file, config, tilts=sorted(coords), products=sorted(fields), timings=timings,
+                 seconds=result["seconds"])
+    return result
+
+
+def _qc_safely(*args, **kwargs):
+    try:
+        return qc_file(*args, **kwargs)
+    except Exception:
+        return {"file": args[0], "skipped": False, "errors": [traceback.format_exc(limit=3)],
+                "timings": {}, "seconds": 0.0}
+
+
+def parse_step_params(specs, steps):
+    """
+    :param specs: ["步骤.参数=值", ...]
+    :param steps: 步骤名称列表
+    :return: [(步骤名称, 参数 dict), ...]
+    """
+    params = {name: {} for name in steps}
+    for spec in specs:
+        try:
+            target, value = spec.split("=", 1)
+            name, param = target.split(".", 1)
+            value = float(value)
+        except ValueError:
+            raise ValueError(f"参数格式应为 步骤.参数=数值：{spec}")
+        if name not in params:
+            raise ValueError(f"步骤 {name} 未启用：{spec}")
+        params[name][param] = value
+    # 在主进程中校验参数名，避免每个工作进程各报一次错
+    for name in steps:
+        QCStep(name, **params[name])
+    return [(name, params[name]) for name in steps]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="雷达数据批量质控（无界面，多进程）")
+    parser.add_argument("source", help="数据文件夹或通配符，如 '/data/*.bz2'")
+    parser.add_argument("-o", "--out-dir", required=True, help="输出目录")
+    parser.add_argument("-p", "--products", nargs="+", default=["REF"],
+                        help="产品，可选 " + "、".join(QC_PRODUCTS))
+    parser.add_argument("-s", "--steps", nargs="+", choices=list(QC_STEPS),
+                        default=["clutter", "attenuation", "smooth"], help="处理步骤（按顺序执行）")
+    parser.add_argument("--param", action="append", default=[],
+                        help="步骤参数，如 smooth.sigma=1.5（可重复）")
+    parser.add_argument("-r", "--range", type=float, default=150.0, help="探测范围（km）")
+    parser.add_argument("-j", "--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                        help="进程数（每个进程同时只处理一个体扫，内存占用随进程数线性增长）")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    products = [p.upper() for p in args.products]
+    unsupported = [p for p in products if p not in QC_PRODUCTS]
+    if unsupported:
+        print(f"不支持质控的产品：{'、'.join(unsupported)}", file=sys.stderr)
+        return 1
+    try:
+        steps = parse_step_params(args.param, args.steps)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    files = collect_files(args.source)
+    if not files:
+        print(f"未找到雷达文件：{args.source}", file=sys.stderr)
+        return 1
+    os.makedirs(args.out_dir, exist_ok=True)
+
+    total = len(files)
+    done = skipped = 0
+    failures = []
+    stage_totals = {}
+    start = time.perf_counter()
+    print(f"共 {total} 个文件，产品 {' '.join(products)}，步骤 {' → '.join(args.steps)}，{args.workers} 个进程")
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        # 同时在途的体扫数有上限，结果与待处理队列都不会随文件数增长
+        pending = iter(files)
+        running = set()
+
+        def submit_next():
+            path = next(pending, None)
+            if path is not None:
+                running.add(pool.submit(_qc_safely, path, args.out_dir, products, steps, args.range))
+
+        for _ in range(args.workers * 2):
+            submit_next()
+        while running:
+            finished, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                submit_next()
+                res = future.result()
+                done += 1
+                if res["skipped"]:
+                    skipped += 1
+                for stage, seconds in res["timings"].items():
+                    stage_totals[stage] = stage_totals.get(stage, 0.0) + seconds
+                if res["errors"]:
+                    failures.append(res)
+                status = "已完成，跳过" if res["skipped"] else f"{res['seconds']:.1f}s"
+                print(f"[{done}/{total}] {os.path.basename(res['file'])}  {status}"
+                      + ("  有错误" if res["errors"] else ""), flush=True)
+
+    elapsed = time.perf_counter() - start
+    processed = done - skipped
+    print(f"\n完成：处理 {processed} 个体扫，跳过 {skipped} 个，用时 {elapsed:.1f}s"
+          + (f"（{processed / elapsed:.2f} 体扫/s）" if processed else ""))
+    if stage_totals:
+        # 各阶段为所有工作进程的累计耗时
+        busy = sum(stage_totals.values())
+        print("\n各阶段耗时（所有进程累计）：")
+        for stage, seconds in sorted(stage_totals.items(), key=lambda item: -item[1]):
+            print(f"  {stage:<12} {seconds:8.2f}s  {seconds / busy:6.1%}"
+                  + (f"  {seconds / processed:.2f}s/体扫" if processed else ""))
+    if failures:
+        print(f"\n{len(failures)} 个文件有错误：")
+        for res in failures:
+            for err in res["errors"]:
+                print(f"  {os.path.basename(res['file'])}: {err.strip()}")
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+"""
+批量出图（无界面）。
+
+示例：
+    python batch_render.py /data/ZA702 -p REF VEL -t 0 1 -r 75 150 -o ./png -j 8
+    python batch_render.py "/data/ZA702/*.bz2" -o ./png --map --shp resources/ZA702_BOUL.shp
+    python batch_render.py /data/ZA702 -o ./svg -f svg --title "{site} {time}\n{product} {elevation:.1f}°"
+"""
+import os
+import sys
+import time
+import argparse
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import matplotlib
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from iodata.read_radar import load_radar_file
+from iodata.catalog import collect_files
+from visualization.plotter import plot_radar_data, RENDER_ENGINES
+
+# 每个工作进程复用同一个 Figure；地图要素与站点几何缓存同样按进程保留，跨文件、跨任务复用
+_FIG = None
+
+# 支持的输出格式
+EXPORT_FORMATS = ("png", "jpg", "svg")
+# 矢量格式
+VECTOR_FORMATS = ("svg",)
+# 标题模板可用字段：file、stem、site、time、product、tilt、elevation、range
+TITLE_FIELDS = ("file", "stem", "site", "time", "product", "tilt", "elevation", "range")
+
+
+def output_path(out_dir, radar_file, product, tilt, drange, fmt="png"):
+    # 用完整文件名，主干相同、后缀不同的文件不会互相覆盖
+    name = os.path.basename(radar_file)
+    return os.path.join(out_dir, f"{name}_{product}_t{tilt}_{drange:g}km.{fmt}")
+
+
+def title_fields(radar, radar_file, product, tilt, drange):
+    """:return: 标题模板的字段值"""
+    scantime = getattr(radar, "scantime", None)
+    return {
+        "file": os.path.basename(radar_file),
+        "stem": os.path.basename(radar_file).split(".")[0],
+        "site": getattr(radar, "code", ""),
+        "time": scantime.strftime("%Y-%m-%d %H:%M:%S") if scantime is not None else "",
+        "product": product,
+        "tilt": tilt,
+        "elevation": float(radar.el[tilt]),
+        "range": drange,
+    }
+
+
+def render_file(radar_file, products, tilts, dranges, out_dir, shp_path=None,
+                map_visible=False, dpi=150, skip_existing=False, engine="mesh", fmt="png",
+                title_template=None):
+    """
+    在工作进程中渲染单个文件的全部组合。
+    :param fmt: 输出格式，见 EXPORT_FORMATS
+    :param title_template: 标题模板（str.format，字段见 TITLE_FIELDS），默认使用绘图的标准标题
+    :return: dict 包含 file、images、skipped、errors、seconds
+    """
+    global _FIG
+    start = time.perf_counter()
+    result = {"file": radar_file, "images": 0, "skipped": 0, "errors": [], "seconds": 0.0}
+
+    jobs = [(p, t, r) for p in products for t in tilts for r in dranges]
+    if title_template:
+        # 命令行与输入框中无法直接输入换行，"\n" 视为换行
+        title_template = title_template.replace("\\n", "\n")
+    if skip_existing:
+        todo = [j for j in jobs if not os.path.exists(output_path(out_dir, radar_file, *j, fmt))]
+        result["skipped"] = len(jobs) - len(todo)
+        jobs = todo
+    if not jobs:
+        result["seconds"] = time.perf_counter() - start
+        return result
+
+    radar = load_radar_file(radar_file, lazy=True)
+    if radar is None:
+        result["errors"].append("文件解析失败")
+        result["seconds"] = time.perf_counter() - start
+        return result
+
+    if _FIG is None:
+        # 与输出分辨率一致，细节层级按实际像素选择
+        _FIG = Figure(figsize=(8, 8), dpi=dpi)
+        FigureCanvasAgg(_FIG)
+    for product, tilt, drange in jobs:
+        if tilt >= len(radar.el) or product not in radar.available_product(tilt):
+            result["errors"].append(f"{product} @ 仰角 {tilt}: 无此数据")
+            continue
+        title = None
+        if title_template:
+            try:
+                title = title_template.format(**title_fields(radar, radar_file, product, tilt, drange))
+            except (KeyError, ValueError, IndexError) as e:
+                result["errors"].append(f"标题模板无效：{e}")
+                break
+        plot = plot_radar_data(_FIG, radar, tilt, product, drange, radar_file, shp_path, map_visible,
+                               engine=engine, title=title)
+        if not plot["success"]:
+            result["errors"].append(f"{product} @ 仰角 {tilt}, {drange:g} km: {plot['error']}")
+            continue
+        if fmt in VECTOR_FORMATS:
+            # 数据层按 dpi 栅格化嵌入，地图、文字与颜色条保持矢量；逐库写出数十万个多边形既慢又大
+            plot["pcm"].set_rasterized(True)
+        _FIG.savefig(output_path(out_dir, radar_file, product, tilt, drange, fmt), dpi=dpi)
+        result["images"] += 1
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def init_worker():
+    """
+    工作进程初始化：使用无界面的 Agg 后端。
+    不在导入时设置，界面进程（导出对话框）导入本模块时不应改变全局后端。
+    """
+    matplotlib.use("Agg")
+
+
+def _render_safely(*args, **kwargs):
+    try:
+        return render_file(*args, **kwargs)
+    except Exception:
+        return {"file": args[0], "images": 0, "skipped": 0,
+                "errors": [traceback.format_exc(limit=3)], "seconds": 0.0}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="雷达数据批量出图（无界面，多进程）")
+    parser.add_argument("source", help="数据文件夹或通配符，如 '/data/*.bz2'")
+    parser.add_argument("-o", "--out-dir", required=True, help="输出目录")
+    parser.add_argument("-p", "--products", nargs="+", default=["REF"], help="产品，如 REF VEL")
+    parser.add_argument("-t", "--tilts", nargs="+", type=int, default=[0], help="仰角索引")
+    parser.add_argument("-r", "--ranges", nargs="+", type=float, default=[75.0], help="探测范围（km）")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count(), help="进程数")
+    parser.add_argument("--dpi", type=int, default=150)
+    parser.add_argument("--map", action="store_true", help="叠加地图要素")
+    parser.add_argument("--shp", default=None, help="叠加的 shapefile")
+    parser.add_argument("--engine", choices=RENDER_ENGINES, default="mesh",
+                        help="渲染引擎：mesh（pcolormesh）或 raster（查找表栅格，更快）")
+    parser.add_argument("-f", "--format", choices=EXPORT_FORMATS, default="png", help="输出格式")
+    parser.add_argument("--title", default=None,
+                        help="标题模板，可用字段：" + "、".join(TITLE_FIELDS) + "，如 '{site} {time}\\n{product}'")
+    parser.add_argument("--skip-existing", action="store_true", help="跳过已存在的图像（用于断点续跑）")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    files = collect_files(args.source)
+    if not files:
+        print(f"未找到雷达文件：{args.source}", file=sys.stderr)
+        return 1
+    os.makedirs(args.out_dir, exist_ok=True)
+    products = [p.upper() for p in args.products]
+
+    total = len(files)
+    images = skipped = 0
+    failures = []
+    start = time.perf_counter()
+    print(f"共 {total} 个文件，{len(products) * len(args.tilts) * len(args.ranges)} 幅/文件，{args.workers} 个进程")
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker) as pool:
+        futures = [
+            pool.submit(_render_safely, f, products, args.tilts, args.ranges, args.out_dir,
+                        args.shp, args.map, args.dpi, args.skip_existing, args.engine, args.format,
+                        args.title)
+            for f in files
+        ]
+        for done, future in enumerate(as_completed(futures), 1):
+            res = future.result()
+            images += res["images"]
+            skipped += res["skipped"]
+            if res["errors"]:
+                failures.append(res)
+            elapsed = time.perf_counter() - start
+            print(f"[{done}/{total}] {os.path.basename(res['file'])}  {res['seconds']:.1f}s  "
+                  f"{done / elapsed:.2f} 文件/s  {images / elapsed:.2f} 幅/s"
+                  + ("  失败" if res["errors"] else ""), flush=True)
+
+    elapsed = time.perf_counter() - start
+    print(f"\n完成：{images} 幅图像，跳过 {skipped} 幅，用时 {elapsed:.1f}s"
+          f"（{total / elapsed:.2f} 文件/s，{images / elapsed:.2f} 幅/s）")
+    if failures:
+        print(f"\n{len(failures)} 个文件有错误：")
+        for res in failures:
+            for err in res["errors"]:
+                print(f"  {os.path.basename(res['file'])}: {err.strip()}")
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,369 @@
+import os
+import shutil
+import threading
+import subprocess
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import matplotlib
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from PyQt5.QtCore import Qt, QObject, QTimer, pyqtSignal
+from PyQt5.QtGui import QImage, QPixmap
+from PyQt5.QtWidgets import (
+    QDialog, QLabel, QPushButton, QSpinBox, QSlider, QVBoxLayout, QHBoxLayout, QFileDialog,
+    QMessageBox, QProgressBar, QSizePolicy
+)
+from visualization.plotter import plot_radar_data, update_radar_data
+
+
+class FrameCache:
+    """
+    已渲染动画帧（RGBA 数组）的内存缓存，按字节数上限做 LRU 淘汰。
+    键为 (文件, 仰角, 产品, 范围, 渲染引擎, 地图)。
+    """
+
+    def __init__(self, max_bytes=512 * 1024 ** 2):
+        self.max_bytes = max_bytes
+        self._frames = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            frame = self._frames.get(key)
+            if frame is not None:
+                self._frames.move_to_end(key)
+            return frame
+
+    def put(self, key, frame):
+        with self._lock:
+            old = self._frames.pop(key, None)
+            if old is not None:
+                self._bytes -= old.nbytes
+            self._frames[key] = frame
+            self._bytes += frame.nbytes
+            while self._bytes > self.max_bytes and len(self._frames) > 1:
+                _, evicted = self._frames.popitem(last=False)
+                self._bytes -= evicted.nbytes
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._frames
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+            self._bytes = 0
+
+
+class FrameSignals(QObject):
+    frame_ready = pyqtSignal(int, int)   # 任务号, 帧序号
+    failed = pyqtSignal(int, int, str)   # 任务号, 帧序号, 错误信息
+    finished = pyqtSignal(int)           # 任务号
+
+
+class FrameRenderTask:
+    """
+    在后台线程中依次渲染动画帧（已缓存的帧跳过）。
+    复用同一个 Agg Figure，几何不变时只做增量刷新，每帧只需替换网格数据。
+    """
+
+    def __init__(self, task_id, files, keys, params, loader, cache, figsize=(8, 8), dpi=100):
+        """
+        :param files: 文件路径列表（按播放顺序）
+        :param keys: 与 files 对应的帧缓存键
+        :param params: dict 包含 tilt、product、drange、shp_path、map_visible、engine
+        :param loader: 体扫读取函数 loader(path)，返回 StandardData 或 None
+        :param cache: FrameCache
+        """
+        self.task_id = task_id
+        self.files = files
+        self.keys = keys
+        self.params = params
+        self.signals = FrameSignals()
+        self._loader = loader
+        self._cache = cache
+        self._figsize = figsize
+        self._dpi = dpi
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def run(self):
+        p = self.params
+        fig = Figure(figsize=self._figsize, dpi=self._dpi)
+        canvas = FigureCanvasAgg(fig)
+        state = None
+        for i, (path, key) in enumerate(zip(self.files, self.keys)):
+            if self._cancel.is_set():
+                break
+            if key in self._cache:
+                self.signals.frame_ready.emit(self.task_id, i)
+                continue
+            try:
+                radar = self._loader(path)
+                if radar is None:
+                    raise ValueError("文件解析失败")
+                result = update_radar_data(state, radar, p["tilt"], p["product"], p["drange"], path)
+                if result is None:
+                    result = plot_radar_data(fig, radar, p["tilt"], p["product"], p["drange"], path,
+                                             p["shp_path"], p["map_visible"], engine=p["engine"])
+                if not result["success"]:
+                    raise ValueError(result["error"])
+                state = result
+                canvas.draw()
+                self._cache.put(key, np.asarray(canvas.buffer_rgba()).copy())
+                self.signals.frame_ready.emit(self.task_id, i)
+            except Exception as e:
+                state = None
+                self.signals.failed.emit(self.task_id, i, str(e))
+        self.signals.finished.emit(self.task_id)
+
+
+def export_frames(frames, path, fps):
+    """
+    把已渲染的帧导出为动画。
+    :param frames: RGBA 数组列表（尺寸相同）
+    :param path: 输出文件，扩展名 .gif 或 .mp4
+    :param fps: 帧率
+    """
+    if not frames:
+        raise ValueError("没有可导出的帧")
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".gif":
+        from PIL import Image
+        images = [Image.fromarray(f[..., :3]) for f in frames]
+        images[0].save(path, save_all=True, append_images=images[1:],
+                       duration=int(round(1000 / fps)), loop=0)
+    elif ext == ".mp4":
+        ffmpeg = shutil.which(matplotlib.rcParams["animation.ffmpeg_path"]) or shutil.which("ffmpeg")
+        if ffmpeg is None:
+            raise RuntimeError("未找到 ffmpeg，无法导出 MP4")
+        # yuv420p 要求宽高为偶数
+        height, width = (d - d % 2 for d in frames[0].shape[:2])
+        cmd = [ffmpeg, "-y", "-loglevel", "error", "-f", "rawvideo", "-pix_fmt", "rgba",
+               "-s", f"{width}x{height}", "-r", str(fps), "-i", "-",
+               "-c:v", "libx264", "-pix_fmt", "yuv420p", path]
+        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+        try:
+            for f in frames:
+                proc.stdin.write(np.ascontiguousarray(f[:height, :width]).tobytes())
+            proc.stdin.close()
+        except BrokenPipeError:
+            pass
+        if proc.wait() != 0:
+            raise RuntimeError(proc.stderr.read().decode(errors="ignore") or "ffmpeg 执行失败")
+    else:
+        raise ValueError(f"不支持的格式：{ext}")
+
+
+class AnimationPlayer(QDialog):
+    """
+    时次循环播放：后台把时间窗内的各时次渲染到帧缓存，播放时只切换已渲染的位图；
+    导出 GIF/MP4 时直接使用缓存的帧。
+    """
+
+    def __init__(self, viewer, cache, window=10):
+        """
+        :param viewer: RadarViewer（提供 file_list、当前仰角/产品/范围与体扫读取）
+        :param cache: FrameCache
+        :param window: 默认时间窗长度（时次数）
+        """
+        super().__init__(viewer)
+        self.setWindowTitle("动画播放")
+        self.resize(720, 780)
+        self.viewer = viewer
+        self.cache = cache
+        # 使用 Python 线程：QThreadPool 的线程每个任务结束后会丢弃 Python 线程状态（连同 pyproj 的线程上下文），
+        # 下一个任务再投影时会访问已释放的上下文；全局线程池还会被 Qt 的平滑缩放占用而相互等待
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="animation")
+        self._task = None
+        self._task_id = 0
+        self._files = []
+        self._keys = []
+
+        n = len(viewer.file_list)
+        end = viewer.current_index + 1 if viewer.current_index >= 0 else n
+        self.start_spin = QSpinBox()
+        self.start_spin.setRange(1, max(n, 1))
+        self.start_spin.setValue(max(1, end - window + 1))
+        self.end_spin = QSpinBox()
+        self.end_spin.setRange(1, max(n, 1))
+        self.end_spin.setValue(max(end, 1))
+        self.fps_spin = QSpinBox()
+        self.fps_spin.setRange(1, 30)
+        self.fps_spin.setValue(4)
+        self.fps_spin.valueChanged.connect(self.update_interval)
+
+        self.render_btn = QPushButton("生成帧")
+        self.render_btn.clicked.connect(self.render_frames)
+        self.play_btn = QPushButton("播放")
+        self.play_btn.clicked.connect(self.toggle_play)
+        self.export_btn = QPushButton("导出...")
+        self.export_btn.clicked.connect(self.export_animation)
+
+        self.image_label = QLabel("点击“生成帧”开始渲染")
+        self.image_label.setAlignment(Qt.AlignCenter)
+        self.image_label.setSizePolicy(QSizePolicy.Ignored, QSizePolicy.Ignored)
+        self.slider = QSlider(Qt.Horizontal)
+        self.slider.valueChanged.connect(self.show_frame)
+        self.progress = QProgressBar()
+        self.info_label = QLabel()
+
+        controls = QHBoxLayout()
+        for widget in (QLabel("时次"), self.start_spin, QLabel("至"), self.end_spin,
+                       QLabel("帧率"), self.fps_spin, self.render_btn, self.play_btn, self.export_btn):
+            controls.addWidget(widget)
+        layout = QVBoxLayout()
+        layout.addLayout(controls)
+        layout.addWidget(self.image_label, 1)
+        layout.addWidget(self.slider)
+        bottom = QHBoxLayout()
+        bottom.addWidget(self.info_label, 1)
+        bottom.addWidget(self.progress)
+        layout.addLayout(bottom)
+        self.setLayout(layout)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.advance)
+        self.update_interval()
+
+    # ---------------------- 渲染 ----------------------
+    def frame_params(self):
+        v = self.viewer
+        return {
+            "tilt": v.el_combo.currentIndex(),
+            "product": v.var_combo.currentText(),
+            "drange": float(v.range_input.text()),
+            "shp_path": v.county_shp,
+            "map_visible": v.map_visible,
+            "engine": v.render_engine,
+        }
+
+    def render_frames(self):
+        try:
+            params = self.frame_params()
+        except ValueError:
+            QMessageBox.warning(self, "错误", "探测范围必须为数字！")
+            return
+        start, end = self.start_spin.value() - 1, self.end_spin.value()
+        if end <= start:
+            QMessageBox.warning(self, "提示", "时间窗为空！")
+            return
+        self.cancel_rendering()
+        self._files = self.viewer.file_list[start:end]
+        self._keys = [(f, params["tilt"], params["product"], params["drange"], params["engine"],
+                       params["map_visible"]) for f in self._files]
+        self.slider.setRange(0, len(self._files) - 1)
+        self.progress.setRange(0, len(self._files))
+        self.progress.setValue(0)
+
+        self._task_id += 1
+        self._task = FrameRenderTask(self._task_id, self._files, self._keys, params,
+                                     lambda path: self.viewer.fetch_volume(path), self.cache)
+        self._task.signals.frame_ready.connect(self.on_frame_ready)
+        self._task.signals.failed.connect(self.on_frame_failed)
+        self._task.signals.finished.connect(self.on_render_finished)
+        self.executor.submit(self._task.run)
+        self.info_label.setText("正在渲染...")
+
+    def cancel_rendering(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def on_frame_ready(self, task_id, index):
+        if task_id != self._task_id:
+            return
+        self.progress.setValue(self.progress.value() + 1)
+        if index == self.slider.value():
+            self.show_frame(index)
+
+    def on_frame_failed(self, task_id, index, message):
+        if task_id != self._task_id:
+            return
+        self.progress.setValue(self.progress.value() + 1)
+        self.info_label.setText(f"{os.path.basename(self._files[index])}：{message}")
+
+    def on_render_finished(self, task_id):
+        if task_id != self._task_id:
+            return
+        self._task = None
+        ready = sum(key in self.cache for key in self._keys)
+        self.info_label.setText(f"已渲染 {ready}/{len(self._keys)} 帧")
+
+    # ---------------------- 播放 ----------------------
+    def update_interval(self):
+        self.timer.setInterval(int(1000 / self.fps_spin.value()))
+
+    def toggle_play(self):
+        if self.timer.isActive():
+            self.timer.stop()
+            self.play_btn.setText("播放")
+        elif self._keys:
+            self.timer.start()
+            self.play_btn.setText("暂停")
+
+    def advance(self):
+        """跳到下一个已渲染的帧（尚未渲染的帧跳过），到末尾后循环"""
+        n = len(self._keys)
+        for step in range(1, n + 1):
+            index = (self.slider.value() + step) % n
+            if self._keys[index] in self.cache:
+                self.slider.setValue(index)
+                return
+
+    def show_frame(self, index):
+        if not 0 <= index < len(self._keys):
+            return
+        frame = self.cache.get(self._keys[index])
+        if frame is None:
+            return
+        height, width = frame.shape[:2]
+        image = QImage(frame.data, width, height, frame.strides[0], QImage.Format_RGBA8888)
+        pixmap = QPixmap.fromImage(image)
+        self.image_label.setPixmap(pixmap.scaled(self.image_label.size(), Qt.KeepAspectRatio,
+                                                 Qt.SmoothTransformation))
+        self.info_label.setText(f"{index + 1}/{len(self._keys)}  {os.path.basename(self._files[index])}")
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.show_frame(self.slider.value())
+
+    # ---------------------- 导出 ----------------------
+    def export_animation(self):
+        frames = [self.cache.get(key) for key in self._keys]
+        frames = [f for f in frames if f is not None]
+        if not frames:
+            QMessageBox.warning(self, "提示", "请先生成帧！")
+            return
+        if len(frames) < len(self._keys):
+            QMessageBox.information(self, "提示", f"仅导出已渲染的 {len(frames)}/{len(self._keys)} 帧。")
+        path, _ = QFileDialog.getSaveFileName(self, "导出动画", "", "GIF 动画 (*.gif);;MP4 视频 (*.mp4)")
+        if not path:
+            return
+        if not os.path.splitext(path)[1]:
+            path += ".gif"
+        try:
+            export_frames(frames, path, self.fps_spin.value())
+        except Exception as e:
+            QMessageBox.critical(self, "错误", f"导出失败：{e}")
+            return
+        self.info_label.setText(f"已导出：{path}")
+
+    def release(self):
+        """停止播放与渲染并释放线程（每次打开都新建播放器；可重复调用）"""
+        self.timer.stop()
+        self.cancel_rendering()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def done(self, result):
+        # Esc 经 reject() 到此处只隐藏对话框，不触发 closeEvent
+        self.release()
+        super().done(result)
+
+    def closeEvent(self, event):
+        self.release()
+        super().closeEvent(event)
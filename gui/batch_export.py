@@ -0,0 +1,228 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, CancelledError
+from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtWidgets import (
+    QDialog, QLabel, QPushButton, QCheckBox, QComboBox, QSpinBox, QLineEdit, QPlainTextEdit,
+    QProgressBar, QFileDialog, QMessageBox, QGridLayout, QHBoxLayout, QVBoxLayout, QGroupBox
+)
+from batch_render import _render_safely, init_worker, EXPORT_FORMATS, TITLE_FIELDS
+
+# 默认勾选的产品与仰角
+DEFAULT_EXPORT_PRODUCTS = ("REF", "VEL")
+DEFAULT_EXPORT_TILTS = (0, 1)
+
+
+class ExportSignals(QObject):
+    file_done = pyqtSignal(int, object)   # 批次号, render_file 的结果
+
+
+class BatchExportDialog(QDialog):
+    """
+    文件夹批量导出：文件 × 产品 × 仰角的组合按文件分发到进程池中渲染，
+    标题、颜色条与地图叠加与主窗口一致；每个文件完成后回报进度。
+    各工作进程内的地图要素与站点几何缓存跨文件复用。
+    """
+
+    def __init__(self, viewer):
+        """
+        :param viewer: RadarViewer（提供文件列表、当前体扫、探测范围、地图与渲染引擎设置）
+        """
+        super().__init__(viewer)
+        self.setWindowTitle("批量导出")
+        self.resize(640, 600)
+        self.viewer = viewer
+        self.signals = ExportSignals()
+        self.signals.file_done.connect(self.on_file_done)
+        self.executor = None
+        self._batch = 0
+        self._futures = []
+        self._done = 0
+        self._images = 0
+        self._failed = 0
+
+        radar = viewer.radar
+        products = list(radar.available_product(0)) if radar is not None else list(DEFAULT_EXPORT_PRODUCTS)
+        elevations = list(radar.el) if radar is not None else []
+
+        # 产品与仰角
+        self.product_checks = []
+        product_box = QGroupBox("产品")
+        product_grid = QGridLayout()
+        for i, product in enumerate(products):
+            check = QCheckBox(product)
+            check.setChecked(product in DEFAULT_EXPORT_PRODUCTS)
+            product_grid.addWidget(check, i // 6, i % 6)
+            self.product_checks.append(check)
+        product_box.setLayout(product_grid)
+
+        self.tilt_checks = []
+        tilt_box = QGroupBox("仰角")
+        tilt_grid = QGridLayout()
+        for i, el in enumerate(elevations):
+            check = QCheckBox(f"{el:.1f}°")
+            check.setChecked(i in DEFAULT_EXPORT_TILTS)
+            tilt_grid.addWidget(check, i // 6, i % 6)
+            self.tilt_checks.append(check)
+        tilt_box.setLayout(tilt_grid)
+
+        # 输出设置
+        self.range_input = QLineEdit(viewer.range_input.text() if hasattr(viewer, "range_input") else "75")
+        self.format_combo = QComboBox()
+        self.format_combo.addItems([fmt.upper() for fmt in EXPORT_FORMATS])
+        self.dpi_spin = QSpinBox()
+        self.dpi_spin.setRange(50, 600)
+        self.dpi_spin.setValue(150)
+        self.map_check = QCheckBox("叠加地图")
+        self.map_check.setChecked(viewer.map_visible)
+        self.title_input = QLineEdit()
+        self.title_input.setPlaceholderText("默认：文件名\\n产品 @ 仰角 (范围)")
+        self.title_input.setToolTip("可用字段：" + "、".join("{" + f + "}" for f in TITLE_FIELDS) +
+                                    "，\\n 表示换行")
+        self.out_dir_input = QLineEdit(os.path.join(viewer.folder_path, "export") if viewer.folder_path else "")
+        browse_btn = QPushButton("浏览...")
+        browse_btn.clicked.connect(self.choose_out_dir)
+        self.workers_spin = QSpinBox()
+        self.workers_spin.setRange(1, os.cpu_count() or 1)
+        self.workers_spin.setValue(max(1, (os.cpu_count() or 2) - 1))
+        self.skip_check = QCheckBox("跳过已存在的图像")
+        self.skip_check.setChecked(True)
+
+        options = QGridLayout()
+        options.addWidget(QLabel("探测范围(km)"), 0, 0)
+        options.addWidget(self.range_input, 0, 1)
+        options.addWidget(QLabel("格式"), 0, 2)
+        options.addWidget(self.format_combo, 0, 3)
+        options.addWidget(QLabel("DPI"), 0, 4)
+        options.addWidget(self.dpi_spin, 0, 5)
+        options.addWidget(QLabel("标题模板"), 1, 0)
+        options.addWidget(self.title_input, 1, 1, 1, 5)
+        options.addWidget(QLabel("输出目录"), 2, 0)
+        options.addWidget(self.out_dir_input, 2, 1, 1, 4)
+        options.addWidget(browse_btn, 2, 5)
+        options.addWidget(QLabel("进程数"), 3, 0)
+        options.addWidget(self.workers_spin, 3, 1)
+        options.addWidget(self.map_check, 3, 2, 1, 2)
+        options.addWidget(self.skip_check, 3, 4, 1, 2)
+
+        self.start_btn = QPushButton("开始导出")
+        self.start_btn.clicked.connect(self.start_export)
+        self.cancel_btn = QPushButton("取消")
+        self.cancel_btn.clicked.connect(self.cancel_export)
+        self.cancel_btn.setEnabled(False)
+        self.progress = QProgressBar()
+        self.log = QPlainTextEdit()
+        self.log.setReadOnly(True)
+
+        buttons = QHBoxLayout()
+        buttons.addWidget(self.progress, 1)
+        buttons.addWidget(self.start_btn)
+        buttons.addWidget(self.cancel_btn)
+        layout = QVBoxLayout()
+        layout.addWidget(QLabel(f"文件夹：{viewer.folder_path or ''}（{len(viewer.file_list)} 个文件）"))
+        layout.addWidget(product_box)
+        layout.addWidget(tilt_box)
+        layout.addLayout(options)
+        layout.addLayout(buttons)
+        layout.addWidget(self.log, 1)
+        self.setLayout(layout)
+
+    def choose_out_dir(self):
+        path = QFileDialog.getExistingDirectory(self, "选择输出目录", self.out_dir_input.text())
+        if path:
+            self.out_dir_input.setText(path)
+
+    # ---------------------- 导出 ----------------------
+    def start_export(self):
+        files = list(self.viewer.file_list)
+        products = [c.text() for c in self.product_checks if c.isChecked()]
+        tilts = [i for i, c in enumerate(self.tilt_checks) if c.isChecked()]
+        out_dir = self.out_dir_input.text().strip()
+        try:
+            drange = float(self.range_input.text())
+        except ValueError:
+            QMessageBox.warning(self, "错误", "探测范围必须为数字！")
+            return
+        if not files or not products or not tilts:
+            QMessageBox.warning(self, "提示", "请先打开文件夹，并至少选择一个产品和一个仰角！")
+            return
+        if not out_dir:
+            QMessageBox.warning(self, "提示", "请选择输出目录！")
+            return
+        os.makedirs(out_dir, exist_ok=True)
+
+        self.cancel_export()
+        self._batch += 1
+        self._done = self._images = self._failed = 0
+        self.progress.setRange(0, len(files))
+        self.progress.setValue(0)
+        self.log.clear()
+        self.log.appendPlainText(f"共 {len(files)} 个文件，{len(products) * len(tilts)} 幅/文件")
+
+        # 以 spawn 方式启动工作进程，不复制界面进程中的 Qt 与线程状态
+        self.executor = ProcessPoolExecutor(max_workers=self.workers_spin.value(),
+                                            mp_context=multiprocessing.get_context("spawn"),
+                                            initializer=init_worker)
+        fmt = self.format_combo.currentText().lower()
+        title = self.title_input.text().strip() or None
+        v = self.viewer
+        batch = self._batch
+        self._futures = []
+        for path in files:
+            future = self.executor.submit(
+                _render_safely, path, products, tilts, [drange], out_dir, v.county_shp,
+                self.map_check.isChecked(), self.dpi_spin.value(), self.skip_check.isChecked(),
+                v.render_engine, fmt, title)
+            future.add_done_callback(lambda f, b=batch: self._report(b, f))
+            self._futures.append(future)
+        self.start_btn.setEnabled(False)
+        self.cancel_btn.setEnabled(True)
+
+    def _report(self, batch, future):
+        """进程池回调线程中调用，转到 GUI 线程处理"""
+        try:
+            result = future.result()
+        except CancelledError:
+            return
+        except Exception as e:
+            result = {"file": "", "images": 0, "skipped": 0, "errors": [str(e)], "seconds": 0.0}
+        self.signals.file_done.emit(batch, result)
+
+    def on_file_done(self, batch, result):
+        if batch != self._batch:
+            return
+        self._done += 1
+        self._images += result["images"]
+        self.progress.setValue(self._done)
+        name = os.path.basename(result["file"])
+        line = f"[{self._done}/{len(self._futures)}] {name}  {result['images']} 幅"
+        if result["skipped"]:
+            line += f"，跳过 {result['skipped']} 幅"
+        line += f"  {result['seconds']:.1f}s"
+        if result["errors"]:
+            self._failed += 1
+            line += "\n    " + "\n    ".join(err.strip() for err in result["errors"])
+        self.log.appendPlainText(line)
+        if self._done == len(self._futures):
+            self.log.appendPlainText(f"完成：{self._images} 幅图像，{self._failed} 个文件有错误")
+            self._finish()
+
+    def cancel_export(self):
+        if self.executor is None:
+            return
+        self._batch += 1
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        if self._done < len(self._futures):
+            self.log.appendPlainText(f"已取消（完成 {self._done}/{len(self._futures)} 个文件）")
+        self._finish()
+
+    def _finish(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+        self.start_btn.setEnabled(True)
+        self.cancel_btn.setEnabled(False)
+
+    def closeEvent(self, event):
+        self.cancel_export()
+        super().closeEvent(event)
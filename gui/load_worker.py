@@ -0,0 +1,53 @@
+import threading
+from PyQt5.QtCore import QObject, QRunnable, pyqtSignal
+from iodata.read_radar import LoadCancelled
+
+
+class LoadSignals(QObject):
+    """后台读取任务的信号（在 GUI 线程中以排队方式接收）"""
+    progress = pyqtSignal(int, int)      # 任务号, 进度百分比
+    finished = pyqtSignal(int, object)   # 任务号, StandardData 或 None
+    cancelled = pyqtSignal(int)          # 任务号
+
+
+class RadarLoadTask(QRunnable):
+    """
+    在 QThreadPool 中解析雷达文件的任务。
+    解析结果通过 finished 信号送回 GUI 线程；调用 cancel() 后，
+    正在进行的解压会在下一次读取时中止，并发出 cancelled 信号。
+    """
+
+    def __init__(self, task_id, path, loader):
+        """
+        :param task_id: 任务号，用于丢弃过期结果
+        :param path: 文件路径
+        :param loader: 解析函数 loader(path, progress=..., cancel=...)，返回 StandardData 或 None
+        """
+        super().__init__()
+        self.task_id = task_id
+        self.path = path
+        self.signals = LoadSignals()
+        self._loader = loader
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def is_cancelled(self):
+        return self._cancel.is_set()
+
+    def run(self):
+        try:
+            radar = self._loader(self.path, progress=self._report, cancel=self._cancel)
+        except LoadCancelled:
+            self.signals.cancelled.emit(self.task_id)
+            return
+        except Exception:
+            radar = None
+        if self._cancel.is_set():
+            self.signals.cancelled.emit(self.task_id)
+            return
+        self.signals.finished.emit(self.task_id, radar)
+
+    def _report(self, percent):
+        self.signals.progress.emit(self.task_id, percent)
@@ -1,15 +1,33 @@
 import os
+from concurrent.futures import ThreadPoolExecutor
 from PyQt5.QtWidgets import (
-    QMainWindow, QWidget, QLabel, QPushButton, QVBoxLayout, QHBoxLayout, QRadioButton,
-    QFileDialog, QMessageBox, QComboBox, QLineEdit, QAction, QGroupBox, QStatusBar
+    QMainWindow, QWidget, QLabel, QPushButton, QVBoxLayout, QHBoxLayout, QGridLayout, QCheckBox,
+    QDoubleSpinBox, QSpinBox, QFileDialog, QMessageBox, QComboBox, QLineEdit, QAction, QGroupBox, QStatusBar,
+    QInputDialog, QProgressBar, QActionGroup
 )
 from PyQt5.QtGui import QIcon
+from PyQt5.QtCore import Qt, QSettings, QThreadPool, QTimer
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
-from visualization.plotter import plot_radar_data, create_map_features_on_ax
+from visualization.plotter import plot_radar_data, update_radar_data, create_map_features_on_ax, refresh_view
+from visualization.readout import GateReadout
 import cartopy.crs as ccrs
-from iodata.read_radar import load_radar_via_dialog, load_radar_file
-from qc.qc_methods import ground_clutter_filter, attenuation_correction
+from iodata.read_radar import select_radar_file, load_radar_file
+from iodata.prefetch import RadarPrefetcher
+from iodata.volume_cache import VolumeCache
+from iodata.disk_cache import DiskVolumeCache
+from iodata.catalog import FolderCatalog
+from iodata.watcher import DirectoryWatcher
+from gui.load_worker import RadarLoadTask
+from gui.navigation import BlitNavigator
+from gui.animation import AnimationPlayer, FrameCache
+from gui.multi_panel import MultiPanelView
+from gui.overview import TiltOverview
+from gui.batch_export import BatchExportDialog
+from qc.pipeline import (
+    QCPipeline, QCStep, StageCache, QC_STEPS, QC_PARAM_LABELS, QC_PRODUCTS, CLUTTER_WINDOW_PARAMS
+)
+from qc.clutter import CLUTTER_PROBABILITY
 
 
 class RadarViewer(QMainWindow):
@@ -20,6 +38,16 @@ class RadarViewer(QMainWindow):
         self.county_shp = r"C:\Users\lihb\PycharmProjects\QPE_GUI\resources\ZA702_BOUL.shp"
         self.resize(1100, 650)
 
+        # 渲染引擎（见 visualization.plotter.RENDER_ENGINES）
+        self.render_engine = "mesh"
+
+        # 各仰角缩略图总览（停靠在底部，默认隐藏）
+        self.overview = TiltOverview(self)
+        self.overview.tilt_selected.connect(self.on_overview_tilt)
+        self.overview.visibilityChanged.connect(lambda visible: visible and self.refresh_overview())
+        self.addDockWidget(Qt.BottomDockWidgetArea, self.overview)
+        self.overview.hide()
+
         # 主界面布局
         self.create_menu_bar()
         self.central_widget = QWidget()
@@ -28,18 +56,63 @@ class RadarViewer(QMainWindow):
         self.central_widget.setLayout(self.main_layout)
         self.status_bar = QStatusBar()
         self.setStatusBar(self.status_bar)
+        self.load_progress = QProgressBar()
+        self.load_progress.setRange(0, 100)
+        self.load_progress.setMaximumWidth(160)
+        self.load_progress.hide()
+        self.cancel_load_btn = QPushButton("取消")
+        self.cancel_load_btn.clicked.connect(self.on_cancel_load_clicked)
+        self.cancel_load_btn.hide()
+        self.status_bar.addPermanentWidget(self.load_progress)
+        self.status_bar.addPermanentWidget(self.cancel_load_btn)
 
         # 数据文件
         self.radar = None
         self.radar_file = None
         self.folder_path = None
+        self.catalog = None
         self.file_list = []
         self.current_index = -1
 
+        # 已解析体扫的磁盘缓存（可选）、内存缓存与相邻时次后台预读
+        self.settings = QSettings("QPE_GUI", "RadarViewer")
+        self.disk_cache = None
+        disk_cache_dir = self.settings.value("disk_cache_dir", "", type=str)
+        if disk_cache_dir:
+            self.enable_disk_cache(disk_cache_dir, self.settings.value("disk_cache_mb", 10240, type=int))
+        self.cache_budget_mb = 2048
+        self.volume_cache = VolumeCache(max_bytes=self.cache_budget_mb * 1024 ** 2, loader=self.load_volume)
+        self.prefetch_depth = 2
+        self.prefetcher = RadarPrefetcher(depth=self.prefetch_depth, loader=self.volume_cache.get_or_load)
+
+        # 后台读取（不阻塞界面）
+        self.thread_pool = QThreadPool()
+        self._load_task = None
+        self._load_task_id = 0
+        self._load_callback = None
+        self._loading_index = None
+
+        # 实时模式：轮询数据目录中的新文件
+        self.live_interval_ms = 3000
+        self.live_watcher = None
+        self.live_timer = QTimer(self)
+        self.live_timer.timeout.connect(self.poll_live_folder)
+
+        # 动画播放的帧缓存（多次打开播放器共用）
+        self.frame_cache = FrameCache()
+        self.animation_player = None
+        # 多面板同步视图（跟随当前体扫）
+        self.multi_view = None
+        self.batch_export_dialog = None
+
+        # 光标读数：绘图后在后台取出同一仰角的所有产品
+        self.readout_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="readout")
+        self._readout = None
+        self._readout_source = None
+
         # 交互状态
         self._is_panning = False
-        self._pan_start = None
-        self._pan_extent = None
+        self.navigator = None
         self._mouse_cid = None
         self._press_cid = None
         self._release_cid = None
@@ -48,13 +121,18 @@ class RadarViewer(QMainWindow):
 
         # 绘图与当前状态
         self.ax = None
+        self.plot_state = None
         self.map_features = []
         self.map_visible = False
         self.left_panel = None
         self.canvas = None
         self.current_el = None
         self.current_product = None
-        self.data_qc = None
+
+        # 质控流水线：各步骤输出按体扫、仰角、产品与上游参数缓存，切换原始/质控视图无需重算
+        self.qc_pipeline = QCPipeline(cache=StageCache())
+        self.qc_step_checks = {}
+        self.qc_param_spins = {}
 
     # ---------------------- 菜单栏 ----------------------
     def create_menu_bar(self):
@@ -74,11 +152,19 @@ class RadarViewer(QMainWindow):
         save_action.setShortcut("Ctrl+S")
         save_action.triggered.connect(self.save_figure)
 
+        batch_export_action = QAction("批量导出...", self)
+        batch_export_action.triggered.connect(self.open_batch_export)
+
         exit_action = QAction("退出(&Q)", self)
         exit_action.setShortcut("Ctrl+Q")
         exit_action.triggered.connect(self.close)
 
-        file_menu.addActions([open_action, open_folder_action, save_action])
+        disk_cache_action = QAction("磁盘缓存...", self)
+        disk_cache_action.triggered.connect(self.configure_disk_cache)
+
+        file_menu.addActions([open_action, open_folder_action, save_action, batch_export_action])
+        file_menu.addSeparator()
+        file_menu.addAction(disk_cache_action)
         file_menu.addSeparator()
         file_menu.addAction(exit_action)
 
@@ -87,6 +173,34 @@ class RadarViewer(QMainWindow):
         overlay_action = QAction("叠加地图", self)
         overlay_action.triggered.connect(self.overlay_map)
         view_menu.addAction(overlay_action)
+        prefetch_action = QAction("预读深度...", self)
+        prefetch_action.triggered.connect(self.set_prefetch_depth)
+        view_menu.addAction(prefetch_action)
+        cache_action = QAction("缓存容量...", self)
+        cache_action.triggered.connect(self.set_cache_budget)
+        view_menu.addAction(cache_action)
+        engine_menu = view_menu.addMenu("渲染引擎")
+        engine_group = QActionGroup(self)
+        for engine, label in (("mesh", "网格（pcolormesh）"), ("raster", "栅格（快速）")):
+            engine_action = QAction(label, self, checkable=True)
+            engine_action.setChecked(engine == self.render_engine)
+            engine_action.triggered.connect(lambda checked, e=engine: self.set_render_engine(e))
+            engine_group.addAction(engine_action)
+            engine_menu.addAction(engine_action)
+        view_menu.addSeparator()
+        self.live_action = QAction("实时模式", self)
+        self.live_action.setCheckable(True)
+        self.live_action.toggled.connect(self.toggle_live_mode)
+        view_menu.addAction(self.live_action)
+        animation_action = QAction("动画播放...", self)
+        animation_action.triggered.connect(self.open_animation_player)
+        view_menu.addAction(animation_action)
+        multi_view_action = QAction("多面板视图...", self)
+        multi_view_action.triggered.connect(self.open_multi_view)
+        view_menu.addAction(multi_view_action)
+        overview_action = self.overview.toggleViewAction()
+        overview_action.setText("仰角总览")
+        view_menu.addAction(overview_action)
 
         # 编辑菜单
         edit_menu = menubar.addMenu("编辑(&E)")
@@ -114,27 +228,38 @@ class RadarViewer(QMainWindow):
         folder = QFileDialog.getExistingDirectory(self, "选择雷达数据文件夹")
         if not folder:
             return
-        self.folder_path = folder
-        files = [f for f in os.listdir(folder) if f.lower().endswith(".bz2")]
+        # 按扫描时间索引文件夹（只重新解析新增或变化的文件）
+        if self.catalog is not None:
+            self.catalog.close()
+        self.catalog = FolderCatalog(folder)
+        self.catalog.refresh()
+        files = self.catalog.file_list()
         if not files:
-            QMessageBox.warning(self, "提示", "该文件夹中未找到 .bz2 文件！")
+            QMessageBox.warning(self, "提示", "该文件夹中未找到雷达数据文件（.bin/.bz2/.gz）！")
             return
 
-        # 排序并保存文件列表
-        files.sort()
-        self.file_list = [os.path.join(folder, f) for f in files]
+        self.folder_path = folder
+        self.file_list = files
         self.current_index = 0
+        self.prefetcher.cancel()
+        if self.live_watcher is not None:
+            self.live_watcher = DirectoryWatcher(folder, known=files)
 
         # 加载第一个文件
         self.load_radar_file_by_index(0)
 
-    def load_radar_file_by_index(self, idx):
+    def load_radar_file_by_index(self, idx, replot=False):
         if not self.file_list or idx < 0 or idx >= len(self.file_list):
             QMessageBox.warning(self, "提示", "没有更多文件！")
             return
 
-        file = self.file_list[idx]
-        radar = load_radar_file(file)
+        # 后台读取，完成后在 on_index_loaded 中更新界面
+        self.start_loading(self.file_list[idx],
+                           lambda radar, file: self.on_index_loaded(idx, radar, file, replot))
+        self._loading_index = idx
+
+    def on_index_loaded(self, idx, radar, file, replot):
+        self._loading_index = None
         if radar is None:
             QMessageBox.critical(self, "错误", f"文件解析失败：{os.path.basename(file)}")
             return
@@ -142,6 +267,7 @@ class RadarViewer(QMainWindow):
         self.radar = radar
         self.radar_file = file
         self.current_index = idx
+        self.prefetcher.schedule(self.file_list, idx, current=radar)
 
         if not hasattr(self, "el_combo"):
             self.init_main_interface()
@@ -168,13 +294,175 @@ class RadarViewer(QMainWindow):
         if prev_product and prev_product in [self.var_combo.itemText(i) for i in range(self.var_combo.count())]:
             self.var_combo.setCurrentText(prev_product)
 
-        self.status_bar.showMessage(f"已加载文件：{os.path.basename(file)}")
+        if replot:
+            self.restore_previous_settings()
+        self.refresh_multi_view()
+        self.refresh_overview()
+
+        stats = self.volume_cache.stats()
+        self.status_bar.showMessage(
+            f"已加载文件：{os.path.basename(file)}（缓存命中 {stats['hits']} / 未命中 {stats['misses']}，"
+            f"{stats['bytes'] / 1024 ** 2:.0f}/{stats['max_bytes'] / 1024 ** 2:.0f} MB）"
+        )
+
+    # ---------------------- 实时模式 ----------------------
+    def toggle_live_mode(self, enabled):
+        if not enabled:
+            self.live_timer.stop()
+            self.live_watcher = None
+            self.status_bar.showMessage("已退出实时模式")
+            return
+        if not self.folder_path:
+            QMessageBox.warning(self, "提示", "请先打开文件夹！")
+            self.live_action.setChecked(False)
+            return
+        self.live_watcher = DirectoryWatcher(self.folder_path, known=self.file_list)
+        self.live_timer.start(self.live_interval_ms)
+        self.status_bar.showMessage(f"实时模式：正在监视 {self.folder_path}")
+
+    def poll_live_folder(self):
+        """轮询新文件：写入完成的文件加入索引并后台解析；若当前停在最新时次则自动切换并重绘"""
+        if self.live_watcher is None:
+            return
+        new_files = self.live_watcher.poll()
+        if not new_files:
+            return
+        was_latest = bool(self.file_list) and self._target_index() == len(self.file_list) - 1
+
+        self.catalog.add_files(new_files)
+        current_file = self.file_list[self.current_index] if 0 <= self.current_index < len(self.file_list) else None
+        self.file_list = self.catalog.file_list()
+        if current_file in self.file_list:
+            self.current_index = self.file_list.index(current_file)
+        for path in new_files:
+            self.prefetcher.submit(path)
+
+        latest = len(self.file_list) - 1
+        if (was_latest or self.radar is None) and self.file_list[latest] != current_file:
+            if hasattr(self, "el_combo") and self.el_combo.count() > 0:
+                self.current_el = self.el_combo.currentIndex()
+                self.current_product = self.var_combo.currentText()
+            self.load_radar_file_by_index(latest, replot=self.radar is not None)
+        else:
+            self.status_bar.showMessage(f"实时模式：新增 {len(new_files)} 个文件")
+
+    # ---------------------- 动画播放 ----------------------
+    def open_animation_player(self):
+        if not self.file_list or self.radar is None or not hasattr(self, "el_combo"):
+            QMessageBox.warning(self, "提示", "请先打开文件夹！")
+            return
+        if self.animation_player is not None:
+            self.animation_player.close()
+        self.animation_player = AnimationPlayer(self, self.frame_cache)
+        self.animation_player.show()
+
+    # ---------------------- 后台读取 ----------------------
+    def open_multi_view(self):
+        if self.radar is None or not hasattr(self, "el_combo"):
+            QMessageBox.warning(self, "提示", "请先选择并解析文件！")
+            return
+        if self.multi_view is None:
+            self.multi_view = MultiPanelView(self)
+        self.multi_view.show()
+        self.multi_view.raise_()
+        self.multi_view.render_panels()
+
+    def refresh_multi_view(self):
+        """新体扫加载后，已打开的多面板视图随之刷新"""
+        if self.multi_view is not None and self.multi_view.isVisible():
+            self.multi_view.render_panels()
+
+    def refresh_overview(self):
+        """总览可见时，按当前体扫、产品与范围显示各仰角缩略图"""
+        if not self.overview.isVisible() or self.radar is None or not hasattr(self, "var_combo"):
+            return
+        product = self.var_combo.currentText()
+        try:
+            drange = float(self.range_input.text())
+        except ValueError:
+            return
+        if product:
+            self.overview.show_volume(self.radar, self.radar_file, product, drange, self.el_combo.currentIndex())
+
+    def on_overview_tilt(self, tilt):
+        """点击缩略图：选中该仰角并完整绘制"""
+        if not hasattr(self, "el_combo") or not 0 <= tilt < self.el_combo.count():
+            return
+        self.el_combo.setCurrentIndex(tilt)
+        self.plot_data()
+
+    def fetch_volume(self, file, progress=None, cancel=None):
+        """在工作线程中执行：优先取预读结果（正在解析则等待其完成），未预读时从缓存取或解析"""
+        radar = self.prefetcher.get(file, wait=True)
+        if radar is not None:
+            return radar
+        return self.volume_cache.get_or_load(file, progress=progress, cancel=cancel)
+
+    def start_loading(self, file, on_loaded):
+        """
+        在线程池中读取文件，完成后在 GUI 线程调用 on_loaded(radar, file)。
+        新的读取会取消尚未完成的上一次读取。
+        """
+        self.cancel_loading()
+        self._load_task_id += 1
+        task = RadarLoadTask(self._load_task_id, file, self.fetch_volume)
+        task.signals.progress.connect(self.on_load_progress)
+        task.signals.finished.connect(self.on_load_finished)
+        task.signals.cancelled.connect(self.on_load_cancelled)
+        self._load_task = task
+        self._load_callback = on_loaded
+        self.load_progress.setValue(0)
+        self.load_progress.show()
+        self.cancel_load_btn.show()
+        self.status_bar.showMessage(f"正在解析文件：{os.path.basename(file)}")
+        self.thread_pool.start(task)
+
+    def cancel_loading(self):
+        if self._load_task is not None:
+            self._load_task.cancel()
+            self._load_task = None
+            self._load_callback = None
+            self._loading_index = None
+        self.load_progress.hide()
+        self.cancel_load_btn.hide()
+
+    def on_cancel_load_clicked(self):
+        if self._load_task is not None:
+            self.cancel_loading()
+            self.status_bar.showMessage("已取消读取")
+
+    def on_load_progress(self, task_id, percent):
+        if task_id == self._load_task_id:
+            self.load_progress.setValue(percent)
+
+    def on_load_finished(self, task_id, radar):
+        if task_id != self._load_task_id or self._load_task is None:
+            return  # 已被新的读取取代
+        file, callback = self._load_task.path, self._load_callback
+        self._load_task = None
+        self._load_callback = None
+        self.load_progress.hide()
+        self.cancel_load_btn.hide()
+        callback(radar, file)
+
+    def on_load_cancelled(self, task_id):
+        if task_id == self._load_task_id:
+            self.cancel_loading()
 
     # ---------------------- 打开单个文件 ----------------------
     def load_file(self):
-        radar, file = load_radar_via_dialog(self, self.status_bar)
+        file = select_radar_file(self)
+        if not file:
+            return
+        self.start_loading(file, self.on_file_loaded)
+
+    def on_file_loaded(self, radar, file):
         if radar is None:
+            QMessageBox.critical(self, "错误", "非标准格式雷达数据")
+            self.status_bar.showMessage("文件解析失败")
             return
+        QMessageBox.information(self, "消息", "文件解析成功！")
+        self.status_bar.showMessage(f"已加载文件：{os.path.basename(file)}")
 
         self.radar = radar
         self.radar_file = file
@@ -187,34 +475,38 @@ class RadarViewer(QMainWindow):
             self.el_combo.addItem(f"{el:.1f}")
         for v in radar.available_product(0):
             self.var_combo.addItem(v)
+        self.refresh_multi_view()
+        self.refresh_overview()
 
     # ---------------------- 翻页功能 ----------------------
+    def _target_index(self):
+        """连续翻页时以正在读取的文件为基准"""
+        return self._loading_index if self._loading_index is not None else self.current_index
+
     def load_previous_file(self):
         if not self.file_list:
             QMessageBox.warning(self, "提示", "请先打开文件夹！")
             return
-        if self.current_index <= 0:
+        if self._target_index() <= 0:
             QMessageBox.information(self, "提示", "已是第一个文件。")
             return
         # 记住当前选择
         self.current_el = self.el_combo.currentIndex()
         self.current_product = self.var_combo.currentText()
 
-        self.load_radar_file_by_index(self.current_index - 1)
-        self.restore_previous_settings()
+        self.load_radar_file_by_index(self._target_index() - 1, replot=True)
 
     def load_next_file(self):
         if not self.file_list:
             QMessageBox.warning(self, "提示", "请先打开文件夹！")
             return
-        if self.current_index >= len(self.file_list) - 1:
+        if self._target_index() >= len(self.file_list) - 1:
             QMessageBox.information(self, "提示", "已是最后一个文件。")
             return
         self.current_el = self.el_combo.currentIndex()
         self.current_product = self.var_combo.currentText()
 
-        self.load_radar_file_by_index(self.current_index + 1)
-        self.restore_previous_settings()
+        self.load_radar_file_by_index(self._target_index() + 1, replot=True)
 
     def restore_previous_settings(self):
         if self.current_el is not None:
@@ -223,6 +515,57 @@ class RadarViewer(QMainWindow):
             self.var_combo.setCurrentText(self.current_product)
         self.plot_data()
 
+    def set_prefetch_depth(self):
+        depth, ok = QInputDialog.getInt(self, "预读深度", "前后各预读的时次数（0 为关闭）：",
+                                        self.prefetch_depth, 0, 20)
+        if not ok:
+            return
+        self.prefetch_depth = depth
+        self.prefetcher.set_depth(depth)
+        if self.file_list and self.current_index >= 0:
+            self.prefetcher.schedule(self.file_list, self.current_index, current=self.radar)
+        self.status_bar.showMessage(f"预读深度：{depth}")
+
+    def load_volume(self, file, progress=None, cancel=None):
+        """解析单个体扫（按需解码）；开启磁盘缓存时优先映射已缓存的解析结果"""
+        if self.disk_cache is not None:
+            return self.disk_cache.get_or_load(file, lazy=True, progress=progress, cancel=cancel)
+        return load_radar_file(file, lazy=True, progress=progress, cancel=cancel)
+
+    def enable_disk_cache(self, cache_dir, max_mb):
+        try:
+            self.disk_cache = DiskVolumeCache(cache_dir, max_bytes=max_mb * 1024 ** 2)
+        except OSError:
+            self.disk_cache = None
+
+    def configure_disk_cache(self):
+        folder = QFileDialog.getExistingDirectory(self, "选择磁盘缓存目录（取消则关闭磁盘缓存）")
+        if not folder:
+            self.disk_cache = None
+            self.settings.setValue("disk_cache_dir", "")
+            self.status_bar.showMessage("已关闭磁盘缓存")
+            return
+        max_mb, ok = QInputDialog.getInt(self, "磁盘缓存", "磁盘缓存容量上限（MB）：",
+                                         self.settings.value("disk_cache_mb", 10240, type=int), 256, 1048576)
+        if not ok:
+            return
+        self.enable_disk_cache(folder, max_mb)
+        if self.disk_cache is None:
+            QMessageBox.critical(self, "错误", f"无法使用缓存目录：{folder}")
+            return
+        self.settings.setValue("disk_cache_dir", folder)
+        self.settings.setValue("disk_cache_mb", max_mb)
+        self.status_bar.showMessage(f"磁盘缓存：{folder}（上限 {max_mb} MB）")
+
+    def set_cache_budget(self):
+        budget, ok = QInputDialog.getInt(self, "缓存容量", "已解析体扫的内存上限（MB）：",
+                                         self.cache_budget_mb, 64, 65536)
+        if not ok:
+            return
+        self.cache_budget_mb = budget
+        self.volume_cache.set_max_bytes(budget * 1024 ** 2)
+        self.status_bar.showMessage(f"缓存容量：{budget} MB")
+
     def save_figure(self):
         if not self.canvas:
             QMessageBox.warning(self, "提示", "暂无可保存的图像！")
@@ -232,6 +575,14 @@ class RadarViewer(QMainWindow):
             self.fig.savefig(file, dpi=300)
             self.status_bar.showMessage(f"图像已保存至：{file}")
 
+    def open_batch_export(self):
+        if not self.file_list or self.radar is None:
+            QMessageBox.warning(self, "提示", "请先打开文件夹！")
+            return
+        if self.batch_export_dialog is None:
+            self.batch_export_dialog = BatchExportDialog(self)
+        self.batch_export_dialog.show()
+
     # ---------------------- 主界面 ----------------------
     def init_main_interface(self):
         for i in reversed(range(self.main_layout.count())):
@@ -307,14 +658,33 @@ class RadarViewer(QMainWindow):
         group_qc = QGroupBox("数据处理")
         qc_layout = QVBoxLayout()
 
-        self.qc_clutter = QRadioButton("地物杂波抑制")
-        self.qc_attenuation = QRadioButton("衰减订正")
+        # 每个步骤一个勾选框及其参数，按 QC_STEPS 的顺序组成流水线
+        steps_grid = QGridLayout()
+        row = 0
+        for name, (label, _, _, specs) in QC_STEPS.items():
+            check = QCheckBox(label)
+            steps_grid.addWidget(check, row, 0, 1, 2)
+            self.qc_step_checks[name] = check
+            row += 1
+            for param, spec in specs.items():
+                spin = self.make_param_spin(spec)
+                steps_grid.addWidget(QLabel(QC_PARAM_LABELS.get(param, param)), row, 0)
+                steps_grid.addWidget(spin, row, 1)
+                self.qc_param_spins[(name, param)] = spin
+                row += 1
         self.btn_apply_qc = QPushButton("应用")
+        self.qc_show_check = QCheckBox("显示质控结果")
+        self.qc_show_check.setEnabled(False)
+        self.qc_show_check.toggled.connect(self.on_qc_view_toggled)
+        # 杂波概率单独成图，窗口大小取自地物杂波抑制步骤的参数
+        self.clutter_prob_check = QCheckBox("显示杂波概率")
+        self.clutter_prob_check.toggled.connect(self.on_qc_view_toggled)
 
         # 添加到布局
-        qc_layout.addWidget(self.qc_clutter)
-        qc_layout.addWidget(self.qc_attenuation)
+        qc_layout.addLayout(steps_grid)
         qc_layout.addWidget(self.btn_apply_qc)
+        qc_layout.addWidget(self.qc_show_check)
+        qc_layout.addWidget(self.clutter_prob_check)
 
         group_qc.setLayout(qc_layout)
         left_layout.addWidget(group_qc)
@@ -337,6 +707,8 @@ class RadarViewer(QMainWindow):
                 self._motion_cid = self.canvas.mpl_connect("motion_notify_event", self.on_mouse_drag)
             if getattr(self, "_scroll_cid", None) is None:
                 self._scroll_cid = self.canvas.mpl_connect("scroll_event", self.on_scroll_mpl)
+            # 拖曳/缩放过程中只平移、缩放已渲染的位图，手势结束后再完整重绘
+            self.navigator = BlitNavigator(self.canvas, on_finished=self.on_view_changed)
         else:
             try:
                 # 有时候 canvas 绑定了旧的 fig，尝试把 canvas 的 figure 指向当前 fig
@@ -370,33 +742,87 @@ class RadarViewer(QMainWindow):
             QMessageBox.warning(self, "错误", "探测范围必须为数字！")
             return
 
-        self.fig.clear()
-        self.ax = self.fig.add_subplot(111)
-        result = plot_radar_data(
-            self.fig, self.radar, tilt, product, drange, self.radar_file, self.county_shp,
-            self.map_visible, self.data_qc
-        )
+        if self.clutter_prob_check.isChecked():
+            product = CLUTTER_PROBABILITY
+            data_qc = self.clutter_probability(tilt, drange)
+            if data_qc is None:
+                return
+        else:
+            data_qc = self.qc_data(tilt, product, drange)
+
+        # 几何不变（同站、同仰角、同范围）时只替换网格数据，保留坐标轴、颜色条与地图要素
+        result = None
+        same_engine = self.plot_state is not None and \
+            (self.plot_state.get("raster") is not None) == (self.render_engine == "raster")
+        if same_engine and self.plot_state.get("ax") is self.ax:
+            result = update_radar_data(self.plot_state, self.radar, tilt, product, drange,
+                                       self.radar_file, data_qc)
+        rebuilt = result is None
+        if self.navigator is not None:
+            self.navigator.cancel()
+        if rebuilt:
+            self.fig.clear()
+            self.ax = self.fig.add_subplot(111)
+            result = plot_radar_data(
+                self.fig, self.radar, tilt, product, drange, self.radar_file, self.county_shp,
+                self.map_visible, data_qc, engine=self.render_engine
+            )
 
         if result["success"]:
+            self.plot_state = result
             self.ax = result["ax"]
             self.map_features = result["features"]
             self.canvas.draw()
             self.status_bar.showMessage("绘图完成")
-            # 保存初始视图范围
-            self._orig_extent = self.ax.get_extent(crs=ccrs.PlateCarree())
+            self.schedule_readout(tilt, drange)
+            self.refresh_overview()
+            # 保存初始视图范围（增量刷新时保持用户当前的缩放与平移）
+            if rebuilt:
+                self._orig_extent = self.ax.get_extent(crs=ccrs.PlateCarree())
         else:
+            self.plot_state = None
             QMessageBox.critical(self, "错误", result["error"])
 
-    # ---------------------- 鼠标显示经纬度 ----------------------
+    def set_render_engine(self, engine):
+        if engine == self.render_engine:
+            return
+        self.render_engine = engine
+        if self.plot_state is not None and self.plot_state.get("success"):
+            self.plot_data()
+
+    def on_view_changed(self, ax):
+        """平移/缩放结束：栅格引擎按新的显示范围重新采样，网格引擎按缩放程度选择细节层级"""
+        if self.plot_state is not None and self.plot_state.get("ax") is ax:
+            refresh_view(self.plot_state)
+
+    # ---------------------- 鼠标显示经纬度与读数 ----------------------
+    def schedule_readout(self, tilt, drange):
+        """体扫、仰角、范围或几何变化后，在后台重新取出该仰角所有产品供光标读数使用"""
+        geometry = self.plot_state["site"]
+        source = (self.radar, tilt, drange, geometry)
+        if self._readout is not None and self._readout_source == source:
+            return
+        if self._readout is not None:
+            self._readout.cancel()
+        self._readout_source = source
+        self._readout = self.readout_executor.submit(GateReadout.from_volume, self.radar, tilt, drange, geometry)
+
     def on_mouse_move(self, event):
         if self.ax is None or event.inaxes != self.ax or event.xdata is None or event.ydata is None:
             self.status_bar.clearMessage()
             return
-        try:
-            lon, lat = ccrs.PlateCarree().transform_point(event.xdata, event.ydata, self.ax.projection)
-            self.status_bar.showMessage(f"Lon: {lon:.3f}°, Lat: {lat:.3f}°")
-        except Exception:
+        state = self.plot_state
+        if state is None or state.get("ax") is not self.ax:
             self.status_bar.clearMessage()
+            return
+        # 坐标轴即站点投影，xdata/ydata 就是投影坐标，不再逐事件做坐标变换
+        future = self._readout
+        if future is not None and future.done() and not future.cancelled() and future.exception() is None:
+            text = future.result().describe(event.xdata, event.ydata)
+        else:
+            lon, lat = state["site"].lonlat_at(event.xdata, event.ydata)
+            text = f"Lon: {lon:.3f}°, Lat: {lat:.3f}°"
+        self.status_bar.showMessage(text)
 
     # ---------------------- 地图叠加 ----------------------
     def overlay_map(self):
@@ -406,7 +832,11 @@ class RadarViewer(QMainWindow):
 
         self.ax = self.fig.axes[0]
         if not self.map_features:
-            self.map_features = create_map_features_on_ax(self.ax, self.county_shp)
+            try:
+                max_range = float(self.range_input.text())
+            except ValueError:
+                max_range = None
+            self.map_features = create_map_features_on_ax(self.ax, self.county_shp, max_range)
             self.map_visible = True
             self.status_bar.showMessage("已叠加地图。")
         else:
@@ -423,19 +853,14 @@ class RadarViewer(QMainWindow):
             return
 
         if event.button == 1:  # 左键拖曳平移
-            try:
-                lon, lat = ccrs.PlateCarree().transform_point(event.xdata, event.ydata, self.ax.projection)
-                self._is_panning = True
-                self._pan_start = (lon, lat)
-                self._pan_extent = list(self.ax.get_extent(crs=ccrs.PlateCarree()))
-            except Exception:
-                self._is_panning = False
-                self._pan_start = None
+            self._is_panning = self.navigator.pan_start(self.ax, event.x, event.y)
 
         elif event.button == 3:  # 右键复位
             if hasattr(self, "_orig_extent") and self._orig_extent is not None:
                 try:
+                    self.navigator.cancel()
                     self.ax.set_extent(self._orig_extent, crs=ccrs.PlateCarree())
+                    self.on_view_changed(self.ax)
                     self.canvas.draw_idle()
                     self.status_bar.showMessage("已复位到初始视图")
                 except Exception:
@@ -444,61 +869,77 @@ class RadarViewer(QMainWindow):
     def on_mouse_release(self, event):
         if self._is_panning:
             self._is_panning = False
-            self._pan_start = None
-            self._pan_extent = None
+            self.navigator.pan_end()
 
     def on_mouse_drag(self, event):
-        if not self._is_panning or self.ax is None or event.inaxes != self.ax:
+        # 只记录最新位置，由导航器按刷新率合并绘制
+        if not self._is_panning or event.x is None or event.y is None:
             return
-        if event.xdata is None or event.ydata is None:
-            return
-        try:
-            cur_lon, cur_lat = ccrs.PlateCarree().transform_point(event.xdata, event.ydata, self.ax.projection)
-            start_lon, start_lat = self._pan_start
-            dlon = start_lon - cur_lon
-            dlat = start_lat - cur_lat
-            lon_min, lon_max, lat_min, lat_max = self._pan_extent
-            new_extent = [lon_min + dlon, lon_max + dlon, lat_min + dlat, lat_max + dlat]
-            self.ax.set_extent(new_extent, crs=ccrs.PlateCarree())
-            self.canvas.draw_idle()
-        except Exception:
-            pass
+        self.navigator.pan_move(event.x, event.y)
 
     # ---------------------- 滚轮缩放 ----------------------
     def on_scroll_mpl(self, event):
-        if self.ax is None or event.inaxes != self.ax or event.xdata is None or event.ydata is None:
+        if self.ax is None or event.inaxes != self.ax:
             return
+        base_scale = 1.2
+        factor = base_scale if event.button == 'up' else 1.0 / base_scale
+        self.navigator.zoom(self.ax, event.x, event.y, factor)
+
+    @staticmethod
+    def make_param_spin(spec):
+        """:param spec: QCParam；整数参数用 QSpinBox，只取奇数的参数（窗口大小）输入偶数时进为奇数"""
+        if spec.decimals == 0:
+            spin = QSpinBox()
+            if spec.odd:
+                spin.editingFinished.connect(lambda: spin.setValue(min(spin.value() | 1, spec.maximum)))
+        else:
+            spin = QDoubleSpinBox()
+            spin.setDecimals(spec.decimals)
+        spin.setRange(spec.minimum, spec.maximum)
+        spin.setSingleStep(spec.step)
+        spin.setValue(spec.default)
+        return spin
+
+    def build_qc_pipeline(self):
+        """:return: 按勾选的步骤与参数组成的 QCPipeline（共用同一个步骤缓存）"""
+        steps = []
+        for name, check in self.qc_step_checks.items():
+            if check.isChecked():
+                params = {param: spin.value() for (step, param), spin in self.qc_param_spins.items()
+                          if step == name}
+                steps.append(QCStep(name, **params))
+        return QCPipeline(steps, cache=self.qc_pipeline.cache)
+
+    def qc_data(self, tilt, product, drange):
+        """
+        当前视图使用的质控数据：未开启质控视图、流水线为空或产品不适用时返回 None（绘制原始数据）。
+        """
+        if not self.qc_show_check.isChecked() or not self.qc_pipeline.steps:
+            return None
+        if product.upper() not in QC_PRODUCTS:
+            self.status_bar.showMessage(f"质控不适用于 {product}，显示原始数据")
+            return None
         try:
-            center_lon, center_lat = ccrs.PlateCarree().transform_point(event.xdata, event.ydata,
-                                                                        self.ax.projection)
-            lon_min, lon_max, lat_min, lat_max = self.ax.get_extent(crs=ccrs.PlateCarree())
-            base_scale = 1.2
-            scale = 1.0 / base_scale if event.button == 'up' else base_scale
-            lon_left = center_lon - (center_lon - lon_min) * scale
-            lon_right = center_lon + (lon_max - center_lon) * scale
-            lat_bottom = center_lat - (center_lat - lat_min) * scale
-            lat_top = center_lat + (lat_max - center_lat) * scale
-            # 最小跨度
-            MIN_LON_SPAN = 0.01
-            MIN_LAT_SPAN = 0.01
-            if (lon_right - lon_left) < MIN_LON_SPAN:
-                lon_left = center_lon - MIN_LON_SPAN / 2
-                lon_right = center_lon + MIN_LON_SPAN / 2
-            if (lat_top - lat_bottom) < MIN_LAT_SPAN:
-                lat_bottom = center_lat - MIN_LAT_SPAN / 2
-                lat_top = center_lat + MIN_LAT_SPAN / 2
-            # 限制范围
-            lon_left = max(-180, lon_left)
-            lon_right = min(180, lon_right)
-            lat_bottom = max(-90, lat_bottom)
-            lat_top = min(90, lat_top)
-            self.ax.set_extent([lon_left, lon_right, lat_bottom, lat_top], crs=ccrs.PlateCarree())
-            self.canvas.draw_idle()
-        except Exception:
-            pass
+            return self.qc_pipeline.run(self.radar, self.radar_file, tilt, product, drange)
+        except Exception as e:
+            self.status_bar.showMessage(f"质控失败：{e}")
+            return None
+
+    def clutter_probability(self, tilt, drange):
+        """当前仰角的杂波概率（已缓存时直接返回）；无法计算时返回 None"""
+        if "REF" not in self.radar.available_product(tilt):
+            QMessageBox.information(self, "提示", "该仰角没有反射率数据，无法计算杂波概率！")
+            return None
+        window = {param: self.qc_param_spins[("clutter", param)].value() for param in CLUTTER_WINDOW_PARAMS}
+        try:
+            return self.qc_pipeline.clutter_probability(self.radar, self.radar_file, tilt, drange, **window)
+        except Exception as e:
+            QMessageBox.critical(self, "错误", f"杂波概率计算失败：{e}")
+            return None
 
     def apply_qc(self):
-        if not (self.qc_clutter.isChecked() or self.qc_attenuation.isChecked()):
+        pipeline = self.build_qc_pipeline()
+        if not pipeline.steps:
             QMessageBox.information(self, "提示", "请至少勾选一种处理方法！")
             return
 
@@ -507,44 +948,45 @@ class RadarViewer(QMainWindow):
             return
 
         product = self.var_combo.currentText().upper()
-        if product not in ["REF", "ZDR", "PHI", "KDP"]:
-            QMessageBox.information(self, "提示", "算法仅适用于REF、ZDR、PHI、KDP！")
+        if product not in QC_PRODUCTS:
+            QMessageBox.information(self, "提示", "算法仅适用于" + "、".join(QC_PRODUCTS) + "！")
             return
 
-        # 按勾选调用数据处理算法
-        applied_methods = []
-        if self.qc_clutter.isChecked():
-            ground_clutter_filter(self)
-            applied_methods.append("地物杂波抑制")
-
-        elif self.qc_attenuation.isChecked():
-            attenuation_correction(self)
-            applied_methods.append("衰减订正")
-
-        if not applied_methods:
-            QMessageBox.information(self, "提示", "请先选择一种质控方法！")
-            return False
+        self.qc_pipeline = pipeline
+        self.qc_show_check.setEnabled(True)
+        # 已勾选时 toggled 不会触发，直接重绘
+        if self.qc_show_check.isChecked():
+            self.plot_data()
+        else:
+            self.qc_show_check.setChecked(True)
+        self.status_bar.showMessage("已应用数据处理：" + " → ".join(step.label for step in pipeline.steps))
 
-        # 绘图
-        self.plot_data()  # 内部逻辑可优先使用 self.qc_data 绘图
-        # 清空旧的质控数据
-        self.data_qc = None
-        self.status_bar.showMessage("已应用数据处理：" + "、".join(applied_methods))
+    def on_qc_view_toggled(self, checked):
+        """在原始数据与质控结果之间切换（质控结果已缓存时无需重算）"""
+        if self.radar is not None and self.plot_state is not None:
+            self.plot_data()
 
     def apply_qc_from_menu(self, method):
-        """菜单点击时调用，统一到 apply_qc()"""
-        # 先清空所有勾选
-        self.qc_clutter.setChecked(False)
-        self.qc_attenuation.setChecked(False)
-
-        # 根据菜单选择勾选对应的选项
-        if method == "clutter":
-            self.qc_clutter.setChecked(True)
-        elif method == "attenuation":
-            self.qc_attenuation.setChecked(True)
+        """菜单点击时调用，只勾选对应的步骤，统一到 apply_qc()"""
+        for name, check in self.qc_step_checks.items():
+            check.setChecked(name == method)
 
         # 调用统一的数据处理逻辑
         self.apply_qc()
 
+    def closeEvent(self, event):
+        if self.animation_player is not None:
+            self.animation_player.close()
+        if self.multi_view is not None:
+            self.multi_view.close()
+        if self.batch_export_dialog is not None:
+            self.batch_export_dialog.close()
+        self.live_timer.stop()
+        self.cancel_loading()
+        self.prefetcher.shutdown()
+        self.readout_executor.shutdown(wait=False, cancel_futures=True)
+        self.overview.shutdown()
+        super().closeEvent(event)
+
     def show_about(self):
         QMessageBox.about(self, "关于", "X波段天气雷达数据处理与可视化软件\n版本：v1.0\n作者：lihb")
\ No newline at end of file
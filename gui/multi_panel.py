@@ -0,0 +1,299 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from PyQt5.QtCore import QObject, QThread, pyqtSignal
+from PyQt5.QtWidgets import (
+    QDialog, QLabel, QPushButton, QComboBox, QVBoxLayout, QHBoxLayout, QGridLayout, QGroupBox,
+    QMessageBox
+)
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.figure import Figure
+from visualization.plotter import (
+    prepare_panel, draw_panel, update_panel, refresh_view, create_map_features_on_ax
+)
+from gui.navigation import BlitNavigator
+
+# 面板布局：名称 -> (行数, 列数)
+PANEL_LAYOUTS = {"1×2": (1, 2), "1×3": (1, 3), "2×2": (2, 2), "2×3": (2, 3)}
+# 默认依次显示的产品（体扫中不存在的跳过）
+DEFAULT_PRODUCTS = ("REF", "VEL", "ZDR", "KDP", "RHO", "SW")
+
+
+class PanelSignals(QObject):
+    ready = pyqtSignal(int, int, object)   # 批次号, 面板序号, prepare_panel 的结果
+    failed = pyqtSignal(int, int, str)     # 批次号, 面板序号, 错误信息
+
+
+def prepare_panel_task(signals, batch, index, radar, tilt, product, drange):
+    """在后台线程中取出一个面板的数据（取产品、查几何缓存、对齐径向），绘制留给 GUI 线程"""
+    try:
+        panel = prepare_panel(radar, tilt, product, drange)
+    except Exception as e:
+        signals.failed.emit(batch, index, str(e))
+        return
+    signals.ready.emit(batch, index, panel)
+
+
+class MultiPanelView(QDialog):
+    """
+    同一体扫多个产品/仰角的同步多面板视图。
+    各面板数据在专用线程池中并行准备，同站、同仰角、同范围的面板共用同一份已投影网格；
+    平移/缩放在所有面板间联动（手势过程中各面板只移动已渲染的位图）。
+    """
+
+    def __init__(self, viewer):
+        """
+        :param viewer: RadarViewer（提供当前体扫、文件、仰角、探测范围、渲染引擎与地图设置）
+        """
+        super().__init__(viewer)
+        self.setWindowTitle("多面板同步视图")
+        self.resize(1200, 900)
+        self.viewer = viewer
+        # 线程池在渲染时创建、关闭窗口时释放（窗口关闭后仍被主窗口保留，可再次打开）
+        self.executor = None
+        self.signals = PanelSignals()
+        self.signals.ready.connect(self.on_panel_ready)
+        self.signals.failed.connect(self.on_panel_failed)
+        self._batch = 0
+        self._pending = {}
+        self._errors = {}
+        self._specs = []
+        self._drange = None
+        self._layout_key = None
+        self.states = []
+        self.axes = []
+        self._orig_limits = None
+        self._is_panning = False
+
+        self.layout_combo = QComboBox()
+        self.layout_combo.addItems(list(PANEL_LAYOUTS))
+        self.layout_combo.setCurrentText("2×2")
+        self.layout_combo.currentTextChanged.connect(self.build_panel_controls)
+        self.draw_btn = QPushButton("绘制")
+        self.draw_btn.clicked.connect(self.render_panels)
+        self.info_label = QLabel()
+
+        top = QHBoxLayout()
+        top.addWidget(QLabel("布局"))
+        top.addWidget(self.layout_combo)
+        top.addWidget(self.draw_btn)
+        top.addWidget(self.info_label, 1)
+        self.panel_box = QGroupBox("面板（产品 / 仰角）")
+        self.panel_grid = QGridLayout()
+        self.panel_box.setLayout(self.panel_grid)
+        self.product_combos = []
+        self.tilt_combos = []
+
+        self.fig = Figure(figsize=(12, 9), layout="constrained")
+        self.canvas = FigureCanvas(self.fig)
+        self.canvas.mpl_connect("button_press_event", self.on_mouse_press)
+        self.canvas.mpl_connect("button_release_event", self.on_mouse_release)
+        self.canvas.mpl_connect("motion_notify_event", self.on_mouse_drag)
+        self.canvas.mpl_connect("scroll_event", self.on_scroll_mpl)
+        self.navigator = BlitNavigator(self.canvas, on_finished=self.on_view_changed,
+                                       link_axes=lambda ax: self.axes)
+
+        layout = QVBoxLayout()
+        layout.addLayout(top)
+        layout.addWidget(self.panel_box)
+        layout.addWidget(self.canvas, 1)
+        self.setLayout(layout)
+        self.build_panel_controls()
+
+    # ---------------------- 面板设置 ----------------------
+    def build_panel_controls(self):
+        """按布局重建各面板的产品/仰角选择，默认同一仰角的不同产品"""
+        previous = self.panel_specs() if self.product_combos else []
+        while self.panel_grid.count():
+            widget = self.panel_grid.takeAt(0).widget()
+            if widget is not None:
+                widget.setParent(None)
+                widget.deleteLater()
+        self.product_combos = []
+        self.tilt_combos = []
+
+        radar = self.viewer.radar
+        if radar is None:
+            return
+        products = list(radar.available_product(0))
+        defaults = [p for p in DEFAULT_PRODUCTS if p in products] + \
+                   [p for p in products if p not in DEFAULT_PRODUCTS]
+        tilt = max(self.viewer.el_combo.currentIndex(), 0)
+        rows, cols = PANEL_LAYOUTS[self.layout_combo.currentText()]
+        for i in range(rows * cols):
+            product_combo = QComboBox()
+            product_combo.addItems(products)
+            tilt_combo = QComboBox()
+            tilt_combo.addItems([f"{el:.1f}°" for el in radar.el])
+            if i < len(previous):
+                product, panel_tilt = previous[i]
+            else:
+                product, panel_tilt = (defaults[i % len(defaults)] if defaults else ""), tilt
+            product_combo.setCurrentText(product)
+            tilt_combo.setCurrentIndex(min(panel_tilt, tilt_combo.count() - 1))
+            self.panel_grid.addWidget(QLabel(f"{i + 1}"), i // cols, 3 * (i % cols))
+            self.panel_grid.addWidget(product_combo, i // cols, 3 * (i % cols) + 1)
+            self.panel_grid.addWidget(tilt_combo, i // cols, 3 * (i % cols) + 2)
+            self.product_combos.append(product_combo)
+            self.tilt_combos.append(tilt_combo)
+
+    def panel_specs(self):
+        """:return: [(产品, 仰角索引), ...]"""
+        return [(p.currentText(), t.currentIndex()) for p, t in zip(self.product_combos, self.tilt_combos)]
+
+    # ---------------------- 渲染 ----------------------
+    def render_panels(self):
+        """在线程池中并行准备所有面板的数据，全部到齐后在 GUI 线程中绘制"""
+        radar = self.viewer.radar
+        if radar is None:
+            QMessageBox.warning(self, "提示", "请先选择并解析文件！")
+            return
+        try:
+            drange = float(self.viewer.range_input.text())
+        except ValueError:
+            QMessageBox.warning(self, "错误", "探测范围必须为数字！")
+            return
+        if not self.product_combos:
+            self.build_panel_controls()
+
+        specs = self.panel_specs()
+        self._batch += 1
+        self._pending = {}
+        self._errors = {}
+        self._specs = specs
+        self._drange = drange
+        if self.executor is None:
+            # 几何投影调用 pyproj，其线程上下文随 Python 线程状态释放，而 QThreadPool 的线程每个任务结束后
+            # 都会丢弃线程状态，之后再用同一线程会访问已释放的上下文，因此使用 Python 线程池
+            self.executor = ThreadPoolExecutor(max_workers=max(1, min(6, QThread.idealThreadCount())),
+                                               thread_name_prefix="multi-panel")
+        for i, (product, tilt) in enumerate(specs):
+            self.executor.submit(prepare_panel_task, self.signals, self._batch, i, radar, tilt, product, drange)
+        self.info_label.setText("正在准备数据...")
+
+    def on_panel_ready(self, batch, index, panel):
+        if batch != self._batch:
+            return
+        self._pending[index] = panel
+        self._maybe_draw()
+
+    def on_panel_failed(self, batch, index, message):
+        if batch != self._batch:
+            return
+        self._errors[index] = message
+        self._maybe_draw()
+
+    def _maybe_draw(self):
+        if len(self._pending) + len(self._errors) < len(self._specs):
+            return
+        self.navigator.cancel()
+        panels = [self._pending.get(i) for i in range(len(self._specs))]
+        layout_key = (self.layout_combo.currentText(), self.viewer.render_engine, self._drange,
+                      tuple(i for i, p in enumerate(panels) if p is None))
+        # 布局、引擎与几何都不变时只替换各面板的数据，保留坐标轴与当前缩放
+        updated = None
+        if layout_key == self._layout_key and len(self.states) == len(panels):
+            updated = []
+            for state, panel in zip(self.states, panels):
+                if panel is None:
+                    updated.append(None)
+                    continue
+                result = update_panel(state, panel, self.panel_title(panel))
+                if result is None or not result["success"]:
+                    updated = None
+                    break
+                updated.append(result)
+        if updated is not None:
+            self.states = updated
+        else:
+            self.rebuild(panels)
+            self._layout_key = layout_key
+        self.canvas.draw()
+
+        name = os.path.basename(self.viewer.radar_file or "")
+        if self._errors:
+            errors = "；".join(f"面板 {i + 1}：{msg}" for i, msg in sorted(self._errors.items()))
+            self.info_label.setText(f"{name}  {errors}")
+        else:
+            self.info_label.setText(name)
+
+    def rebuild(self, panels):
+        """清空画布并按布局重新创建所有面板"""
+        fig = self.fig
+        fig.clear()
+        rows, cols = PANEL_LAYOUTS[self.layout_combo.currentText()]
+        self.states = []
+        self.axes = []
+        engine = self.viewer.render_engine
+        for i, panel in enumerate(panels):
+            if panel is None:
+                ax = fig.add_subplot(rows, cols, i + 1)
+                ax.set_axis_off()
+                ax.text(0.5, 0.5, self._errors.get(i, ""), ha="center", va="center", wrap=True,
+                        transform=ax.transAxes)
+                self.states.append(None)
+                continue
+            ax = fig.add_subplot(rows, cols, i + 1, projection=panel["geometry"].projection)
+            state = draw_panel(ax, panel, self.panel_title(panel), engine, colorbar_shrink=0.8)
+            if self.viewer.map_visible:
+                state["features"] = create_map_features_on_ax(ax, self.viewer.county_shp, self._drange)
+            self.states.append(state)
+            self.axes.append(ax)
+        fig.suptitle(os.path.basename(self.viewer.radar_file or ""))
+
+        # 各面板统一为第一个面板的显示范围（同一站点投影，数据坐标一致）
+        if self.axes:
+            xlim, ylim = self.axes[0].get_xlim(), self.axes[0].get_ylim()
+            self._orig_limits = (xlim, ylim)
+            self.set_limits(xlim, ylim)
+
+    @staticmethod
+    def panel_title(panel):
+        return f"{panel['product']} @ {panel['elevation']:.1f}°"
+
+    def set_limits(self, xlim, ylim):
+        for ax in self.axes:
+            ax.set_xlim(*xlim)
+            ax.set_ylim(*ylim)
+        self.on_view_changed(None)
+
+    def on_view_changed(self, ax):
+        """联动的平移/缩放结束：所有面板按新的显示范围重新采样或选择细节层级"""
+        for state in self.states:
+            if state is not None:
+                refresh_view(state)
+
+    # ---------------------- 鼠标事件 ----------------------
+    def on_mouse_press(self, event):
+        if event.inaxes not in self.axes:
+            return
+        if event.button == 1:  # 左键拖曳平移（所有面板联动）
+            self._is_panning = self.navigator.pan_start(event.inaxes, event.x, event.y)
+        elif event.button == 3 and self._orig_limits is not None:  # 右键复位
+            self.navigator.cancel()
+            self.set_limits(*self._orig_limits)
+            self.canvas.draw_idle()
+
+    def on_mouse_release(self, event):
+        if self._is_panning:
+            self._is_panning = False
+            self.navigator.pan_end()
+
+    def on_mouse_drag(self, event):
+        if not self._is_panning or event.x is None or event.y is None:
+            return
+        self.navigator.pan_move(event.x, event.y)
+
+    def on_scroll_mpl(self, event):
+        if event.inaxes not in self.axes:
+            return
+        factor = 1.2 if event.button == 'up' else 1.0 / 1.2
+        self.navigator.zoom(event.inaxes, event.x, event.y, factor)
+
+    def closeEvent(self, event):
+        # 丢弃尚未返回的结果
+        self._batch += 1
+        self.navigator.cancel()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        super().closeEvent(event)
@@ -0,0 +1,211 @@
+import numpy as np
+from PyQt5.QtCore import QObject, QTimer
+from PyQt5.QtWidgets import QApplication
+from matplotlib.image import BboxImage
+from matplotlib.patches import Rectangle
+from matplotlib.transforms import Bbox, IdentityTransform
+
+
+class BlitNavigator(QObject):
+    """
+    交互式平移/缩放。
+    手势开始时截取坐标轴区域的已渲染位图，拖曳和滚轮过程中只对这张位图做平移/缩放并 blit 到画布，
+    鼠标事件按屏幕刷新率合并；手势结束（松开鼠标或滚轮停止一段时间）后才按新的范围完整重绘一次。
+    联动的坐标轴（多面板同步视图）各自截图，随手势一起平移/缩放，结束时设置为相同的显示范围。
+    """
+
+    def __init__(self, canvas, settle_ms=250, min_span=1000.0, on_finished=None, link_axes=None):
+        """
+        :param canvas: FigureCanvasQTAgg
+        :param settle_ms: 滚轮停止多久视为缩放结束（毫秒）
+        :param min_span: 最小可见跨度（坐标轴数据单位，投影坐标下为米）
+        :param on_finished: 手势结束、设置新范围后、重绘前的回调 on_finished(ax)
+        :param link_axes: 可选，link_axes(ax) 返回与 ax 联动的其他坐标轴（数据坐标须与 ax 一致）
+        """
+        super().__init__()
+        self.canvas = canvas
+        self.min_span = min_span
+        self.on_finished = on_finished
+        self.link_axes = link_axes
+        self.ax = None
+        self._snapshot = None
+        self._views = []       # 各坐标轴的截图：(ax, 像素范围, 截图时的数据范围, 背景, 位图)
+        self._bbox = None      # 截图时坐标轴在画布上的像素范围
+        self._to_data = None   # 截图时像素 -> 数据坐标的变换
+        self._scale = 1.0      # 显示位置 = scale * 截图位置 + offset
+        self._offset = np.zeros(2)
+        self._pan_anchor = None
+        self._dirty = False
+
+        screen = QApplication.primaryScreen()
+        rate = screen.refreshRate() if screen is not None else 60.0
+        self._frame_timer = QTimer(self)
+        self._frame_timer.setInterval(max(1, int(1000 / (rate or 60.0))))
+        self._frame_timer.timeout.connect(self._render_frame)
+        self._settle_timer = QTimer(self)
+        self._settle_timer.setSingleShot(True)
+        self._settle_timer.setInterval(settle_ms)
+        self._settle_timer.timeout.connect(self.finish)
+
+    @property
+    def active(self):
+        return self._snapshot is not None
+
+    # ---------------------- 手势 ----------------------
+    def pan_start(self, ax, x, y):
+        """:param x, y: 鼠标位置（画布像素）"""
+        if self.active and self.ax is not ax:
+            self.cancel()
+        if not self.active and not self._begin(ax):
+            return False
+        self._settle_timer.stop()
+        self._pan_anchor = (x - self._offset[0], y - self._offset[1])
+        return True
+
+    def pan_move(self, x, y):
+        if not self.active or self._pan_anchor is None:
+            return
+        self._offset = np.array([x - self._pan_anchor[0], y - self._pan_anchor[1]])
+        self._dirty = True
+
+    def pan_end(self):
+        if self._pan_anchor is None:
+            return
+        self._pan_anchor = None
+        self.finish()
+
+    def zoom(self, ax, x, y, factor):
+        """
+        以鼠标位置为中心缩放。
+        :param factor: 放大倍数（>1 放大，<1 缩小）
+        """
+        if self.active and self.ax is not ax:
+            self.cancel()
+        if not self.active and not self._begin(ax):
+            return False
+        # 限制最小可见跨度
+        x0, y0, x1, y1 = self._view_limits(self._scale * factor, self._offset)
+        if factor > 1 and min(abs(x1 - x0), abs(y1 - y0)) < self.min_span:
+            factor = 1.0
+        p = np.array([x, y], dtype=float)
+        self._scale *= factor
+        self._offset = factor * (self._offset - p) + p
+        if self._pan_anchor is not None:
+            self._pan_anchor = (x - self._offset[0], y - self._offset[1])
+        self._dirty = True
+        if self._pan_anchor is None:
+            self._settle_timer.start()
+        return True
+
+    def finish(self):
+        """结束手势：设置新的显示范围并完整重绘"""
+        self._settle_timer.stop()
+        self._frame_timer.stop()
+        if not self.active:
+            return
+        ax = self.ax
+        moved = self._scale != 1.0 or np.any(self._offset != 0)
+        x0, y0, x1, y1 = self._view_limits(self._scale, self._offset)
+        axes = [view[0] for view in self._views]
+        self._reset()
+        if moved:
+            for linked in axes:
+                linked.set_xlim(x0, x1)
+                linked.set_ylim(y0, y1)
+            if self.on_finished is not None:
+                self.on_finished(ax)
+        self.canvas.draw_idle()
+
+    def cancel(self):
+        """放弃当前手势（如图像被重建），不改变显示范围"""
+        self._settle_timer.stop()
+        self._frame_timer.stop()
+        self._reset()
+
+    # ---------------------- 内部 ----------------------
+    def _begin(self, ax):
+        canvas = self.canvas
+        if not getattr(canvas, "supports_blit", False) or ax is None:
+            return False
+        # 确保缓冲区与当前显示一致
+        if canvas.figure.stale:
+            canvas.draw()
+        buf = np.asarray(canvas.buffer_rgba())
+        linked = [a for a in (self.link_axes(ax) if self.link_axes is not None else []) if a is not ax]
+        views = []
+        for a in [ax] + linked:
+            view = self._snapshot_axes(a, buf)
+            if view is None:
+                if a is ax:
+                    return False
+                continue
+            views.append(view)
+
+        self.ax = ax
+        self._views = views
+        self._bbox = views[0][1]
+        self._to_data = ax.transData.inverted().frozen()
+        self._snapshot = views[0][4].get_array()
+        self._scale = 1.0
+        self._offset = np.zeros(2)
+        self._frame_timer.start()
+        return True
+
+    def _snapshot_axes(self, ax, buf):
+        """截取一个坐标轴区域的位图，返回 (ax, 像素范围, 数据范围, 背景, 位图)，区域为空时返回 None"""
+        fig = self.canvas.figure
+        bbox = ax.bbox.frozen()
+        height = buf.shape[0]
+        x0, y0, x1, y1 = (int(round(v)) for v in bbox.extents)
+        crop = buf[max(height - y1, 0):height - y0, max(x0, 0):x1]
+        if crop.size == 0:
+            return None
+        limits = ax.transData.inverted().transform(np.array([bbox.p0, bbox.p1])).ravel()
+        blank = Rectangle((x0, y0), x1 - x0, y1 - y0, transform=IdentityTransform(),
+                          facecolor=fig.get_facecolor(), edgecolor="none")
+        blank.set_figure(fig)
+        image = BboxImage(bbox, interpolation="nearest", origin="upper")
+        image.set_data(crop.copy())
+        image.set_figure(fig)
+        image.set_clip_box(bbox)
+        return ax, bbox, limits, blank, image
+
+    def _reset(self):
+        self.ax = None
+        self._snapshot = None
+        self._views = []
+        self._pan_anchor = None
+        self._dirty = False
+        self._scale = 1.0
+        self._offset = np.zeros(2)
+
+    def _view_limits(self, scale, offset):
+        """当前位图变换对应的坐标轴数据范围 (xmin, ymin, xmax, ymax)"""
+        x0, y0, x1, y1 = self._bbox.extents
+        corners = (np.array([[x0, y0], [x1, y1]]) - offset) / scale
+        (dx0, dy0), (dx1, dy1) = self._to_data.transform(corners)
+        return dx0, dy0, dx1, dy1
+
+    def _render_frame(self):
+        """按刷新率调用：只在状态变化后画一帧"""
+        if not self.active or not self._dirty:
+            return
+        self._dirty = False
+        x0, y0, x1, y1 = self._bbox.extents
+        ox, oy = self._offset
+        s = self._scale
+        fig = self.canvas.figure
+        active = self._views[0]
+        active[4].bbox = Bbox.from_extents(s * x0 + ox, s * y0 + oy, s * x1 + ox, s * y1 + oy)
+        if len(self._views) > 1:
+            # 联动坐标轴：把各自截图时的数据范围映射到新显示范围下的像素位置
+            vx0, vy0, vx1, vy1 = self._view_limits(s, self._offset)
+            for _, bbox, (dx0, dy0, dx1, dy1), _, image in self._views[1:]:
+                sx = bbox.width / (vx1 - vx0)
+                sy = bbox.height / (vy1 - vy0)
+                image.bbox = Bbox.from_extents(bbox.x0 + (dx0 - vx0) * sx, bbox.y0 + (dy0 - vy0) * sy,
+                                               bbox.x0 + (dx1 - vx0) * sx, bbox.y0 + (dy1 - vy0) * sy)
+        for _, bbox, _, blank, image in self._views:
+            fig.draw_artist(blank)
+            fig.draw_artist(image)
+            self.canvas.blit(bbox)
@@ -0,0 +1,163 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from PyQt5.QtCore import Qt, QObject, QThread, pyqtSignal
+from PyQt5.QtGui import QImage, QPixmap
+from PyQt5.QtWidgets import QDockWidget, QWidget, QLabel, QVBoxLayout, QHBoxLayout, QScrollArea, QFrame
+from visualization.thumbnails import render_thumbnail, ThumbnailCache, THUMBNAIL_SIZE
+
+
+class ThumbnailSignals(QObject):
+    ready = pyqtSignal(int, int, object)   # 批次号, 仰角索引, RGBA 数组
+    failed = pyqtSignal(int, int, str)     # 批次号, 仰角索引, 错误信息
+
+
+def render_thumbnail_task(signals, batch, cache, volume, radar, tilt, product, drange, size):
+    """后台渲染一个仰角的缩略图并写入缓存"""
+    try:
+        image = render_thumbnail(radar, tilt, product, drange, size)
+    except Exception as e:
+        signals.failed.emit(batch, tilt, str(e))
+        return
+    cache.put(volume, (tilt, product, drange, size), image)
+    signals.ready.emit(batch, tilt, image)
+
+
+class ThumbnailLabel(QFrame):
+    """一个仰角的缩略图，点击后发出 clicked(仰角索引)"""
+    clicked = pyqtSignal(int)
+
+    def __init__(self, tilt, elevation, size):
+        super().__init__()
+        self.tilt = tilt
+        self.setFrameShape(QFrame.Box)
+        self.setCursor(Qt.PointingHandCursor)
+        self.image = QLabel("...")
+        self.image.setAlignment(Qt.AlignCenter)
+        self.image.setFixedSize(size, size)
+        self.caption = QLabel(f"{elevation:.1f}°")
+        self.caption.setAlignment(Qt.AlignCenter)
+        layout = QVBoxLayout()
+        layout.setContentsMargins(2, 2, 2, 2)
+        layout.addWidget(self.image)
+        layout.addWidget(self.caption)
+        self.setLayout(layout)
+
+    def set_image(self, rgba):
+        height, width = rgba.shape[:2]
+        image = QImage(rgba.data, width, height, rgba.strides[0], QImage.Format_RGBA8888)
+        # QImage 不持有数组内存，转换为 QPixmap 时复制
+        self.image.setPixmap(QPixmap.fromImage(image))
+
+    def set_error(self, message):
+        self.image.setText("无数据")
+        self.image.setToolTip(message)
+
+    def set_selected(self, selected):
+        self.setLineWidth(3 if selected else 1)
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self.clicked.emit(self.tilt)
+        super().mousePressEvent(event)
+
+
+class TiltOverview(QDockWidget):
+    """
+    当前产品各仰角的缩略图总览。
+    缩略图在线程池中并行渲染（不投影、不经过 matplotlib），按体扫缓存；
+    点击缩略图选中该仰角，由主窗口完整绘制。
+    """
+    tilt_selected = pyqtSignal(int)
+
+    def __init__(self, parent=None, size=THUMBNAIL_SIZE, cache=None):
+        super().__init__("仰角总览", parent)
+        self.setAllowedAreas(Qt.BottomDockWidgetArea | Qt.TopDockWidgetArea)
+        self.thumb_size = size
+        self.cache = cache if cache is not None else ThumbnailCache()
+        # 线程池在渲染时创建，关闭停靠窗口时释放
+        self.executor = None
+        self.signals = ThumbnailSignals()
+        self.signals.ready.connect(self.on_thumbnail_ready)
+        self.signals.failed.connect(self.on_thumbnail_failed)
+        self._batch = 0
+        self._source = None
+        self._futures = []
+        self.labels = []
+
+        self.row = QHBoxLayout()
+        self.row.setAlignment(Qt.AlignLeft)
+        container = QWidget()
+        container.setLayout(self.row)
+        scroll = QScrollArea()
+        scroll.setWidgetResizable(True)
+        scroll.setWidget(container)
+        scroll.setMinimumHeight(size + 60)
+        self.setWidget(scroll)
+
+    def show_volume(self, radar, volume, product, drange, current_tilt=None):
+        """
+        显示一个体扫指定产品的所有仰角；已缓存的直接显示，其余提交后台渲染。
+        :param volume: 体扫标识（文件路径），缓存按它分组
+        """
+        source = (volume, product, drange)
+        if source == self._source and len(self.labels) == len(radar.el):
+            self.select(current_tilt)
+            return
+        self._source = source
+        self._batch += 1
+        for future in self._futures:
+            future.cancel()
+        self._futures = []
+        while self.row.count():
+            widget = self.row.takeAt(0).widget()
+            if widget is not None:
+                widget.setParent(None)
+                widget.deleteLater()
+        self.labels = []
+
+        name = os.path.basename(volume) if volume else ""
+        self.setWindowTitle(f"仰角总览 - {product}  {name}")
+        for tilt, elevation in enumerate(radar.el):
+            label = ThumbnailLabel(tilt, float(elevation), self.thumb_size)
+            label.clicked.connect(self.tilt_selected.emit)
+            self.row.addWidget(label)
+            self.labels.append(label)
+            key = (tilt, product, drange, self.thumb_size)
+            image = self.cache.get(volume, key)
+            if image is not None:
+                label.set_image(image)
+                continue
+            if product not in radar.available_product(tilt):
+                label.set_error(f"该仰角没有 {product}")
+                continue
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=max(1, min(4, QThread.idealThreadCount())),
+                                                   thread_name_prefix="thumbnail")
+            self._futures.append(self.executor.submit(
+                render_thumbnail_task, self.signals, self._batch, self.cache, volume,
+                radar, tilt, product, drange, self.thumb_size))
+        self.select(current_tilt)
+
+    def select(self, tilt):
+        for label in self.labels:
+            label.set_selected(label.tilt == tilt)
+
+    def on_thumbnail_ready(self, batch, tilt, image):
+        if batch == self._batch and tilt < len(self.labels):
+            self.labels[tilt].set_image(image)
+
+    def on_thumbnail_failed(self, batch, tilt, message):
+        if batch == self._batch and tilt < len(self.labels):
+            self.labels[tilt].set_error(message)
+
+    def shutdown(self):
+        self._batch += 1
+        # 未完成的缩略图已取消，下次 show_volume 须重新提交
+        self._source = None
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    def closeEvent(self, event):
+        self.shutdown()
+        super().closeEvent(event)
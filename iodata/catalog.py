@@ -0,0 +1,202 @@
+import os
+import re
+import glob
+import bz2
+import gzip
+import sqlite3
+import datetime
+import threading
+import numpy as np
+from cinrad.io._dtype import SDD_site, SDD_task
+
+RADAR_EXTENSIONS = (".bin", ".bz2", ".gz")
+CATALOG_FILENAME = ".qpe_catalog.sqlite"
+
+# CINRAD 文件名中的站号与扫描时间，如 Z_RADR_I_ZA702_20230703130657_O_DOR_...
+_NAME_PATTERN = re.compile(r"(?:^|_)(Z[0-9A-Z]{4})_(\d{14})(?=[_.])")
+
+
+def is_radar_file(name):
+    return name.lower().endswith(RADAR_EXTENSIONS) and not name.startswith(".")
+
+
+def parse_radar_filename(name):
+    """
+    从 CINRAD 文件名解析站号与扫描时间（UTC）。
+    :param name: 文件名
+    :return: (站号, datetime) 或 None
+    """
+    match = _NAME_PATTERN.search(name)
+    if not match:
+        return None
+    try:
+        scan_time = datetime.datetime.strptime(match.group(2), "%Y%m%d%H%M%S")
+    except ValueError:
+        return None
+    return match.group(1), scan_time
+
+
+def read_header_info(path):
+    """
+    读取标准格式文件头中的站号与扫描开始时间（只解压前 416 字节）。
+    :param path: 文件路径
+    :return: (站号, datetime) 或 None（非标准格式）
+    """
+    try:
+        with open(path, "rb") as f:
+            magic = f.read(3)
+        if magic.startswith(b"\x1f\x8b"):
+            opener = gzip.open
+        elif magic.startswith(b"BZh"):
+            opener = bz2.open
+        else:
+            opener = open
+        with opener(path, "rb") as f:
+            head = f.read(416)
+        if len(head) < 416 or head[:4] != b"RSTM":
+            return None
+        site = np.frombuffer(head, SDD_site, count=1, offset=32)
+        task = np.frombuffer(head, SDD_task, count=1, offset=160)
+        code = site["site_code"][0].decode("ascii", errors="ignore").replace("\x00", "")
+        scan_time = datetime.datetime(1970, 1, 1) + datetime.timedelta(seconds=int(task["scan_start_time"][0]))
+        return code, scan_time
+    except (OSError, EOFError, ValueError):
+        return None
+
+
+class FolderCatalog:
+    """
+    雷达数据文件夹的时间索引。
+    站号与扫描时间优先从文件名解析，文件名不符合规范时读取文件头；
+    索引保存在文件夹内的 SQLite 附属文件中，再次打开时只重新解析新增或变化（大小/修改时间）的文件。
+    """
+
+    def __init__(self, folder, sidecar=None):
+        """
+        :param folder: 数据文件夹
+        :param sidecar: 索引文件路径（默认 folder/.qpe_catalog.sqlite，不可写时退回内存）
+        """
+        self.folder = os.path.abspath(folder)
+        self._lock = threading.Lock()
+        path = sidecar or os.path.join(self.folder, CATALOG_FILENAME)
+        try:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._create_table()
+        except sqlite3.Error:
+            self._db = sqlite3.connect(":memory:", check_same_thread=False)
+            self._create_table()
+
+    def _create_table(self):
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " name TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER,"
+            " site TEXT, scan_time TEXT, source TEXT)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_scan_time ON files (scan_time)")
+        self._db.commit()
+
+    def refresh(self):
+        """
+        增量扫描文件夹：新增、变化的文件重新解析，已删除的文件移出索引。
+        :return: dict 包含 added、changed、removed、total
+        """
+        with self._lock:
+            known = {name: (size, mtime) for name, size, mtime in
+                     self._db.execute("SELECT name, size, mtime_ns FROM files")}
+            seen = set()
+            added = changed = 0
+            rows = []
+            with os.scandir(self.folder) as it:
+                for entry in it:
+                    if not is_radar_file(entry.name) or not entry.is_file():
+                        continue
+                    seen.add(entry.name)
+                    st = entry.stat()
+                    if known.get(entry.name) == (st.st_size, st.st_mtime_ns):
+                        continue
+                    if entry.name in known:
+                        changed += 1
+                    else:
+                        added += 1
+                    rows.append(self._describe(entry.name, entry.path, st))
+
+            removed = [(name,) for name in known if name not in seen]
+            if rows:
+                self._db.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)", rows)
+            if removed:
+                self._db.executemany("DELETE FROM files WHERE name = ?", removed)
+            self._db.commit()
+            return {"added": added, "changed": changed, "removed": len(removed), "total": len(seen)}
+
+    def add_files(self, paths):
+        """
+        只索引给定的文件（如实时模式下新到达的文件），不扫描整个目录。
+        :param paths: 文件路径列表
+        """
+        rows = []
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            rows.append(self._describe(os.path.basename(path), path, st))
+        with self._lock:
+            self._db.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self._db.commit()
+
+    @staticmethod
+    def _describe(name, path, st):
+        info = parse_radar_filename(name)
+        source = "name"
+        if info is None:
+            info = read_header_info(path)
+            source = "header" if info is not None else "none"
+        site, scan_time = info if info is not None else (None, None)
+        return (name, st.st_size, st.st_mtime_ns, site,
+                scan_time.isoformat() if scan_time is not None else None, source)
+
+    def entries(self, site=None):
+        """
+        按扫描时间排序的文件列表（无时间信息的文件按文件名排在最后）。
+        :param site: 只返回指定站号（可选）
+        :return: [dict(path, name, site, scan_time), ...]
+        """
+        sql = "SELECT name, site, scan_time FROM files"
+        args = ()
+        if site:
+            sql += " WHERE site = ?"
+            args = (site,)
+        sql += " ORDER BY scan_time IS NULL, scan_time, name"
+        with self._lock:
+            rows = self._db.execute(sql, args).fetchall()
+        return [
+            {
+                "path": os.path.join(self.folder, name),
+                "name": name,
+                "site": row_site,
+                "scan_time": datetime.datetime.fromisoformat(scan_time) if scan_time else None,
+            }
+            for name, row_site, scan_time in rows
+        ]
+
+    def file_list(self, site=None):
+        """:return: 按扫描时间排序的文件路径列表"""
+        return [e["path"] for e in self.entries(site)]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def collect_files(source):
+    """
+    :param source: 文件夹或通配符
+    :return: 文件路径列表（文件夹按扫描时间排序）
+    """
+    if os.path.isdir(source):
+        catalog = FolderCatalog(source)
+        catalog.refresh()
+        files = catalog.file_list()
+        catalog.close()
+        return files
+    return sorted(glob.glob(source))
@@ -0,0 +1,227 @@
+import os
+import json
+import time
+import shutil
+import pickle
+import hashlib
+import tempfile
+import threading
+import numpy as np
+from cinrad.io import StandardData
+from iodata.read_radar import load_radar_file, PRODUCT_MEMO_ATTRS
+
+CACHE_FORMAT_VERSION = 1
+
+
+def file_digest(path, chunk_size=1024 * 1024):
+    """
+    计算源文件内容摘要（blake2b），用于判断文件是否真正变化。
+    :param path: 文件路径
+    :return: 十六进制摘要字符串
+    """
+    h = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _stack_radials(radials):
+    """把逐径向的一维数组堆叠为 (径向, 库) 二维数组；长度不一时以 0（保留码，读取时会被屏蔽）补齐"""
+    if isinstance(radials, np.ndarray):
+        return radials
+    if not radials:
+        return np.zeros((0, 0), dtype=np.uint8)
+    width = max(len(r) for r in radials)
+    if all(len(r) == width for r in radials):
+        return np.vstack(radials)
+    out = np.zeros((len(radials), width), dtype=radials[0].dtype)
+    for i, r in enumerate(radials):
+        out[i, :len(r)] = r
+    return out
+
+
+class DiskVolumeCache:
+    """
+    已解析体扫的磁盘缓存（需用户主动开启）。
+    每个体扫存为一个目录：各仰角、各产品的原始数据为未压缩的 .npy 文件，
+    其余属性（扫描配置、方位角等）与元信息另存；再次打开时以 mmap 方式只读映射，
+    省去解压与解析，只有真正绘制的仰角/产品才会被读入内存。
+    源文件的修改时间或大小变化时用内容摘要复核，摘要不符则失效；总容量超限时按最近访问时间淘汰。
+    """
+
+    def __init__(self, cache_dir, max_bytes=10 * 1024 ** 3, loader=load_radar_file):
+        """
+        :param cache_dir: 缓存目录
+        :param max_bytes: 磁盘容量上限（字节）
+        :param loader: 未命中时的解析函数，接收文件路径，返回 StandardData 或 None
+        """
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.max_bytes = int(max_bytes)
+        self._loader = loader
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def entry_dir(self, path):
+        """源文件对应的缓存目录（由绝对路径决定）"""
+        name = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:20]
+        return os.path.join(self.cache_dir, name)
+
+    # ---------------------- 读取 ----------------------
+    def get(self, path):
+        """
+        读取缓存的体扫。
+        :param path: 源文件路径
+        :return: StandardData（数据为只读 mmap）或 None
+        """
+        entry = self.entry_dir(path)
+        meta = self._read_meta(entry)
+        if meta is None or not self._is_valid(path, entry, meta):
+            return None
+        try:
+            with open(os.path.join(entry, "attrs.pkl"), "rb") as f:
+                attrs = pickle.load(f)
+            data = {}
+            for tilt, product, filename in meta["arrays"]:
+                data.setdefault(tilt, {})[product] = np.load(os.path.join(entry, filename), mmap_mode="r")
+        except Exception:
+            self._remove_entry(entry)
+            return None
+
+        radar = StandardData.__new__(StandardData)
+        radar.__dict__.update(attrs)
+        radar.data = data
+        # 记录访问时间，供淘汰使用
+        try:
+            os.utime(entry, None)
+        except OSError:
+            pass
+        return radar
+
+    def _read_meta(self, entry):
+        try:
+            with open(os.path.join(entry, "meta.json"), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get("version") != CACHE_FORMAT_VERSION:
+            return None
+        return meta
+
+    def _is_valid(self, path, entry, meta):
+        """修改时间与大小一致即有效；不一致时比对内容摘要（如文件被复制、touch 过）"""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        if meta["mtime_ns"] == st.st_mtime_ns and meta["size"] == st.st_size:
+            return True
+        if meta["size"] == st.st_size and meta["digest"] == file_digest(path):
+            meta["mtime_ns"] = st.st_mtime_ns
+            self._write_json(os.path.join(entry, "meta.json"), meta)
+            return True
+        self._remove_entry(entry)
+        return False
+
+    # ---------------------- 写入 ----------------------
+    def put(self, path, radar):
+        """
+        把解析好的体扫写入缓存。先写入临时目录再整体改名，避免并发或中断留下残缺条目。
+        :param path: 源文件路径
+        :param radar: StandardData
+        """
+        st = os.stat(path)
+        entry = self.entry_dir(path)
+        tmp = tempfile.mkdtemp(prefix=".tmp_", dir=self.cache_dir)
+        try:
+            arrays = []
+            for tilt, products in radar.data.items():
+                for product, radials in products.items():
+                    filename = f"t{int(tilt)}_{product}.npy"
+                    np.save(os.path.join(tmp, filename), _stack_radials(radials))
+                    arrays.append((int(tilt), product, filename))
+
+            attrs = {k: v for k, v in vars(radar).items()
+                     if k not in ("f", "data") and k not in PRODUCT_MEMO_ATTRS}
+            with open(os.path.join(tmp, "attrs.pkl"), "wb") as f:
+                pickle.dump(attrs, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+            meta = {
+                "version": CACHE_FORMAT_VERSION,
+                "source": os.path.abspath(path),
+                "mtime_ns": st.st_mtime_ns,
+                "size": st.st_size,
+                "digest": file_digest(path),
+                "created": time.time(),
+                "arrays": arrays,
+            }
+            self._write_json(os.path.join(tmp, "meta.json"), meta)
+
+            with self._lock:
+                if os.path.exists(entry):
+                    self._remove_entry(entry)
+                os.replace(tmp, entry)
+        except Exception:
+            shutil.rmtree(tmp, ignore_errors=True)
+            return
+        self.evict()
+
+    def get_or_load(self, path, **load_kwargs):
+        """
+        命中时直接映射缓存，未命中时解析源文件并写入缓存。
+        :param path: 源文件路径
+        :param load_kwargs: 透传给解析函数的参数（如 progress、cancel）
+        :return: StandardData 或 None
+        """
+        radar = self.get(path)
+        if radar is not None:
+            return radar
+        radar = self._loader(path, **load_kwargs)
+        if radar is not None:
+            try:
+                self.put(path, radar)
+            except OSError:
+                pass
+        return radar
+
+    # ---------------------- 容量管理 ----------------------
+    def entries(self):
+        """
+        :return: [(缓存目录, 字节数, 最近访问时间), ...]
+        """
+        result = []
+        for name in os.listdir(self.cache_dir):
+            entry = os.path.join(self.cache_dir, name)
+            if name.startswith(".tmp_") or not os.path.isdir(entry):
+                continue
+            size = sum(e.stat().st_size for e in os.scandir(entry) if e.is_file())
+            result.append((entry, size, os.stat(entry).st_mtime))
+        return result
+
+    def total_bytes(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """超出容量上限时，按最近访问时间由旧到新删除条目"""
+        with self._lock:
+            entries = sorted(self.entries(), key=lambda e: e[2])
+            total = sum(size for _, size, _ in entries)
+            for entry, size, _ in entries:
+                if total <= self.max_bytes:
+                    break
+                self._remove_entry(entry)
+                total -= size
+
+    def clear(self):
+        with self._lock:
+            for entry, _, _ in self.entries():
+                self._remove_entry(entry)
+
+    @staticmethod
+    def _remove_entry(entry):
+        shutil.rmtree(entry, ignore_errors=True)
+
+    @staticmethod
+    def _write_json(path, obj):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(obj, f, ensure_ascii=False)
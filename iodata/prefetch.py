@@ -0,0 +1,113 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, CancelledError
+from iodata.read_radar import load_radar_file
+
+
+class RadarPrefetcher:
+    """
+    相邻时次雷达文件的后台预读。
+    以当前索引为中心，在线程池中提前解析前后 depth 个文件，
+    翻页时直接取用已解析的结果；用户跳转后，窗口之外尚未开始的任务会被取消。
+    """
+
+    def __init__(self, depth=2, max_workers=2, loader=load_radar_file):
+        """
+        :param depth: 预读深度（前后各预读的文件数，0 表示关闭预读）
+        :param max_workers: 后台解析线程数
+        :param loader: 解析函数，接收文件路径，返回 StandardData 或 None
+        """
+        self.depth = max(0, int(depth))
+        self._loader = loader
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix="radar-prefetch")
+        self._futures = {}  # 文件路径 -> Future
+        self._lock = threading.Lock()
+
+    def set_depth(self, depth):
+        """修改预读深度，下一次 schedule 时生效"""
+        self.depth = max(0, int(depth))
+
+    @staticmethod
+    def neighbour_order(count, index, depth):
+        """
+        按距离由近到远返回需要预读的索引：index+1, index-1, index+2, index-2, ...
+        :param count: 文件总数
+        :param index: 当前索引
+        :param depth: 预读深度
+        :return: 索引列表
+        """
+        order = []
+        for step in range(1, depth + 1):
+            for idx in (index + step, index - step):
+                if 0 <= idx < count:
+                    order.append(idx)
+        return order
+
+    def schedule(self, file_list, index, current=None):
+        """
+        以 index 为中心提交预读任务，并取消窗口之外的任务。
+        :param file_list: 文件路径列表
+        :param index: 当前显示的文件索引
+        :param current: 当前已解析的 StandardData（可选，放入窗口以便回翻）
+        """
+        window = [file_list[i] for i in self.neighbour_order(len(file_list), index, self.depth)]
+        keep = set(window)
+        if 0 <= index < len(file_list):
+            keep.add(file_list[index])
+
+        with self._lock:
+            # 用户跳转：丢弃窗口之外的任务，未开始的直接取消
+            for path in list(self._futures):
+                if path not in keep:
+                    self._futures.pop(path).cancel()
+
+            if current is not None and 0 <= index < len(file_list):
+                path = file_list[index]
+                if path not in self._futures:
+                    self._futures[path] = self._executor.submit(lambda r=current: r)
+
+            for path in window:
+                if path not in self._futures:
+                    self._futures[path] = self._executor.submit(self._loader, path)
+
+    def submit(self, path):
+        """单独提交一个文件的后台解析（如实时模式下新到达的文件），直到下一次 schedule 移出窗口"""
+        with self._lock:
+            if path not in self._futures:
+                self._futures[path] = self._executor.submit(self._loader, path)
+
+    def get(self, path, wait=True):
+        """
+        取出预读结果。
+        :param path: 文件路径
+        :param wait: 任务仍在解析时是否等待其完成（等待总比重新解析快）
+        :return: StandardData 或 None（未预读、已取消或解析失败）
+        """
+        with self._lock:
+            future = self._futures.get(path)
+        if future is None or (not wait and not future.done()):
+            return None
+        try:
+            return future.result()
+        except CancelledError:
+            return None
+        except Exception:
+            return None
+
+    def is_ready(self, path):
+        """判断某文件是否已解析完成"""
+        with self._lock:
+            future = self._futures.get(path)
+        return future is not None and future.done() and not future.cancelled()
+
+    def cancel(self):
+        """取消全部预读任务并清空结果（如切换文件夹时）"""
+        with self._lock:
+            for future in self._futures.values():
+                future.cancel()
+            self._futures.clear()
+
+    def shutdown(self):
+        """关闭线程池"""
+        self.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
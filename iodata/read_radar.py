@@ -1,21 +1,320 @@
+import io
 import os
+import bz2
+import gzip
+import mmap
+import struct
+import warnings
+import threading
+from collections import defaultdict, OrderedDict
+from collections.abc import Mapping
+import numpy as np
 from cinrad.io import read_auto, StandardData
+from cinrad.io._dtype import SDD_header, SDD_task, SDD_rad_header, PA_SDD_task, PA_SDD_rad_header
 from PyQt5.QtWidgets import QFileDialog, QMessageBox
 
-def load_radar_file(file_path):
+# get_product 在体扫对象上附加的属性（不随磁盘缓存持久化）
+PRODUCT_MEMO_ATTRS = ("_product_memo", "_product_lock", "_product_memo_bytes")
+PRODUCT_MEMO_SIZE = 8
+# 每个 Dataset 含数据与经纬度、高度网格（150 km 时约 23 MB），按字节数另设上限
+PRODUCT_MEMO_BYTES = 128 * 1024 ** 2
+
+# 数据块头：data_type, scale, offset, bin_length, flags, block_length（小端，共 32 字节）
+_MOMENT_HEADER = struct.Struct("<iiihhi12x")
+
+
+class LoadCancelled(Exception):
+    """读取过程被用户取消"""
+
+
+class _ProgressReader(io.RawIOBase):
+    """
+    原始文件的计数包装器：按已读取的（压缩）字节数回报进度，并在每次读取时检查取消标志。
+    """
+
+    def __init__(self, raw, total, progress=None, cancel=None):
+        super().__init__()
+        self._raw = raw
+        self._total = max(total, 1)
+        self._done = 0
+        self._percent = -1
+        self._progress = progress
+        self._cancel = cancel
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        if self._cancel is not None and self._cancel.is_set():
+            raise LoadCancelled()
+        n = self._raw.readinto(b)
+        self._done += n or 0
+        percent = min(100, self._done * 100 // self._total)
+        if self._progress is not None and percent != self._percent:
+            self._percent = percent
+            self._progress(percent)
+        return n
+
+    def close(self):
+        self._raw.close()
+        super().close()
+
+
+def open_radar_source(file_path, progress=None, cancel=None):
+    """
+    打开雷达文件供解析。需要进度或取消时，压缩文件经计数包装器解压；
+    未压缩文件仍返回路径（按需映射，无需进度）。
+    :param file_path: 文件路径
+    :param progress: 进度回调，参数为 0-100 的整数
+    :param cancel: threading.Event，置位后读取抛出 LoadCancelled
+    :return: 文件路径或文件对象
+    """
+    if progress is None and cancel is None:
+        return file_path
+    with open(file_path, "rb") as f:
+        magic = f.read(3)
+    if not (magic.startswith(b"\x1f\x8b") or magic.startswith(b"BZh")):
+        return file_path
+    reader = io.BufferedReader(_ProgressReader(open(file_path, "rb"), os.path.getsize(file_path),
+                                               progress, cancel))
+    if magic.startswith(b"BZh"):
+        return bz2.BZ2File(reader, "rb")
+    return gzip.GzipFile(fileobj=reader, mode="rb")
+
+
+class _LazyTilt(Mapping):
+    """
+    单个仰角的产品映射。只记录各径向数据块在缓冲区中的位置，
+    首次访问某产品时才构造逐径向数组（直接引用缓冲区，不复制），之后保留结果。
+    """
+
+    def __init__(self, buffer):
+        self._buffer = buffer
+        self._blocks = defaultdict(list)  # 产品 -> [(偏移, 字节数, 每库字节数), ...]
+        self._decoded = {}
+
+    def add_block(self, product, offset, length, bin_length):
+        self._blocks[product].append((offset, length, bin_length))
+
+    def is_decoded(self, product):
+        return product in self._decoded
+
+    def __getitem__(self, product):
+        radials = self._decoded.get(product)
+        if radials is None:
+            # 用 get 而不是下标，避免 defaultdict 为不存在的产品插入空列表
+            blocks = self._blocks.get(product)
+            if blocks is None:
+                raise KeyError(product)
+            radials = [
+                np.frombuffer(self._buffer, f"u{bin_length}", count=length // bin_length, offset=offset)
+                for offset, length, bin_length in blocks
+            ]
+            self._decoded[product] = radials
+        return radials
+
+    def __contains__(self, product):
+        return product in self._blocks
+
+    def __iter__(self):
+        return iter(self._blocks)
+
+    def __len__(self):
+        return len(self._blocks)
+
+
+class LazyStandardData(StandardData):
+    """
+    按需解码的标准格式雷达数据。
+    构造时只解析文件头并建立径向索引（方位角、仰角、各数据块位置），
+    某仰角某产品的径向数据在首次 get_data 时才解码并保留；其余接口与 StandardData 一致。
+    未压缩文件以 mmap 方式读取，只有被访问的数据页才会读入内存。
+    """
+
+    def _parse(self):
+        buffer = self._read_buffer(self.f)
+        header = np.frombuffer(buffer, SDD_header, count=1)
+        if header["generic_type"][0] == 16:
+            task = np.frombuffer(buffer, PA_SDD_task, count=1, offset=160)
+            header_end = 416 + int(task["san_beam_number"][0]) * 640
+            radial_header_dtype = PA_SDD_rad_header
+        else:
+            task = np.frombuffer(buffer, SDD_task, count=1, offset=160)
+            header_end = 416
+            radial_header_dtype = SDD_rad_header
+        header_end += 256 * int(task["cut_number"][0])
+
+        # 文件头部分交给 StandardData 解析（没有径向数据时其循环立即结束）
+        source = self.f
+        self.f = io.BytesIO(bytes(buffer[:header_end]))
+        try:
+            super()._parse()
+        finally:
+            self.f = source
+        self._index_radials(buffer, header_end, radial_header_dtype)
+
+    @staticmethod
+    def _read_buffer(f):
+        """未压缩文件直接映射，压缩文件一次性解压到内存"""
+        if isinstance(f, io.BufferedReader):
+            try:
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                pass
+        return f.read()
+
+    def _index_radials(self, buffer, pos, radial_header_dtype):
+        """遍历径向头与数据块头，记录方位角、仰角和各产品数据块位置，不解码数据本身"""
+        header_length = radial_header_dtype.itemsize
+        size = len(buffer)
+        radial_count = 0
+        while pos + header_length <= size:
+            radial_header = np.frombuffer(buffer, radial_header_dtype, count=1, offset=pos)[0]
+            pos += header_length
+            if radial_header["zip_type"] == 1:
+                raise NotImplementedError("LZO compressed file is not supported")
+            self._time_radial.append(radial_header["seconds"] + radial_header["microseconds"] / 1e6)
+            el_num = radial_header["elevation_number"] - 1
+            if el_num not in self.data:
+                self.data[el_num] = _LazyTilt(buffer)
+                self.aux[el_num] = defaultdict(list)
+            tilt_aux = self.aux[el_num]
+            tilt_aux["azimuth"].append(radial_header["azimuth"])
+            tilt_aux["elevation"].append(radial_header["elevation"])
+            for _ in range(radial_header["moment_number"]):
+                if pos + _MOMENT_HEADER.size > size:
+                    warnings.warn("Broken compressed file detected.", RuntimeWarning)
+                    return
+                dtype_code, scale, offset, bin_length, _, block_length = _MOMENT_HEADER.unpack_from(buffer, pos)
+                pos += _MOMENT_HEADER.size
+                if block_length == 0:
+                    continue
+                dtype = self.dtype_corr.get(dtype_code, None)
+                if not dtype:
+                    warnings.warn("Data type {} not understood, skipping".format(dtype_code), RuntimeWarning)
+                elif pos + block_length <= size:
+                    if dtype not in tilt_aux:
+                        tilt_aux[dtype] = (scale, offset)
+                    self.data[el_num].add_block(dtype, pos, block_length, bin_length)
+                pos += block_length
+            radial_state = radial_header["radial_state"]
+            if radial_state in [0, 3]:
+                self._sweep_start_ray_index.append(radial_count)
+            elif radial_state in [2, 4]:
+                self._sweep_end_ray_index.append(radial_count)
+            radial_count += 1
+            if radial_state in [4, 6]:
+                break
+
+
+def load_radar_file(file_path, lazy=False, progress=None, cancel=None):
     """
     读取雷达文件并返回 StandardData 对象。
     :param file_path: 文件路径
+    :param lazy: 是否按需解码（只解析文件头与径向索引，仅对标准格式生效）
+    :param progress: 进度回调（可选，仅按需解码时回报），参数为 0-100 的整数
+    :param cancel: threading.Event（可选），置位后抛出 LoadCancelled
     :return: StandardData 对象 或 None
     """
     try:
+        if lazy:
+            source = open_radar_source(file_path, progress, cancel)
+            try:
+                return LazyStandardData(source)
+            except LoadCancelled:
+                raise
+            except Exception:
+                # 非标准格式或 LZO 压缩等情况，退回完整解析
+                pass
+            finally:
+                if not isinstance(source, str):
+                    source.close()
+        if cancel is not None and cancel.is_set():
+            raise LoadCancelled()
         radar = read_auto(file_path)
         if not isinstance(radar, StandardData):
             raise TypeError(f"文件 {file_path} 不是标准雷达数据")
         return radar
+    except LoadCancelled:
+        raise
     except Exception:
         return None
 
+def get_product(radar, tilt, drange, dtype):
+    """
+    带记忆的 radar.get_data，绘图、质控与导出共用。
+    同一体扫上以 (tilt, drange, dtype) 为键保留最近 PRODUCT_MEMO_SIZE 个、
+    合计不超过 PRODUCT_MEMO_BYTES 字节的 Dataset（含经纬度网格），
+    重复请求直接返回；体扫对象被缓存淘汰后随之释放。
+    返回的数组为只读，需要修改时请先复制。
+    :param radar: StandardData 对象
+    :param tilt: 仰角索引
+    :param drange: 探测范围（km）
+    :param dtype: 产品名称
+    :return: xarray.Dataset
+    """
+    key = (int(tilt), float(drange), dtype)
+    # get_data 会改写体扫对象上的 tilt/drange/elev 等状态，同一体扫的计算需串行
+    lock = radar.__dict__.setdefault("_product_lock", threading.Lock())
+    with lock:
+        memo = radar.__dict__.setdefault("_product_memo", OrderedDict())
+        ds = memo.get(key)
+        if ds is not None:
+            memo.move_to_end(key)
+            return ds
+        ds = radar.get_data(tilt, drange, dtype)
+        for var in ds.data_vars.values():
+            var.values.flags.writeable = False
+        memo[key] = ds
+        nbytes = radar.__dict__.get("_product_memo_bytes", 0) + int(ds.nbytes)
+        # 至少保留刚取出的一个
+        while len(memo) > 1 and (len(memo) > PRODUCT_MEMO_SIZE or nbytes > PRODUCT_MEMO_BYTES):
+            nbytes -= int(memo.popitem(last=False)[1].nbytes)
+        radar.__dict__["_product_memo_bytes"] = nbytes
+        return ds
+
+def get_product_values(radar, tilt, drange, dtype):
+    """
+    只取产品数值与极坐标（radar.get_raw，已按 scale/offset 换算），不计算经纬度网格、也不进入记忆，
+    供光标读数、缩略图等一次取出多个产品或仰角的场合使用，不会挤掉正在显示的产品。
+    :return: (数值数组，无效库为 NaN；方位角，弧度；各库距离，km)，与 get_product 的坐标一致
+    """
+    lock = radar.__dict__.setdefault("_product_lock", threading.Lock())
+    with lock:
+        raw = radar.get_raw(tilt, drange, dtype)
+        if isinstance(raw, tuple):
+            # VEL、SW 另带距离折叠标记
+            raw = raw[0]
+        values = np.ma.filled(np.ma.asarray(raw, dtype=float), np.nan)
+        azimuth = np.deg2rad(radar.aux[tilt]["azimuth"])
+        # 与 get_data 相同：库长取自扫描配置（多普勒产品与强度产品可能不同），第 n 个库位于 n·库长
+        config = radar.scan_config[tilt]
+        reso = (config.dop_reso if dtype in ("VEL", "SW", "VELSZ") else config.log_reso) / 1000
+        distance = reso * np.arange(1, values.shape[-1] + 1)
+    return values, azimuth, distance
+
+def product_memo_nbytes(radar):
+    """:return: get_product 在体扫对象上保留的 Dataset 的总字节数"""
+    return radar.__dict__.get("_product_memo_bytes", 0)
+
+def clear_product_memo(radar):
+    """释放 get_product 在体扫对象上保留的结果"""
+    lock = radar.__dict__.setdefault("_product_lock", threading.Lock())
+    with lock:
+        radar.__dict__.pop("_product_memo", None)
+        radar.__dict__.pop("_product_memo_bytes", None)
+
+def select_radar_file(parent):
+    """
+    弹出文件选择对话框。
+    :param parent: 父窗口（QWidget）
+    :return: 文件路径 或 None
+    """
+    file, _ = QFileDialog.getOpenFileName(
+        parent, "选择雷达数据文件", "", "雷达文件 (*.bin *.bz2 *.gz);;所有文件 (*)"
+    )
+    return file or None
+
 def load_radar_via_dialog(parent, status_bar=None):
     """
     弹出文件选择对话框并解析雷达文件。
@@ -23,9 +322,7 @@ def load_radar_via_dialog(parent, status_bar=None):
     :param status_bar: QStatusBar，可选，用于显示状态信息
     :return: radar 对象 或 None, 文件路径
     """
-    file, _ = QFileDialog.getOpenFileName(
-        parent, "选择雷达数据文件", "", "雷达文件 (*.bin *.bz2 *.gz);;所有文件 (*)"
-    )
+    file = select_radar_file(parent)
     if not file:
         return None, None
 
@@ -0,0 +1,186 @@
+import os
+import mmap
+import threading
+from collections import OrderedDict
+import numpy as np
+from iodata.read_radar import load_radar_file, clear_product_memo, product_memo_nbytes
+
+
+def estimate_nbytes(obj, _seen=None):
+    """
+    估算雷达对象占用的内存（统计其中的 numpy 数组与原始缓冲区）。
+    递归遍历对象属性、dict、list/tuple，同一数组只计一次。
+    :param obj: StandardData 或任意容器
+    :return: 字节数
+    """
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+
+    if isinstance(obj, (np.memmap, mmap.mmap)):
+        # 只读映射由操作系统按需换页，不计入内存预算
+        return 0
+    if isinstance(obj, (bytes, bytearray)):
+        return len(obj)
+    if isinstance(obj, np.ndarray):
+        # 视图按其底层数组/缓冲区计算，避免重复
+        root = obj
+        while isinstance(root.base, np.ndarray):
+            root = root.base
+        if root is not obj:
+            return estimate_nbytes(root, _seen)
+        if root.base is not None:
+            return estimate_nbytes(root.base, _seen)
+        return obj.nbytes
+    if isinstance(obj, dict):
+        return sum(estimate_nbytes(v, _seen) for v in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sum(estimate_nbytes(v, _seen) for v in obj)
+    if hasattr(obj, "nbytes") and hasattr(obj, "dims"):
+        # xarray 对象
+        return int(obj.nbytes)
+    if hasattr(obj, "__dict__") and not isinstance(obj, type):
+        return estimate_nbytes(vars(obj), _seen)
+    return 0
+
+
+class VolumeCache:
+    """
+    已解析雷达体扫的内存 LRU 缓存。
+    以 (路径, 修改时间, 文件大小) 为键，按字节预算淘汰最久未使用的体扫，并统计命中/未命中次数。
+    每个体扫的占用为放入时估算的大小加上其 get_product 记忆结果的当前大小（随绘图、读数增长），
+    每次访问时重新累计。
+    """
+
+    def __init__(self, max_bytes=2 * 1024 ** 3, loader=load_radar_file):
+        """
+        :param max_bytes: 内存预算（字节）
+        :param loader: 未命中时的解析函数，接收文件路径，返回 StandardData 或 None
+        """
+        self.max_bytes = int(max_bytes)
+        self._loader = loader
+        self._entries = OrderedDict()  # key -> (radar, 不含记忆结果的字节数)
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(path):
+        """
+        生成缓存键；文件被覆盖或修改后键随之变化。
+        :param path: 文件路径
+        :return: (绝对路径, mtime_ns, size) 或 None（文件不存在）
+        """
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return os.path.abspath(path), st.st_mtime_ns, st.st_size
+
+    def get(self, path):
+        """
+        查询缓存。
+        :param path: 文件路径
+        :return: StandardData 或 None
+        """
+        key = self.make_key(path)
+        with self._lock:
+            entry = self._entries.get(key) if key is not None else None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            # 其他体扫的记忆结果可能已增长，借此机会按预算淘汰
+            self._evict()
+            return entry[0]
+
+    def put(self, path, radar):
+        """
+        放入缓存；超过预算时淘汰最久未使用的体扫。
+        单个体扫大于整个预算时不缓存。
+        :param path: 文件路径
+        :param radar: StandardData
+        """
+        key = self.make_key(path)
+        if key is None or radar is None:
+            return
+        nbytes = estimate_nbytes(radar)
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            # 同一路径的旧版本（文件已变化）一并移除
+            for old_key in [k for k in self._entries if k[0] == key[0]]:
+                self._remove(old_key)
+            # 记忆结果单独按当前大小计算
+            self._entries[key] = (radar, nbytes - product_memo_nbytes(radar))
+            self._evict()
+
+    def get_or_load(self, path, **load_kwargs):
+        """
+        命中时直接返回，未命中时解析文件并放入缓存。
+        :param path: 文件路径
+        :param load_kwargs: 透传给解析函数的参数（如 progress、cancel）
+        :return: StandardData 或 None
+        """
+        radar = self.get(path)
+        if radar is not None:
+            return radar
+        radar = self._loader(path, **load_kwargs)
+        if radar is not None:
+            self.put(path, radar)
+        return radar
+
+    def set_max_bytes(self, max_bytes):
+        """调整内存预算，立即按新预算淘汰"""
+        with self._lock:
+            self.max_bytes = int(max_bytes)
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            for radar, _ in self._entries.values():
+                clear_product_memo(radar)
+            self._entries.clear()
+
+    def stats(self):
+        """
+        :return: dict 包含 hits、misses、evictions、entries、bytes、max_bytes
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    @property
+    def current_bytes(self):
+        """当前占用（字节），含各体扫记忆结果的当前大小"""
+        with self._lock:
+            return sum(nbytes + product_memo_nbytes(radar) for radar, nbytes in self._entries.values())
+
+    def __contains__(self, path):
+        key = self.make_key(path)
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, key):
+        radar, _ = self._entries.pop(key)
+        # 淘汰的体扫可能仍被界面引用，先释放其产品缓存
+        clear_product_memo(radar)
+
+    def _evict(self):
+        # 最近使用的体扫可能正在显示，始终保留（其记忆结果有自身的上限）
+        while len(self._entries) > 1 and self.current_bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
@@ -0,0 +1,63 @@
+import os
+import time
+from iodata.catalog import is_radar_file
+
+
+class DirectoryWatcher:
+    """
+    以轮询方式监视数据目录中新到达的雷达文件。
+    每次轮询只列目录名，对已知文件不再 stat；新文件需在连续两次轮询中大小与修改时间不变、
+    且距最后修改已超过 settle_seconds，才视为写入完成（避免读取正在传输的文件）。
+    """
+
+    def __init__(self, folder, known=(), settle_seconds=2.0):
+        """
+        :param folder: 监视的目录
+        :param known: 已知文件路径或文件名（不会再被报告）
+        :param settle_seconds: 文件最后修改后需静止的秒数
+        """
+        self.folder = os.path.abspath(folder)
+        self.settle_seconds = settle_seconds
+        self._known = {os.path.basename(p) for p in known}
+        self._pending = {}  # 文件名 -> (size, mtime_ns)
+
+    def add_known(self, paths):
+        self._known.update(os.path.basename(p) for p in paths)
+
+    def poll(self):
+        """
+        检查一次目录。
+        :return: 新写入完成的文件路径列表（按文件名排序）
+        """
+        ready = []
+        now = time.time()
+        try:
+            it = os.scandir(self.folder)
+        except OSError:
+            return ready
+        with it:
+            names = set()
+            for entry in it:
+                name = entry.name
+                if name in self._known or not is_radar_file(name):
+                    continue
+                names.add(name)
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                signature = (st.st_size, st.st_mtime_ns)
+                stable = self._pending.get(name) == signature
+                self._pending[name] = signature
+                if stable and st.st_size > 0 and now - st.st_mtime >= self.settle_seconds:
+                    ready.append(entry.path)
+
+        # 轮询间被删除的临时文件不再跟踪
+        for name in list(self._pending):
+            if name not in names:
+                del self._pending[name]
+        for path in ready:
+            name = os.path.basename(path)
+            self._pending.pop(name, None)
+            self._known.add(name)
+        return sorted(ready)
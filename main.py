@@ -1,4 +1,5 @@
 import sys
+import multiprocessing
 from PyQt5.QtWidgets import QApplication
 from gui.main_window import RadarViewer
 
@@ -9,4 +10,6 @@ def main():
     sys.exit(app.exec_())
 
 if __name__ == "__main__":
+    # 打包后的程序中，批量导出启动的工作进程在此返回，而不是再打开一个界面
+    multiprocessing.freeze_support()
     main()
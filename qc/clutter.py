@@ -0,0 +1,146 @@
+"""
+模糊逻辑地物杂波识别。
+
+由反射率纹理、ZDR/ΦDP 的局地标准差与类 CPA 特征（近零速度、窄谱宽、低相关系数）
+按隶属函数加权合成每个距离库的杂波概率。窗口统计用 uniform_filter（沿各轴的滑动和，
+每个库 O(1)）计算，方位向首尾相接；与其他质控算法一样，最后两维为 (方位, 距离库)。
+"""
+from collections import OrderedDict
+import numpy as np
+from scipy.ndimage import uniform_filter
+
+# 派生图层名称：杂波概率
+CLUTTER_PROBABILITY = "CPROB"
+
+# 杂波隶属函数：特征 -> (μ=0 处的值, μ=1 处的值, 权重)，两点之间线性过渡。
+# 纹理与标准差越大越像杂波；速度、谱宽与相关系数越小越像杂波
+CLUTTER_MEMBERSHIP = OrderedDict([
+    ("TDBZ", (20.0, 45.0, 1.0)),      # 反射率沿径向差分平方的窗口平均（dB²）
+    ("SD_ZDR", (0.7, 2.0, 1.0)),      # ZDR 窗口标准差（dB）
+    ("SD_PHI", (10.0, 30.0, 1.0)),    # ΦDP 窗口标准差（°）
+    ("VEL", (2.0, 0.5, 1.0)),         # |径向速度|（m/s）
+    ("SW", (1.5, 0.5, 0.5)),          # 谱宽（m/s）
+    ("RHO", (0.97, 0.85, 1.0)),       # 相关系数
+])
+
+# 窗口内少于该数目的有效库时，窗口统计视为无效
+MIN_WINDOW_GATES = 3
+
+
+def _window(ndim, window_azimuth, window_range):
+    sizes = (1,) * (ndim - 2) + (int(window_azimuth), int(window_range))
+    modes = ("nearest",) * (ndim - 2) + ("wrap", "nearest")
+    return sizes, modes
+
+
+def window_moments(field, window_azimuth=3, window_range=5):
+    """
+    (方位, 距离库) 窗口内有效库的均值与标准差（滑动和，方位向首尾相接）。
+    :param field: 字段，最后两维为 (方位, 距离库)，无效库为 NaN
+    :return: (均值, 标准差)，窗口内有效库不足时为 NaN
+    """
+    field = np.asarray(field, dtype=float)
+    sizes, modes = _window(field.ndim, window_azimuth, window_range)
+    valid = np.isfinite(field)
+    filled = np.where(valid, field, 0.0)
+    count = uniform_filter(valid.astype(float), size=sizes, mode=modes)
+    mean = uniform_filter(filled, size=sizes, mode=modes)
+    square = uniform_filter(filled * filled, size=sizes, mode=modes)
+    enough = count * np.prod(sizes) >= MIN_WINDOW_GATES - 0.5
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean /= count
+        square /= count
+        # 滑动和相减的舍入误差可能使方差略小于 0
+        variance = np.clip(square - mean * mean, 0.0, None, out=square)
+    std = np.sqrt(variance, out=variance)
+    mean[~enough] = np.nan
+    std[~enough] = np.nan
+    return mean, std
+
+
+def reflectivity_texture(ref, window_azimuth=3, window_range=5):
+    """
+    TDBZ：反射率沿径向相邻库差值平方的窗口平均（dB²）。
+    """
+    ref = np.asarray(ref, dtype=float)
+    diff = np.full(ref.shape, np.nan)
+    np.subtract(ref[..., 1:], ref[..., :-1], out=diff[..., 1:])
+    diff *= diff
+    return window_moments(diff, window_azimuth, window_range)[0]
+
+
+def clutter_features(ref, zdr, phidp, vel, sw, rho, window_azimuth=3, window_range=5):
+    """
+    :return: OrderedDict，特征名（见 CLUTTER_MEMBERSHIP）-> 与 ref 同形状的数组
+    """
+    shape = np.shape(ref)
+
+    def field(x):
+        return np.broadcast_to(np.asarray(x, dtype=float), shape)
+
+    return OrderedDict([
+        ("TDBZ", reflectivity_texture(field(ref), window_azimuth, window_range)),
+        ("SD_ZDR", window_moments(field(zdr), window_azimuth, window_range)[1]),
+        ("SD_PHI", window_moments(field(phidp), window_azimuth, window_range)[1]),
+        ("VEL", np.abs(field(vel))),
+        ("SW", field(sw)),
+        ("RHO", field(rho)),
+    ])
+
+
+def membership(values, zero, one):
+    """
+    分段线性隶属函数：values 在 zero 处为 0、在 one 处为 1，两侧截断；NaN 保持 NaN。
+    """
+    with np.errstate(invalid="ignore"):
+        return np.clip((values - zero) / (one - zero), 0.0, 1.0)
+
+
+def clutter_probability(ref, zdr, phidp, vel, sw, rho, window_azimuth=3, window_range=5):
+    """
+    每个距离库的地物杂波概率：各特征隶属度按权重平均，缺测的特征不参与。
+    :param ref: 反射率（dBZ）
+    :param zdr: 差分反射率（dB）
+    :param phidp: 差分传播相移（°）
+    :param vel: 径向速度（m/s）
+    :param sw: 谱宽（m/s）
+    :param rho: 相关系数
+    :param window_azimuth: 窗口径向数
+    :param window_range: 窗口库数
+    :return: 0-1 的数组，与 ref 同形状；无回波的库为 NaN
+    """
+    features = clutter_features(ref, zdr, phidp, vel, sw, rho, window_azimuth, window_range)
+    total = np.zeros(np.shape(ref))
+    weights = np.zeros(np.shape(ref))
+    for name, values in features.items():
+        zero, one, weight = CLUTTER_MEMBERSHIP[name]
+        mu = membership(values, zero, one)
+        ok = np.isfinite(mu)
+        total += np.where(ok, mu * weight, 0.0)
+        weights += ok * weight
+    with np.errstate(invalid="ignore", divide="ignore"):
+        probability = total / weights
+    probability[~np.isfinite(np.asarray(ref, dtype=float))] = np.nan
+    return probability
+
+
+def mask_clutter(data, probability, threshold=0.5):
+    """
+    :param data: 待处理的字段
+    :param probability: clutter_probability 的结果
+    :param threshold: 杂波概率阈值
+    :return: 杂波概率超过阈值的库置为 NaN 的新数组
+    """
+    with np.errstate(invalid="ignore"):
+        return np.where(probability > threshold, np.nan, np.asarray(data, dtype=float))
+
+
+def suppress_clutter(data, ref, zdr, phidp, vel, sw, rho, threshold=0.5, window_azimuth=3, window_range=5):
+    """
+    地物杂波抑制（流水线步骤）：杂波概率超过阈值的库置为 NaN。
+    :param data: 待处理的字段
+    :param threshold: 杂波概率阈值
+    :return: 新数组
+    """
+    probability = clutter_probability(ref, zdr, phidp, vel, sw, rho, window_azimuth, window_range)
+    return mask_clutter(data, probability, threshold)
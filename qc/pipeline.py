@@ -0,0 +1,284 @@
+import os
+import time
+import threading
+from collections import OrderedDict, namedtuple
+import numpy as np
+from iodata.read_radar import get_product
+from qc.qc_methods import (
+    suppress_clutter, clutter_probability, correct_attenuation, smooth_field, stack_sweeps, resample_gates,
+    ZPHI_ALPHA, ZPHI_BETA, ZPHI_B
+)
+from qc.clutter import CLUTTER_PROBABILITY, mask_clutter
+
+# 步骤参数：默认值、取值范围、界面调节步长与小数位数；decimals 为 0 时为整数，odd 为真时只取奇数
+QCParam = namedtuple("QCParam", ["default", "minimum", "maximum", "step", "decimals", "odd"])
+QCParam.__new__.__defaults__ = (False,)
+
+# 可用的处理步骤：名称 -> (显示名称, 函数, 额外输入, 参数)；流水线按添加顺序执行。
+# 函数签名为 func(data, *额外输入, **参数)，见 qc.qc_methods。
+# 额外输入为产品名称，另有 "distance"（各库距离，km）与 "product"（当前处理的产品名称）
+QC_STEPS = OrderedDict([
+    ("clutter", ("地物杂波抑制", suppress_clutter, ("REF", "ZDR", "PHI", "VEL", "SW", "RHO"), OrderedDict([
+        ("threshold", QCParam(0.5, 0.0, 1.0, 0.05, 2)),
+        ("window_azimuth", QCParam(3, 1, 31, 2, 0, odd=True)),
+        ("window_range", QCParam(5, 1, 51, 2, 0, odd=True)),
+    ]))),
+    ("attenuation", ("衰减订正(ZPHI)", correct_attenuation, ("REF", "PHI", "RHO", "distance", "product"), OrderedDict([
+        ("alpha", QCParam(ZPHI_ALPHA, 0.01, 1.0, 0.01, 3)),
+        ("beta", QCParam(ZPHI_BETA, 0.0, 0.5, 0.005, 3)),
+        ("b", QCParam(ZPHI_B, 0.1, 1.5, 0.01, 2)),
+    ]))),
+    ("smooth", ("平滑", smooth_field, (), OrderedDict([
+        ("sigma", QCParam(1.0, 0.0, 10.0, 0.1, 1)),
+    ]))),
+])
+# 参数的显示名称
+QC_PARAM_LABELS = {
+    "threshold": "杂波概率阈值",
+    "window_azimuth": "窗口径向数",
+    "window_range": "窗口库数",
+    "alpha": "α(dB/°)",
+    "beta": "β(dB/°)",
+    "b": "指数 b",
+    "sigma": "平滑σ(库)",
+}
+# 可做质控的产品
+QC_PRODUCTS = ("REF", "ZDR", "PHI", "KDP")
+# 杂波概率只取决于这些参数（与处理的产品和阈值无关），同一体扫的各产品共用
+CLUTTER_WINDOW_PARAMS = ("window_azimuth", "window_range")
+
+
+def _fit_shape(field, shape):
+    """
+    :return: 截取或以 NaN 补齐到 shape 的数组。
+             只用于补齐缺测的仰角与径向，各仰角的距离库已由 stack_sweeps 按距离对齐
+    """
+    if field.shape == shape:
+        return field
+    fitted = np.full(shape, np.nan)
+    common = tuple(slice(0, min(a, b)) for a, b in zip(field.shape, shape))
+    fitted[common] = field[common]
+    return fitted
+
+
+def _sweep_fields(radar, tilt, product, drange):
+    """
+    :return: fields(名称)，取出与 product 同一仰角的其他产品或距离坐标；
+             其他产品按距离对齐到 product 的库上（多普勒与强度库长可能不同）
+    """
+    def fields(name):
+        ds = get_product(radar, tilt, drange, product)
+        if name == "distance":
+            return ds["distance"].values
+        if name not in radar.available_product(tilt):
+            # 缺测的产品以 NaN 代替，由各步骤自行跳过
+            return np.full(ds[product].shape, np.nan)
+        other = get_product(radar, tilt, drange, name)
+        return resample_gates(other[name].values, other["distance"].values, ds["distance"].values)
+    return fields
+
+
+def _volume_key(volume):
+    """:return: 缓存键中的体扫标识：路径与修改时间（实时模式下文件被覆盖后不再命中旧结果）"""
+    try:
+        return volume, os.stat(volume).st_mtime_ns
+    except (OSError, TypeError, ValueError):
+        return volume, None
+
+
+class QCStep:
+    """流水线中的一个步骤：步骤名称与显式参数（未给出的参数取默认值）"""
+
+    def __init__(self, name, **params):
+        if name not in QC_STEPS:
+            raise ValueError(f"未知的处理步骤：{name}")
+        label, func, inputs, specs = QC_STEPS[name]
+        unknown = set(params) - set(specs)
+        if unknown:
+            raise ValueError(f"{label} 没有参数：{'、'.join(sorted(unknown))}")
+        self.name = name
+        self.label = label
+        self.func = func
+        self.inputs = inputs
+        self.params = {}
+        for param, spec in specs.items():
+            value = params.get(param, spec.default)
+            if spec.decimals == 0:
+                if value != int(value):
+                    raise ValueError(f"{label} 的 {param} 应为整数：{value}")
+                value = int(value)
+            if not spec.minimum <= value <= spec.maximum:
+                raise ValueError(f"{label} 的 {param} 应在 {spec.minimum} 到 {spec.maximum} 之间：{value}")
+            if spec.odd and value % 2 == 0:
+                raise ValueError(f"{label} 的 {param} 应为奇数：{value}")
+            self.params[param] = value
+
+    @property
+    def key(self):
+        """步骤与参数的可哈希标识"""
+        return (self.name, tuple(sorted(self.params.items())))
+
+    def arguments(self, fields, product):
+        """:return: 额外输入的列表"""
+        return [product if name == "product" else fields(name) for name in self.inputs]
+
+    def apply(self, data, fields, product):
+        """
+        :param data: 上一步的输出
+        :param fields: fields(名称) 返回与 data 对应的其他产品或距离坐标
+        :param product: data 的产品名称
+        """
+        return self.func(data, *self.arguments(fields, product), **self.params)
+
+    def __repr__(self):
+        args = ", ".join(f"{k}={v!r}" for k, v in sorted(self.params.items()))
+        return f"QCStep({self.name!r}, {args})"
+
+
+class StageCache:
+    """
+    各步骤输出的 LRU 缓存。键为 ((体扫, 修改时间), 仰角, 产品, 范围, 截至该步骤的所有步骤标识)，
+    因此修改某一步的参数时，它之前的步骤仍然命中，只重算它及其后的步骤。
+    """
+
+    def __init__(self, max_entries=24):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+            return data
+
+    def put(self, key, data):
+        with self._lock:
+            self._entries[key] = data
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class QCPipeline:
+    """
+    可组合的质控流水线：按顺序执行各步骤，每一步的输出都缓存，
+    在原始视图与质控视图之间切换、或只改下游参数时无需重算上游。
+    """
+
+    def __init__(self, steps=(), cache=None):
+        """
+        :param steps: QCStep 列表
+        :param cache: StageCache，默认新建（可在多个流水线之间共用）
+        """
+        self.steps = list(steps)
+        self.cache = cache if cache is not None else StageCache()
+
+    @property
+    def key(self):
+        return tuple(step.key for step in self.steps)
+
+    def run(self, radar, volume, tilt, product, drange):
+        """
+        :param radar: StandardData 对象
+        :param volume: 体扫标识（文件路径），与缓存键一起区分不同体扫
+        :param tilt: 仰角索引
+        :param product: 产品名称
+        :param drange: 探测范围（km）
+        :return: 与 get_product 同形状的只读数组；没有步骤时为原始数据
+        """
+        fields = _sweep_fields(radar, tilt, product, drange)
+        data = fields(product)
+        upstream = ()
+        for step in self.steps:
+            upstream += (step.key,)
+            key = (_volume_key(volume), tilt, product, drange, upstream)
+            cached = self.cache.get(key)
+            if cached is None:
+                if step.name == "clutter":
+                    # 杂波概率按仰角缓存，各产品与杂波概率图层共用
+                    window = {name: step.params[name] for name in CLUTTER_WINDOW_PARAMS}
+                    probability = resample_gates(self.clutter_probability(radar, volume, tilt, drange, **window),
+                                                 get_product(radar, tilt, drange, "REF")["distance"].values,
+                                                 fields("distance"))
+                    cached = mask_clutter(data, probability, step.params["threshold"])
+                else:
+                    cached = np.asarray(step.apply(data, fields, product))
+                # 缓存的结果被下游步骤与绘图共享，禁止原地修改
+                cached.flags.writeable = False
+                self.cache.put(key, cached)
+            data = cached
+        return data
+
+    def clutter_probability(self, radar, volume, tilt, drange, window_azimuth=3, window_range=5):
+        """
+        某一仰角的杂波概率（供单独图层显示），与各步骤输出共用缓存。
+        :return: 与 REF 同形状的只读数组，0-1，无回波处为 NaN
+        """
+        key = (_volume_key(volume), tilt, CLUTTER_PROBABILITY, drange, (window_azimuth, window_range))
+        probability = self.cache.get(key)
+        if probability is None:
+            fields = _sweep_fields(radar, tilt, "REF", drange)
+            inputs = [fields(name) for name in QC_STEPS["clutter"][2]]
+            probability = np.asarray(clutter_probability(*inputs, window_azimuth=window_azimuth,
+                                                         window_range=window_range))
+            probability.flags.writeable = False
+            self.cache.put(key, probability)
+        return probability
+
+    def run_volume(self, radar, product, drange, tilts=None, inputs=None, coords=None, timings=None):
+        """
+        对整个体扫一次性执行流水线（各步骤在 (仰角, 方位, 距离库) 数组上向量化计算，不经过缓存）。
+        :param tilts: 仰角索引列表，默认全部仰角
+        :param inputs: 可选 dict，产品名 -> 已堆叠的字段；处理同一体扫的多个产品时传入同一个 dict，
+                       额外输入（如 VEL、SW）只读取一次，杂波概率也只计算一次
+        :param coords: 可选 dict，填入各仰角的 (方位角, 距离) 坐标
+        :param timings: 可选 dict，按阶段（read 与各步骤名称）累加耗时（秒）
+        :return: (仰角, 方位, 距离库) 数组；各仰角径向数或库数不同时以 NaN 补齐
+        """
+        if tilts is None:
+            tilts = list(range(len(radar.el)))
+        if inputs is None:
+            inputs = {}
+        if coords is None:
+            coords = {}
+        if timings is None:
+            timings = {}
+
+        def fields(name):
+            if name == "distance":
+                # 各仰角补齐到最多的库数，取最长的距离坐标
+                return max((d for _, d in coords.values()), key=len)
+            if name not in inputs:
+                start = time.perf_counter()
+                stacked = stack_sweeps(radar, name, drange, tilts, coords)
+                if product in inputs:
+                    # 与处理的产品对齐（缺测的仰角以 NaN 补齐）
+                    stacked = _fit_shape(stacked, inputs[product].shape)
+                inputs[name] = stacked
+                timings["read"] = timings.get("read", 0.0) + time.perf_counter() - start
+            return inputs[name]
+
+        data = fields(product)
+        for step in self.steps:
+            args = step.arguments(fields, product)
+            start = time.perf_counter()
+            if step.name == "clutter":
+                # 杂波概率与处理的产品无关，存入共用的 inputs，同一体扫只计算一次
+                window = {name: step.params[name] for name in CLUTTER_WINDOW_PARAMS}
+                key = (CLUTTER_PROBABILITY,) + tuple(window.values())
+                if key not in inputs:
+                    inputs[key] = clutter_probability(*args, **window)
+                data = mask_clutter(data, inputs[key], step.params["threshold"])
+            else:
+                data = step.func(data, *args, **step.params)
+            timings[step.name] = timings.get(step.name, 0.0) + time.perf_counter() - start
+        return data
@@ -1,48 +1,253 @@
+"""
+质控算法（纯函数，不依赖界面）。
+
+所有字段的最后两维为 (方位, 距离库)，前面可以有任意多维（仰角、时次……），
+整个体扫或多个体扫堆叠后一次调用即可完成处理。输入为 xarray.DataArray 时返回同坐标的 DataArray。
+"""
+import functools
 import numpy as np
+import xarray as xr
 from scipy.ndimage import gaussian_filter
+from iodata.read_radar import get_product
+from qc import clutter
+
+
+# X 波段 ZPHI 参数（Bringi & Chandrasekar, 2001）
+ZPHI_ALPHA = 0.28   # A_H = α·K_DP（dB/°）
+ZPHI_BETA = 0.04    # A_DP = β·K_DP（dB/°）
+ZPHI_B = 0.78       # A_H = a·Z^b
+# ΦDP 的合理取值范围（°）；解码器对无效 ΦDP 填充的值（样例中大量出现）不作为有效值
+PHIDP_RANGE = (-180.0, 360.0)
+PHIDP_FILL_VALUES = (327.68,)
+# 选取首末 ΦDP 的库须为气象回波：相关系数不低于该值
+ZPHI_MIN_RHO = 0.85
+
+
+def _as_array(field):
+    return field if field is None or isinstance(field, str) else np.asarray(field)
+
+
+def _keep_xarray(func):
+    """输入字段为 DataArray 时按 numpy 数组计算，再包装回原坐标"""
+    @functools.wraps(func)
+    def wrapper(data, *fields, **params):
+        if not isinstance(data, xr.DataArray):
+            return func(data, *(_as_array(f) for f in fields), **params)
+        result = func(data.values, *(_as_array(f) for f in fields), **params)
+        return data.copy(data=result)
+    return wrapper
+
+
+# ---------------------- 单步算法 ----------------------
+suppress_clutter = _keep_xarray(clutter.suppress_clutter)
+clutter_probability = _keep_xarray(clutter.clutter_probability)
+
+
+def valid_phidp(phidp):
+    """:return: ΦDP 中在合理范围内、且不是解码器填充值的库"""
+    phidp = np.asarray(phidp, dtype=float)
+    with np.errstate(invalid="ignore"):
+        ok = (phidp >= PHIDP_RANGE[0]) & (phidp <= PHIDP_RANGE[1])
+    for fill in PHIDP_FILL_VALUES:
+        ok &= ~np.isclose(phidp, fill)
+    return ok
+
+
+def zphi_pia(ref, phidp, distance, alpha=ZPHI_ALPHA, b=ZPHI_B, edge_gates=5, rho=None):
+    """
+    ZPHI 法（Testud et al., 2000）沿径向的双程路径积分衰减。
+    每条径向以首末有效库之间的差分传播相移 ΔΦDP 约束总衰减（PIA = α·ΔΦDP），
+    按 A(r) = Z^b·C / [I(r0, r1) + C·I(r, r1)] 分配到各库，C = 10^(0.1·b·α·ΔΦDP) − 1，
+    I(r, r1) = 0.46·b·∫_r^r1 Z^b ds。所有径向一起计算，两个积分各为沿距离轴的一次累加。
+    :param ref: 反射率（dBZ），最后一维为距离库
+    :param phidp: 差分传播相移（°），与 ref 同形状
+    :param distance: 各库距离（km）
+    :param alpha: A_H = α·K_DP 的系数（dB/°）
+    :param b: A_H = a·Z^b 的指数
+    :param edge_gates: 首末 ΦDP 取首末各若干个有效库的平均，抑制相位噪声
+    :param rho: 相关系数（可选，与 ref 同形状）；给出时首末 ΦDP 只取相关系数不低于 ZPHI_MIN_RHO 的库
+    :return: 各库的双程路径积分衰减（dB），与 ref 同形状；无有效库或 ΔΦDP ≤ 0 的径向为 0
+    """
+    ref = np.asarray(ref, dtype=float)
+    shape = ref.shape
+    ngate = shape[-1]
+    dr = float(distance[1] - distance[0]) if len(distance) > 1 else 1.0
+    # 所有前导维度（仰角、时次……）展平为径向
+    ref = ref.reshape(-1, ngate)
+    phidp = np.asarray(phidp, dtype=float).reshape(-1, ngate)
+    # 超出合理范围或为填充值的 ΦDP 不参与首末相位的估计（否则 0° 与填充值之间会得出数百度的 ΔΦDP）
+    valid = np.isfinite(ref) & valid_phidp(phidp)
+    if rho is not None:
+        with np.errstate(invalid="ignore"):
+            valid &= np.asarray(rho, dtype=float).reshape(-1, ngate) >= ZPHI_MIN_RHO
+    pia = np.zeros(ref.shape)
+
+    # 首末有效库附近各 edge_gates 个库的 ΦDP 平均
+    first = valid.argmax(axis=-1)
+    last = ngate - 1 - valid[:, ::-1].argmax(axis=-1)
+    offsets = np.arange(edge_gates)
+    head = np.minimum(first[:, None] + offsets, ngate - 1)
+    tail = np.maximum(last[:, None] - offsets, 0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        phi_start = _edge_mean(phidp, valid, head)
+        phi_end = _edge_mean(phidp, valid, tail)
+        delta_phi = phi_end - phi_start
+    # 只有 ΔΦDP > 0 的径向需要计算，且只算到其中最远的有效库
+    rays = np.flatnonzero(valid.any(axis=-1) & (delta_phi > 0))
+    if rays.size == 0:
+        return pia.reshape(shape)
+    stop = int(last[rays].max()) + 1
+    c = (10.0 ** (0.1 * b * alpha * delta_phi[rays]) - 1.0)[:, None]
+
+    # Z^b（线性反射率），只在首末有效 ΦDP 之间积分；其间 ΦDP 或相关系数无效、但有回波的库同样有衰减
+    gates = np.arange(stop)
+    inside = (gates >= first[rays, None]) & (gates <= last[rays, None]) & np.isfinite(ref[rays, :stop])
+    zb = np.where(inside, ref[rays, :stop], -np.inf)
+    zb *= 0.1 * b * np.log(10.0)
+    np.exp(zb, out=zb)
+    # I(r, r1)：自远端向近端的累加
+    integral = np.cumsum(zb[:, ::-1], axis=-1)[:, ::-1]
+    integral *= 0.46 * b * dr
+    total = integral[:, :1].copy()          # I(r0, r1)
+    integral *= c
+    integral += total
+    # 比衰减 A(r)（dB/km），再沿径向累加为双程 PIA
+    zb *= c
+    np.divide(zb, integral, out=zb, where=integral > 0)
+    zb[integral <= 0] = 0.0
+    np.cumsum(zb, axis=-1, out=zb)
+    zb *= 2.0 * dr
+    pia[rays, :stop] = zb
+    pia[rays, stop:] = zb[:, -1:]
+    return pia.reshape(shape)
+
+
+def _edge_mean(values, valid, index):
+    """:return: 各径向在 index 处有效值的平均（无有效值时为 NaN）"""
+    picked = np.take_along_axis(values, index, axis=-1)
+    ok = np.take_along_axis(valid, index, axis=-1)
+    return np.where(ok, picked, 0.0).sum(axis=-1) / ok.sum(axis=-1)
+
+
+@_keep_xarray
+def correct_attenuation(data, ref, phidp, rho, distance, product="REF",
+                        alpha=ZPHI_ALPHA, beta=ZPHI_BETA, b=ZPHI_B):
+    """
+    ZPHI 衰减订正（流水线步骤）：反射率加上 PIA，差分反射率加上 (β/α)·PIA，其他产品不变。
+    :param data: 待订正的字段（REF 时即上一步的输出，用于计算衰减）
+    :param ref: 原始反射率（订正 ZDR 时用于计算衰减）
+    :param phidp: 差分传播相移（°）
+    :param rho: 相关系数（选取首末 ΦDP 的库时使用，缺测时为全 NaN 则不作限制）
+    :param distance: 各库距离（km）
+    :param product: data 的产品名称
+    :param beta: A_DP = β·K_DP 的系数（dB/°）
+    """
+    if rho is not None and not np.isfinite(rho).any():
+        rho = None
+    if product == "REF":
+        return data + zphi_pia(data, phidp, distance, alpha, b, rho=rho)
+    if product == "ZDR":
+        return data + (beta / alpha) * zphi_pia(ref, phidp, distance, alpha, b, rho=rho)
+    return np.asarray(data, dtype=float)
+
+
+@_keep_xarray
+def smooth_field(data, sigma=1.0):
+    """
+    在 (方位, 距离库) 平面内高斯平滑，前面的维度互不影响；方位向首尾相接。
+    只用有效库加权（无效库不向周围扩散），原本无效的库保持无效。
+    :param sigma: 高斯核标准差（距离库数）
+    """
+    data = np.asarray(data, dtype=float)
+    sigmas = (0,) * (data.ndim - 2) + (sigma, sigma)
+    modes = ("nearest",) * (data.ndim - 2) + ("wrap", "nearest")
+    valid = np.isfinite(data)
+    weights = gaussian_filter(valid.astype(float), sigma=sigmas, mode=modes)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        result = gaussian_filter(np.where(valid, data, 0.0), sigma=sigmas, mode=modes) / weights
+    result[~valid] = np.nan
+    return result
+
+
+# ---------------------- 组合算法 ----------------------
+def ground_clutter_filter(ref, zdr, phidp, vel, sw, rho, threshold=0.5, sigma=1.0):
+    """模糊逻辑地物杂波抑制（见 qc.clutter）后平滑"""
+    masked = suppress_clutter(ref, ref, zdr, phidp, vel, sw, rho, threshold=threshold)
+    return smooth_field(masked, sigma=sigma)
+
+
+def attenuation_correction(ref, phidp, distance, zdr=None, alpha=ZPHI_ALPHA, beta=ZPHI_BETA, b=ZPHI_B, rho=None):
+    """
+    ZPHI 衰减订正。
+    :return: (订正后的 REF, 订正后的 ZDR)；未给出 zdr 时第二项为 None
+    """
+    pia = zphi_pia(ref, phidp, distance, alpha, b, rho=rho)
+    ref_corrected = ref + pia
+    zdr_corrected = zdr + (beta / alpha) * pia if zdr is not None else None
+    return ref_corrected, zdr_corrected
+
+
+# ---------------------- 字段堆叠 ----------------------
+def stack_fields(fields):
+    """
+    把若干字段堆叠为一个数组，新维度在最前；最后两维（方位、距离库）不一致时以 NaN 补齐。
+    :param fields: 数组列表（各数组维数相同）
+    :return: float 数组
+    """
+    fields = [np.asarray(f, dtype=float) for f in fields]
+    shape = tuple(max(sizes) for sizes in zip(*(f.shape for f in fields)))
+    stacked = np.full((len(fields),) + shape, np.nan)
+    for out, field in zip(stacked, fields):
+        out[tuple(slice(0, n) for n in field.shape)] = field
+    return stacked
+
+
+def resample_gates(field, distance, target):
+    """
+    按距离坐标把最后一维（距离库）对齐到 target：取最近的库，超出源范围半个库以上的为 NaN。
+    用于库长不同的产品（如多普勒与强度库长不同时的 VEL、SW 与 REF）。
+    :param field: 字段，最后一维与 distance 对应
+    :param distance: 源距离坐标（km，递增）
+    :param target: 目标距离坐标（km，递增）
+    :return: 最后一维与 target 对应的数组；坐标相同时原样返回
+    """
+    distance = np.asarray(distance, dtype=float)
+    target = np.asarray(target, dtype=float)
+    if distance.shape == target.shape and np.allclose(distance, target):
+        return field
+    field = np.asarray(field, dtype=float)
+    if len(distance) < 2:
+        return np.full(field.shape[:-1] + target.shape, np.nan)
+    index = np.clip(np.searchsorted(distance, target), 1, len(distance) - 1)
+    index -= (target - distance[index - 1]) < (distance[index] - target)
+    resampled = field[..., index]
+    half = 0.5 * (distance[1] - distance[0])
+    resampled[..., (target < distance[0] - half) | (target > distance[-1] + half)] = np.nan
+    return resampled
 
 
-def ground_clutter_filter(self):
-    """地物杂波抑制"""
-    print("执行地物杂波抑制...")
-    tilt = self.el_combo.currentIndex()
-    product = self.var_combo.currentText().upper()
-    drange = float(self.range_input.text())
-
-    # 读取当前层的数据
-    ds_ref = self.radar.get_data(tilt=tilt, drange=drange, dtype=product)
-    ds_vel = self.radar.get_data(tilt=tilt, drange=drange, dtype="VEL")
-    ds_sw  = self.radar.get_data(tilt=tilt, drange=drange, dtype="SW")
-
-    # 提取 numpy 数组（xarray.DataArray → np.ndarray）
-    ref = ds_ref[product].values
-    vel = ds_vel["VEL"].values
-    sw  = ds_sw["SW"].values
-
-    # 屏蔽速度接近0且谱宽小的杂波
-    clutter_mask = (np.abs(vel) < 1) & (sw < 1)
-    ref[clutter_mask] = np.nan
-
-    # 平滑处理
-    ref_filtered = gaussian_filter(ref, sigma=1)
-    self.data_qc = ref_filtered
-    print("地物杂波抑制完成。")
-
-def attenuation_correction(self):
-    """衰减订正并写回 radar_qc"""
-    print("执行衰减订正...")
-    tilt = self.el_combo.currentIndex()
-    product = self.var_combo.currentText().upper()
-
-    # 读取数据
-    ds_ref = self.radar.get_data(tilt=tilt, drange=75, dtype=product)
-    ref = ds_ref[product].values
-
-    nrange = ref.shape[1]
-    correction = np.linspace(1.0, 5.0, nrange)
-    R = 10 ** (ref / 10)
-    R_corrected = R * correction[None, :]
-    ref_corrected = 10 * np.log10(R_corrected)
-    ref_corrected = np.clip(ref_corrected, -10, 80)
-    self.data_qc = ref_corrected
-    print("衰减订正完成。")
\ No newline at end of file
+def stack_sweeps(radar, product, drange, tilts=None, coords=None):
+    """
+    取出体扫中各仰角的一个产品并堆叠为 (仰角, 方位, 距离库)。
+    没有该产品的仰角整层为 NaN。
+    :param radar: StandardData 对象
+    :param product: 产品名称
+    :param drange: 探测范围（km）
+    :param tilts: 仰角索引列表，默认全部仰角
+    :param coords: 可选 dict，填入各仰角的 (方位角, 距离) 坐标；已有某仰角的坐标时（如先堆叠了 REF），
+                   该仰角的数据按距离对齐到已有坐标的库上
+    """
+    if tilts is None:
+        tilts = range(len(radar.el))
+    sweeps = []
+    for tilt in tilts:
+        if product in radar.available_product(tilt):
+            ds = get_product(radar, tilt, drange, product)
+            if coords is None:
+                sweeps.append(ds[product].values)
+                continue
+            _, distance = coords.setdefault(tilt, (ds["azimuth"].values, ds["distance"].values))
+            sweeps.append(resample_gates(ds[product].values, ds["distance"].values, distance))
+        else:
+            sweeps.append(np.full((1, 1), np.nan))
+    return stack_fields(sweeps)
@@ -0,0 +1,92 @@
+import os
+import json
+import shutil
+import numpy as np
+
+MANIFEST_NAME = "manifest.json"
+
+
+def _normalize(config):
+    """转为 JSON 往返后的形式（元组变为列表），便于与读回的清单比较"""
+    return json.loads(json.dumps(config))
+
+
+class QCVolumeStore:
+    """
+    批量质控的输出目录。每个体扫一个子目录，每个仰角一个压缩块（tiltNN.npz，含各产品与方位角、距离），
+    QPE 只需低仰角时不必读取整个体扫。
+    所有仰角写完后最后写入 manifest.json（源文件大小与修改时间、处理配置、各阶段耗时），
+    有清单且与当前源文件和配置一致的体扫视为已完成；中断时未完成的体扫在下次运行时重新处理。
+    """
+
+    def __init__(self, root):
+        """
+        :param root: 输出目录
+        """
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+
+    def volume_dir(self, source):
+        """源文件对应的输出子目录（以完整文件名命名，主干相同、后缀不同的文件不会互相覆盖）"""
+        return os.path.join(self.root, os.path.basename(source))
+
+    @staticmethod
+    def source_signature(source):
+        st = os.stat(source)
+        return {"size": st.st_size, "mtime": st.st_mtime}
+
+    # ---------------------- 读取 ----------------------
+    def read_manifest(self, source):
+        """:return: 清单 dict，未完成或损坏时为 None"""
+        try:
+            with open(os.path.join(self.volume_dir(source), MANIFEST_NAME), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def is_complete(self, source, config):
+        """
+        :param config: 处理配置（产品、步骤与参数、范围等，可 JSON 序列化）
+        :return: 该体扫是否已按相同配置处理完毕，且源文件未变化
+        """
+        manifest = self.read_manifest(source)
+        return manifest is not None and \
+            manifest.get("source") == self.source_signature(source) and \
+            manifest.get("config") == _normalize(config)
+
+    def read_tilt(self, source, tilt):
+        """
+        :return: dict，产品名 -> (方位, 距离库) 数组，另有 azimuth、distance
+        """
+        with np.load(os.path.join(self.volume_dir(source), f"tilt{tilt:02d}.npz")) as chunk:
+            return {name: chunk[name] for name in chunk.files}
+
+    # ---------------------- 写入 ----------------------
+    def begin(self, source):
+        """开始写入一个体扫：清除上次中断留下的部分结果"""
+        path = self.volume_dir(source)
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path)
+
+    def write_tilt(self, source, tilt, arrays):
+        """
+        写入一个仰角的压缩块（先写临时文件再替换，中断时不会留下半个文件）。
+        :param arrays: dict，名称 -> 数组
+        """
+        path = os.path.join(self.volume_dir(source), f"tilt{tilt:02d}.npz")
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(tmp, path)
+
+    def finish(self, source, config, **meta):
+        """
+        写入清单，标记该体扫已完成。
+        :param meta: 其他记录项（站号、扫描时间、仰角、耗时等）
+        """
+        manifest = dict(meta, source=self.source_signature(source), config=_normalize(config))
+        path = os.path.join(self.volume_dir(source), MANIFEST_NAME)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, path)
@@ -0,0 +1,264 @@
+import math
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+import numpy as np
+import cartopy.crs as ccrs
+from pyproj import Geod, Transformer
+from visualization.raster import PolarRaster
+from visualization.lod import reduce_coords
+
+
+@lru_cache(maxsize=16)
+def site_projection(site_lon, site_lat):
+    """
+    以雷达站为中心的方位等距投影（同一站点返回同一个对象）。
+    :param site_lon, site_lat: 站点经纬度（取自文件的站点信息）
+    """
+    return ccrs.AzimuthalEquidistant(central_longitude=site_lon, central_latitude=site_lat)
+
+
+def dataset_projection(ds):
+    """:return: get_data 返回的 Dataset 所属站点的投影"""
+    attrs = ds.attrs
+    return site_projection(round(float(attrs["site_longitude"]), 5), round(float(attrs["site_latitude"]), 5))
+
+
+# 光标定位时方位角查找表的分辨率（每圈格数）
+AZIMUTH_BINS = 3600
+# 与投影一致的椭球（cartopy 默认 WGS84），方位等距投影的反算即从站点出发的大地线正算
+_GEOD = Geod(ellps="WGS84")
+
+
+def project_lonlat(projection, lon, lat):
+    """
+    经纬度 -> projection 下的坐标（米）。
+    几何可能在多个工作线程中同时建立，而 cartopy/pyproj 的 CRS 对象跨线程比较会导致崩溃，
+    因此按 proj 字符串新建 Transformer，不与其他线程共享 CRS 对象（结果与 transform_points 相同）。
+    """
+    transformer = Transformer.from_crs(ccrs.PlateCarree().proj4_init, projection.proj4_init, always_xy=True)
+    return transformer.transform(lon, lat)
+
+
+def geometry_key(ds, product):
+    """
+    网格几何的标识：站号、站点位置、仰角、径向数、库数与库长相同的两次绘图可以共用同一个网格。
+    库数由探测范围与库长决定，因此键中已包含探测范围。
+    :param ds: get_data 返回的 Dataset
+    :param product: 变量名称
+    """
+    attrs = ds.attrs
+    return (str(attrs.get("site_code", "")),
+            round(float(attrs.get("site_longitude", 0)), 5), round(float(attrs.get("site_latitude", 0)), 5),
+            round(float(attrs.get("elevation", 0)), 2), ds[product].shape,
+            round(float(attrs.get("tangential_reso", 0)), 4))
+
+
+def align_azimuth_rows(old_az, new_az, tolerance=1.5):
+    """
+    把新体扫的径向按方位角就近对齐到已有网格的径向顺序（各时次起始方位不同、存在微小抖动）。
+    :param old_az: 已有网格的方位角（弧度）
+    :param new_az: 新数据的方位角（弧度）
+    :param tolerance: 允许的最大偏差（以平均方位间隔为单位）
+    :return: 行索引数组（new_data[rows] 与旧网格逐行对应），偏差过大时返回 None
+    """
+    old_az = np.asarray(old_az, dtype=float)
+    new_az = np.asarray(new_az, dtype=float)
+    if old_az.shape != new_az.shape or old_az.size < 2:
+        return None
+    order = np.argsort(new_az)
+    sorted_az = new_az[order]
+    n = sorted_az.size
+    pos = np.searchsorted(sorted_az, old_az) % n
+    prev = (pos - 1) % n
+
+    def angular_distance(a, b):
+        return np.abs((a - b + np.pi) % (2 * np.pi) - np.pi)
+
+    d_pos = angular_distance(old_az, sorted_az[pos])
+    d_prev = angular_distance(old_az, sorted_az[prev])
+    nearest = np.where(d_prev < d_pos, prev, pos)
+    error = np.minimum(d_pos, d_prev)
+    if error.max() > tolerance * 2 * np.pi / n:
+        return None
+    return order[nearest]
+
+
+class SiteGeometry:
+    """
+    一个站点、仰角与探测范围下的距离库坐标：经纬度与站点投影下的坐标（米）。
+    径向顺序以首次建立时的体扫为准，其他体扫的数据用 rows_for 得到的行索引对齐后即可共用。
+    """
+
+    def __init__(self, ds, product):
+        """
+        :param ds: get_data 返回的 Dataset
+        :param product: 变量名称
+        """
+        self.key = geometry_key(ds, product)
+        self.projection = dataset_projection(ds)
+        self.azimuth = np.array(ds["azimuth"].values, dtype=float)
+        self.lon = np.array(ds["longitude"].values, dtype=float)
+        self.lat = np.array(ds["latitude"].values, dtype=float)
+        self.x, self.y = project_lonlat(self.projection, self.lon, self.lat)
+        self.distance = np.array(ds["distance"].values, dtype=float) * 1000   # 斜距（米）
+        for arr in (self.azimuth, self.lon, self.lat, self.x, self.y):
+            arr.flags.writeable = False
+        self.gate_spacing = float(ds.attrs.get("tangential_reso", 0)) * 1000
+        self.elevation = float(ds.attrs.get("elevation", 0))
+        self.site_lon, self.site_lat = self.key[1], self.key[2]
+        self.max_range = float(np.nanmax(np.hypot(self.x, self.y)))
+        self._raster = None
+        self._coords = {(1, 1): (self.x, self.y)}
+        self._gate_lookup = None
+
+    @property
+    def shape(self):
+        return self.x.shape
+
+    @property
+    def raster(self):
+        """共用的屏幕栅格查找表（同一几何的所有体扫、产品共享）"""
+        if self._raster is None:
+            self._raster = PolarRaster(self.x, self.y, self.azimuth)
+        return self._raster
+
+    def coords(self, factors):
+        """:return: 按 (方位, 距离) 倍数降采样后的投影坐标 (x, y)，与 lod.reduce_field 分块一致"""
+        factors = tuple(factors)
+        xy = self._coords.get(factors)
+        if xy is None:
+            xy = (reduce_coords(self.x, factors), reduce_coords(self.y, factors))
+            self._coords[factors] = xy
+        return xy
+
+    def lonlat_extent(self):
+        """:return: [lon_min, lon_max, lat_min, lat_max]"""
+        return [float(np.nanmin(self.lon)), float(np.nanmax(self.lon)),
+                float(np.nanmin(self.lat)), float(np.nanmax(self.lat))]
+
+    def gate_at(self, x, y):
+        """
+        投影坐标处的距离库（常数时间：方位角查表，再按该径向的库间距直接算出距离库下标）。
+        :return: (径向行, 距离库) 下标；超出探测范围或该方位无径向时返回 None
+        """
+        if self._gate_lookup is None:
+            self._gate_lookup = self._build_gate_lookup()
+        az_table, ground, start, step = self._gate_lookup
+        az = math.atan2(x, y) % (2 * math.pi)
+        row = int(az_table[int(az / (2 * math.pi) * AZIMUTH_BINS) % AZIMUTH_BINS])
+        if row < 0 or step[row] <= 0:
+            return None
+        dist = math.hypot(x, y)
+        line = ground[row]
+        n = line.size
+        if dist < line[0] - step[row] / 2 or dist > line[-1] + step[row] / 2:
+            return None
+        # 同一径向上地面距离近似等间距：先按间距估算，再向更近的相邻库修正
+        gate = min(max(int(round((dist - start[row]) / step[row])), 0), n - 1)
+        while gate > 0 and abs(line[gate - 1] - dist) < abs(line[gate] - dist):
+            gate -= 1
+        while gate < n - 1 and abs(line[gate + 1] - dist) < abs(line[gate] - dist):
+            gate += 1
+        return row, gate
+
+    def _build_gate_lookup(self):
+        """
+        方位角查找表（每格对应最近的径向，离径向过远为 -1），以及各库的地面距离和每条径向的起点、库间距。
+        经纬度与投影所用的地球模型不同，同一库号的地面距离随方位略有差别，因此按径向分别记录。
+        """
+        ground = np.hypot(self.x, self.y)
+        n_gates = ground.shape[1]
+        start = ground[:, 0]
+        step = (ground[:, -1] - start) / (n_gates - 1) if n_gates > 1 else np.zeros_like(start)
+
+        azimuth = self.azimuth % (2 * np.pi)
+        order = np.argsort(azimuth)
+        sorted_az = azimuth[order]
+        n = sorted_az.size
+        centres = (np.arange(AZIMUTH_BINS) + 0.5) * 2 * np.pi / AZIMUTH_BINS
+        pos = np.searchsorted(sorted_az, centres) % n
+        prev = (pos - 1) % n
+        d_pos = np.abs((centres - sorted_az[pos] + np.pi) % (2 * np.pi) - np.pi)
+        d_prev = np.abs((centres - sorted_az[prev] + np.pi) % (2 * np.pi) - np.pi)
+        table = order[np.where(d_prev < d_pos, prev, pos)]
+        # 缺测扇区（与最近径向相差超过 1.5 个平均方位间隔）不对应任何径向
+        table[np.minimum(d_pos, d_prev) > 1.5 * 2 * np.pi / n] = -1
+        return table, ground, start, step
+
+    def lonlat_at(self, x, y):
+        """:return: 投影坐标处的经纬度（从站点出发的大地线正算，与投影反算一致）"""
+        dist = math.hypot(x, y)
+        if dist == 0:
+            return self.site_lon, self.site_lat
+        lon, lat, _ = _GEOD.fwd(self.site_lon, self.site_lat, math.degrees(math.atan2(x, y)), dist)
+        return lon, lat
+
+    def rows_for(self, azimuth):
+        """:return: 把方位角为 azimuth 的数据对齐到本几何径向顺序的行索引，无法对齐时返回 None"""
+        return align_azimuth_rows(self.azimuth, azimuth)
+
+
+class GeometryCache:
+    """
+    站点几何缓存：键为（站号、站点位置、仰角、径向数、库数、库长），
+    绘图、光标读数与格点化共用，跨文件复用，避免每次绘图重新投影所有距离库。
+    """
+
+    def __init__(self, max_entries=32):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._building = {}   # 键 -> 正在建立该几何的锁（多线程同时请求时只投影一次）
+
+    def get(self, ds, product):
+        """
+        :param ds: get_data 返回的 Dataset
+        :param product: 变量名称
+        :return: (SiteGeometry, rows)，ds 的数据按 data[rows] 与几何逐行对应
+        """
+        key = geometry_key(ds, product)
+        azimuth = ds["azimuth"].values
+        with self._lock:
+            geometry = self._entries.get(key)
+            if geometry is not None:
+                self._entries.move_to_end(key)
+        if geometry is not None:
+            rows = geometry.rows_for(azimuth)
+            if rows is not None:
+                return geometry, rows
+
+        # 首次出现，或径向分布与缓存差别过大：以当前体扫重建
+        with self._lock:
+            building = self._building.setdefault(key, threading.Lock())
+        with building:
+            # 等待期间其他线程可能已建好同一几何
+            with self._lock:
+                cached = self._entries.get(key)
+            if cached is not None and cached is not geometry:
+                rows = cached.rows_for(azimuth)
+                if rows is not None:
+                    return cached, rows
+            geometry = SiteGeometry(ds, product)
+            with self._lock:
+                self._entries[key] = geometry
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                self._building.pop(key, None)
+        return geometry, np.arange(azimuth.size)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_default_cache = None
+
+
+def get_geometry_cache():
+    """进程内共享的站点几何缓存"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = GeometryCache()
+    return _default_cache
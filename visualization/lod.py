@@ -0,0 +1,89 @@
+import numpy as np
+
+# 反射率类产品按最大值降采样，保留强回波核心；其余产品取每块中心的样本（避免速度等产品被平均失真）
+MAX_POOL_PRODUCTS = ("REF", "TREF", "CR")
+# 单个方向的最大降采样倍数
+MAX_FACTOR = 16
+
+
+def _block_starts(n, factor):
+    return np.arange(0, n, factor)
+
+
+def reduce_field(data, factors, product):
+    """
+    按 (方位, 距离) 倍数降采样极坐标场，末尾不足一块的部分单独成块。
+    :param data: 径向数 x 库数（可为 masked array）
+    :param factors: (方位倍数, 距离倍数)
+    :param product: 产品名称，决定降采样方式
+    :return: 降采样后的 masked array
+    """
+    fa, fr = factors
+    if fa == 1 and fr == 1:
+        return data
+    values = np.ma.filled(np.ma.asarray(data, dtype=float), np.nan)
+    rows = _block_starts(values.shape[0], fa)
+    cols = _block_starts(values.shape[1], fr)
+    if product.upper() in MAX_POOL_PRODUCTS:
+        # fmax 忽略 NaN，整块无效时结果仍为 NaN
+        reduced = np.fmax.reduceat(np.fmax.reduceat(values, rows, axis=0), cols, axis=1)
+    else:
+        centre_rows = np.minimum(rows + fa // 2, values.shape[0] - 1)
+        centre_cols = np.minimum(cols + fr // 2, values.shape[1] - 1)
+        reduced = values[np.ix_(centre_rows, centre_cols)]
+    return np.ma.masked_invalid(reduced)
+
+
+def reduce_coords(coord, factors):
+    """:return: 每块距离库中心坐标的平均值（与 reduce_field 的分块一致）"""
+    fa, fr = factors
+    if fa == 1 and fr == 1:
+        return coord
+    rows = _block_starts(coord.shape[0], fa)
+    cols = _block_starts(coord.shape[1], fr)
+    sums = np.add.reduceat(np.add.reduceat(coord, rows, axis=0), cols, axis=1)
+    counts = np.outer(np.diff(np.append(rows, coord.shape[0])), np.diff(np.append(cols, coord.shape[1])))
+    return sums / counts
+
+
+def choose_factors(geometry, extent, size):
+    """
+    根据当前显示范围与像素尺寸选择降采样倍数：相邻距离库（或径向）的间距小于一个像素时才合并，
+    放大到库间距大于像素后使用原始分辨率。倍数取 2 的幂，便于在金字塔层级间复用。
+    :param geometry: SiteGeometry
+    :param extent: (xmin, xmax, ymin, ymax)，投影坐标
+    :param size: (高, 宽) 像素
+    :return: (方位倍数, 距离倍数)
+    """
+    x0, x1, y0, y1 = extent
+    height, width = size
+    pixel = min((x1 - x0) / width, (y1 - y0) / height)
+    gate = geometry.gate_spacing
+    # 视野内最远处的径向间距（弧长）
+    corners = np.hypot([x0, x1, x0, x1], [y0, y0, y1, y1]).max()
+    reach = min(corners, geometry.max_range)
+    arc = reach * 2 * np.pi / geometry.shape[0]
+
+    def factor(spacing):
+        if spacing <= 0 or pixel <= spacing:
+            return 1
+        return int(min(2 ** np.floor(np.log2(pixel / spacing)), MAX_FACTOR))
+
+    return factor(arc), factor(gate)
+
+
+class FieldPyramid:
+    """一个扫描场的降采样金字塔，各层级按需生成并保留"""
+
+    def __init__(self, data, product):
+        self.data = data
+        self.product = product
+        self._levels = {(1, 1): data}
+
+    def level(self, factors):
+        factors = tuple(factors)
+        field = self._levels.get(factors)
+        if field is None:
+            field = reduce_field(self.data, factors, self.product)
+            self._levels[factors] = field
+        return field
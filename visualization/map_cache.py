@@ -0,0 +1,173 @@
+import os
+import pickle
+import hashlib
+import threading
+import numpy as np
+import shapely
+from shapely.geometry import Point
+import cartopy.crs as ccrs
+import cartopy.feature as cfeature
+import cartopy.io.shapereader as shpreader
+from cartopy.mpl.patch import geos_to_path
+from matplotlib.collections import PathCollection
+
+MAP_CACHE_VERSION = 1
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".qpe_gui", "map_features")
+
+# 底图要素及其样式（与 cartopy 默认样式一致）
+BASE_FEATURES = {
+    "coastline": cfeature.COASTLINE,
+    "borders": cfeature.BORDERS,
+    "lakes": cfeature.LAKES,
+    "rivers": cfeature.RIVERS,
+}
+COUNTY_STYLE = {"edgecolor": "black", "facecolor": "none", "linewidth": 1.3}
+
+
+def _style(feature, linewidth):
+    style = {"edgecolor": "black", "facecolor": "none", "linewidth": linewidth}
+    for key, value in feature.kwargs.items():
+        style[key] = "none" if value == "never" else value
+    return style
+
+
+class MapFeatureCache:
+    """
+    已投影、已裁剪的地图要素缓存。
+    海岸线、国界、湖泊、河流与县界 shapefile 在首次使用时投影到雷达的方位等距投影，
+    并裁剪到最大探测距离附近，结果按（投影参数、裁剪范围、shapefile 版本）缓存在内存和磁盘上；
+    之后叠加地图只需把现成的路径加入坐标轴。
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, scale="50m", margin=1.1):
+        """
+        :param cache_dir: 磁盘缓存目录（None 表示只缓存在内存中）
+        :param scale: Natural Earth 数据分辨率
+        :param margin: 裁剪半径相对最大探测距离的倍数
+        """
+        self.cache_dir = cache_dir
+        self.scale = scale
+        self.margin = margin
+        self._memory = {}
+        self._lock = threading.Lock()
+
+    def cache_key(self, projection, max_range_km, shp_path=None):
+        """由投影参数、裁剪半径与 shapefile（路径、大小、修改时间）生成缓存键"""
+        parts = [MAP_CACHE_VERSION, self.scale, sorted(projection.proj4_params.items()),
+                 int(round(max_range_km * self.margin * 1000))]
+        if shp_path and os.path.exists(shp_path):
+            st = os.stat(shp_path)
+            parts.append((os.path.abspath(shp_path), st.st_size, st.st_mtime_ns))
+        return hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()
+
+    def get_geometries(self, projection, max_range_km, shp_path=None):
+        """
+        :param projection: 雷达站为中心的 cartopy 投影（坐标单位为米）
+        :param max_range_km: 最大探测距离（km）
+        :param shp_path: 县界 shapefile（可选）
+        :return: dict 图层名 -> 已投影、已裁剪的 shapely 几何列表
+        """
+        key = self.cache_key(projection, max_range_km, shp_path)
+        with self._lock:
+            layers = self._memory.get(key)
+        if layers is not None:
+            return layers
+
+        layers = self._load(key)
+        if layers is None:
+            layers, complete = self._build(projection, max_range_km, shp_path)
+            # 有图层读取失败（如 Natural Earth 数据无法下载）时不写磁盘，下次启动重试
+            if complete:
+                self._save(key, layers)
+        with self._lock:
+            self._memory[key] = layers
+        return layers
+
+    def _build(self, projection, max_range_km, shp_path):
+        """:return: (图层字典, 是否全部图层都读取成功)"""
+        radius = max_range_km * self.margin * 1000
+        clip = Point(0, 0).buffer(radius, 64)
+        # 裁剪圆对应的经纬度范围，用于预筛选要素
+        theta = np.linspace(0, 2 * np.pi, 73)
+        pts = ccrs.PlateCarree().transform_points(projection, radius * np.sin(theta), radius * np.cos(theta))
+        extent = [pts[:, 0].min(), pts[:, 0].max(), pts[:, 1].min(), pts[:, 1].max()]
+
+        def project(geoms, crs):
+            result = []
+            for geom in geoms:
+                try:
+                    projected = projection.project_geometry(geom, crs)
+                except Exception:
+                    continue
+                clipped = projected.intersection(clip)
+                if not clipped.is_empty:
+                    result.append(clipped)
+            return result
+
+        layers = {}
+        complete = True
+        for name, feature in BASE_FEATURES.items():
+            feat = feature.with_scale(self.scale)
+            try:
+                layers[name] = project(feat.intersecting_geometries(extent), feat.crs)
+            except Exception:
+                complete = False
+        if shp_path and os.path.exists(shp_path):
+            try:
+                reader = shpreader.Reader(shp_path)
+                layers["county"] = project(reader.geometries(), ccrs.PlateCarree())
+            except Exception:
+                complete = False
+        return layers, complete
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+
+    def _load(self, key):
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._path(key), "rb") as f:
+                stored = pickle.load(f)
+            return {name: list(shapely.from_wkb(wkbs)) for name, wkbs in stored.items()}
+        except Exception:
+            return None
+
+    def _save(self, key, layers):
+        if not self.cache_dir:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            stored = {name: [shapely.to_wkb(g) for g in geoms] for name, geoms in layers.items()}
+            tmp = self._path(key) + ".tmp"
+            with open(tmp, "wb") as f:
+                pickle.dump(stored, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self._path(key))
+        except OSError:
+            pass
+
+    def add_to_ax(self, ax, max_range_km, shp_path=None, linewidth=0.5):
+        """
+        把缓存的要素以路径集合的形式加到 ax 上（坐标已是 ax 的投影坐标，绘制时不再重投影）。
+        :return: 新增的 artist 列表
+        """
+        layers = self.get_geometries(ax.projection, max_range_km, shp_path)
+        artists = []
+        for name, geoms in layers.items():
+            if not geoms:
+                continue
+            style = COUNTY_STYLE if name == "county" else _style(BASE_FEATURES[name], linewidth)
+            collection = PathCollection(geos_to_path(geoms), transform=ax.transData, **style)
+            artists.append(ax.add_collection(collection, autolim=False))
+        return artists
+
+
+_default_cache = None
+
+
+def get_map_feature_cache():
+    """进程内共享的地图要素缓存"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = MapFeatureCache()
+    return _default_cache
@@ -1,15 +1,52 @@
 import os
+import numpy as np
 import cartopy.crs as ccrs
 import cartopy.feature as cfeature
 import cartopy.io.shapereader as shpreader
 from cartopy.feature import ShapelyFeature
 from cinrad.visualize.utils import cmap_plot, norm_plot
 import matplotlib.pyplot as plt
+from iodata.read_radar import get_product
+from visualization.map_cache import get_map_feature_cache
+from visualization.raster import raster_size, view_extent
+from visualization.geometry import get_geometry_cache, geometry_key, align_azimuth_rows
+from visualization.lod import FieldPyramid, choose_factors
+from qc.clutter import CLUTTER_PROBABILITY
 plt.rcParams.update({'font.size': 14})
 
+# 渲染引擎：mesh 为 pcolormesh 逐库绘制，raster 为查找表重采样到屏幕栅格后 imshow
+RENDER_ENGINES = ("mesh", "raster")
 
-def create_map_features_on_ax(ax, shp_path=None):
-    """在 ax 上添加地图要素"""
+# 派生图层（数据由调用方经 data_qc 传入）：名称 -> (提供几何的源产品, colormap, norm)
+DERIVED_LAYERS = {
+    CLUTTER_PROBABILITY: ("REF", plt.get_cmap("magma_r"), plt.Normalize(0.0, 1.0)),
+}
+
+
+def source_product(product):
+    """:return: 提供距离库几何的产品名称（派生图层取其源产品）"""
+    layer = DERIVED_LAYERS.get(product.upper())
+    return layer[0] if layer is not None else product
+
+
+def color_scale(product):
+    """:return: (cmap, norm)，norm 为 None 时按数据范围"""
+    product_upper = product.upper()
+    if product_upper in DERIVED_LAYERS:
+        return DERIVED_LAYERS[product_upper][1:]
+    return cmap_plot.get(product_upper, plt.get_cmap("turbo")), norm_plot.get(product_upper, None)
+
+
+def create_map_features_on_ax(ax, shp_path=None, max_range_km=None):
+    """
+    在 ax 上添加地图要素
+    :param max_range_km: 最大探测距离（km）；给出时使用已投影、已裁剪的要素缓存
+    """
+    if max_range_km:
+        try:
+            return get_map_feature_cache().add_to_ax(ax, max_range_km, shp_path)
+        except Exception:
+            pass
     features = []
     base_feats = [
         cfeature.COASTLINE.with_scale('50m'),
@@ -32,8 +69,88 @@ def create_map_features_on_ax(ax, shp_path=None):
             pass
     return features
 
+def prepare_panel(radar, tilt, product, drange, data_qc=None):
+    """
+    取出一幅图的数据并对齐到共用的站点几何（纯计算，可在工作线程中执行）。
+    :param data_qc: numpy 数组（质控后的数据或派生图层的数据，可为 None）
+    :return: dict 包含 product、tilt、drange、elevation、geometry、data
+    """
+    source = source_product(product)
+    ds = get_product(radar, tilt, drange, source)
+    # 同站、同仰角、同范围的距离库坐标（经纬度与投影坐标）跨文件、跨产品共用
+    geometry, rows = get_geometry_cache().get(ds, source)
+
+    # 判断是否使用质控后的数据
+    if data_qc is not None:
+        data = data_qc
+    else:
+        data = ds[product].values
+    return {"product": product, "tilt": tilt, "drange": drange,
+            "elevation": float(ds.attrs.get("elevation", 0)), "geometry": geometry,
+            "data": np.ma.masked_invalid(data[rows])}
+
+
+def draw_panel(ax, panel, title, engine="mesh", colorbar_shrink=1.0):
+    """
+    在已创建的投影坐标轴上绘制 prepare_panel 的结果（含经纬网、标题与颜色条）。
+    :param ax: 以站点为中心投影的 GeoAxes
+    :param panel: prepare_panel 的返回结果
+    :param title: 标题
+    :param engine: 渲染引擎，"mesh" 或 "raster"
+    :param colorbar_shrink: 颜色条长度比例（多面板时缩短）
+    :return: 绘图状态 dict（供 update_radar_data / refresh_view 使用）
+    """
+    geometry, data, product = panel["geometry"], panel["data"], panel["product"]
+    # 动态获取 colormap 与 norm
+    cmap, norm = color_scale(product)
+
+    # 设置经纬度范围
+    ax.set_extent(geometry.lonlat_extent(), crs=ccrs.PlateCarree())
+
+    # 绘制雷达数据（坐标已是投影坐标，不再逐库变换）
+    raster = pyramid = lod = None
+    if engine == "raster":
+        raster = geometry.raster
+        extent = view_extent(ax)
+        # 颜色条占位后的尺寸在 refresh_raster 中再校正
+        pcm = ax.imshow(
+            raster.render(data, extent, raster_size(ax)),
+            extent=extent, origin="upper", interpolation="nearest",
+            cmap=cmap, norm=norm, transform=ax.projection
+        )
+        ax.set_xlim(extent[0], extent[1])
+        ax.set_ylim(extent[2], extent[3])
+    else:
+        # 按当前视图选择降采样层级，缩小查看时不逐库绘制
+        pyramid = FieldPyramid(data, product)
+        lod = choose_factors(geometry, view_extent(ax), raster_size(ax))
+        x, y = geometry.coords(lod)
+        pcm = ax.pcolormesh(
+            x, y, pyramid.level(lod),
+            shading="auto",
+            cmap=cmap,
+            norm=norm,
+            transform=ax.projection
+        )
+
+    # 经纬网格
+    gl = ax.gridlines(draw_labels=True, linewidth=0.0, color='gray', alpha=0.5)
+    gl.top_labels = gl.right_labels = False
+
+    # 标题和颜色条
+    ax.set_title(title)
+    cbar = ax.figure.colorbar(pcm, ax=ax, label=product, shrink=colorbar_shrink)
+
+    state = {"success": True, "ax": ax, "features": [], "pcm": pcm, "colorbar": cbar,
+             "geometry": geometry.key, "azimuth": geometry.azimuth,
+             "raster": raster, "data": data, "site": geometry, "pyramid": pyramid, "lod": lod}
+    # 颜色条占位后坐标轴尺寸会变化，按最终尺寸校正
+    refresh_view(state)
+    return state
+
+
 def plot_radar_data(fig, radar, tilt, product, drange, radar_file, shp_path,
-                    map_visible=False, data_qc=None):
+                    map_visible=False, data_qc=None, engine="mesh", title=None):
     """
     绘制雷达数据并返回结果
     :param fig: matplotlib Figure 对象
@@ -45,66 +162,156 @@ def plot_radar_data(fig, radar, tilt, product, drange, radar_file, shp_path,
     :param shp_path: shapefile
     :param map_visible: 是否显示地图要素
     :param data_qc: numpy 数组（质控后的数据，可为 None）
+    :param engine: 渲染引擎，"mesh" 或 "raster"
+    :param title: 标题（默认为文件名、产品、仰角与范围）
     :return: dict 包含 success、ax、features 或 error
     """
     try:
-        ds = radar.get_data(tilt=tilt, drange=drange, dtype=product)
-        lon, lat = ds["longitude"], ds["latitude"]
-
-        # 判断是否使用质控后的数据
-        if data_qc is not None:
-            print("使用质控后的数据绘图。")
-            data = data_qc
-        else:
-            data = ds[product].values
+        panel = prepare_panel(radar, tilt, product, drange, data_qc)
 
         # 清空旧图像
         fig.clear()
 
-        # 创建新的 Axes（地图投影）
-        ax = fig.add_subplot(
-            111,
-            projection=ccrs.AzimuthalEquidistant(
-                central_longitude=106.59101,
-                central_latitude=28.8131
-            )
-        )
-        # 动态获取 colormap 与 norm
-        product_upper = product.upper()
-        cmap = cmap_plot.get(product_upper, plt.get_cmap("turbo"))
-        norm = norm_plot.get(product_upper, None)
+        # 创建新的 Axes（以文件中的站点位置为中心的方位等距投影）
+        ax = fig.add_subplot(111, projection=panel["geometry"].projection)
+        if title is None:
+            filename = os.path.basename(radar_file)
+            title = f"{filename}\n{product} @ {panel['elevation']:.1f}° ({drange} km)"
+        state = draw_panel(ax, panel, title, engine)
 
-        # 绘制雷达数据
-        pcm = ax.pcolormesh(
-            lon, lat, data,
-            shading="auto",
-            cmap=cmap,
-            norm=norm,
-            transform=ccrs.PlateCarree()
-        )
+        # 叠加地图要素（可选）
+        if map_visible:
+            state["features"] = create_map_features_on_ax(ax, shp_path, drange)
+        return state
 
-        # 设置经纬度范围
-        ax.set_extent(
-            [float(lon.min()), float(lon.max()), float(lat.min()), float(lat.max())],
-            crs=ccrs.PlateCarree()
-        )
+    except Exception as e:
+        return {"success": False, "error": str(e)}
 
-        # 经纬网格
-        gl = ax.gridlines(draw_labels=True, linewidth=0.0, color='gray', alpha=0.5)
-        gl.top_labels = gl.right_labels = False
 
-        # 标题和颜色条
-        filename = os.path.basename(radar_file)
-        ax.set_title(f"{filename}\n{product} @ {ds.attrs.get('elevation', 0):.1f}° ({drange} km)")
-        fig.colorbar(pcm, ax=ax, label=product)
+def update_radar_data(state, radar, tilt, product, drange, radar_file, data_qc=None):
+    """
+    增量刷新：几何不变时保留坐标轴、颜色条、经纬网与地图要素，只替换网格数据与色标。
+    :param state: 上一次 plot_radar_data / update_radar_data 的返回结果
+    :return: 与 plot_radar_data 相同格式的 dict；几何变化（需完整重绘）时返回 None
+    """
+    if not state or not state.get("success") or state.get("pcm") is None:
+        return None
+    try:
+        source = source_product(product)
+        ds = get_product(radar, tilt, drange, source)
+        if geometry_key(ds, source) != state["geometry"]:
+            return None
+        rows = align_azimuth_rows(state["azimuth"], ds["azimuth"].values)
+        if rows is None:
+            return None
 
-        # 叠加地图要素（可选）
-        features = []
-        if map_visible:
-            features = create_map_features_on_ax(ax, shp_path)
+        data = data_qc if data_qc is not None else ds[product].values
+        filename = os.path.basename(radar_file)
+        title = f"{filename}\n{product} @ {ds.attrs.get('elevation', 0):.1f}° ({drange} km)"
+        return _replace_data(state, np.ma.masked_invalid(data[rows]), product, title)
+    except Exception as e:
+        return {"success": False, "error": str(e)}
 
-        return {"success": True, "ax": ax, "features": features}
 
+def update_panel(state, panel, title):
+    """
+    增量刷新（数据已由 prepare_panel 在工作线程中取出）：几何不变时只替换网格数据与色标。
+    :param state: 上一次 draw_panel / update_panel 的返回结果
+    :param panel: prepare_panel 的返回结果
+    :return: 与 draw_panel 相同格式的 dict；几何变化（需完整重绘）时返回 None
+    """
+    if not state or not state.get("success") or state.get("pcm") is None:
+        return None
+    geometry = panel["geometry"]
+    if geometry.key != state["geometry"]:
+        return None
+    # 几何可能因径向分布变化被重建，按方位角对齐到已绘制网格的径向顺序
+    rows = align_azimuth_rows(state["azimuth"], geometry.azimuth)
+    if rows is None:
+        return None
+    try:
+        return _replace_data(state, panel["data"][rows], panel["product"], title)
     except Exception as e:
         return {"success": False, "error": str(e)}
 
+
+def _replace_data(state, data, product, title):
+    """替换已绘制网格/栅格的数据、色标与标题，返回更新后的状态"""
+    pcm, cbar, ax = state["pcm"], state["colorbar"], state["ax"]
+    cmap, norm = color_scale(product)
+    if state.get("raster") is not None:
+        pcm.set_data(state["raster"].render(data, view_extent(ax), raster_size(ax)))
+        pcm.set_extent(view_extent(ax))
+    else:
+        pyramid = FieldPyramid(data, product)
+        pcm.set_array(pyramid.level(state["lod"]))
+    pcm.set_cmap(cmap)
+    if norm is not None:
+        pcm.set_norm(norm)
+    else:
+        pcm.set_norm(plt.Normalize(np.nanmin(data), np.nanmax(data)))
+    cbar.update_normal(pcm)
+    cbar.set_label(product)
+
+    ax.set_title(title)
+    state = dict(state)
+    state["data"] = data
+    if state.get("raster") is None:
+        state["pyramid"] = pyramid
+    return state
+
+
+def refresh_raster(state):
+    """
+    栅格引擎：按坐标轴当前的显示范围与像素尺寸重新采样（平移、缩放或窗口尺寸变化后调用）。
+    查找表按（范围，尺寸）缓存，回到已访问过的视图时只需一次索引。
+    :param state: plot_radar_data / update_radar_data 的返回结果
+    :return: 是否进行了重采样
+    """
+    if not state or not state.get("success") or state.get("raster") is None:
+        return False
+    ax, image = state["ax"], state["pcm"]
+    extent = view_extent(ax)
+    image.set_data(state["raster"].render(state["data"], extent, raster_size(ax)))
+    image.set_extent(extent)
+    # set_extent 会改动坐标轴范围，恢复为原视图
+    ax.set_xlim(extent[0], extent[1])
+    ax.set_ylim(extent[2], extent[3])
+    return True
+
+
+def refresh_lod(state):
+    """
+    网格引擎：视图变化后按新的显示范围重新选择降采样层级，层级变化时替换网格。
+    :param state: plot_radar_data / update_radar_data 的返回结果（会就地更新 pcm 与 lod）
+    :return: 是否替换了网格
+    """
+    if not state or not state.get("success") or state.get("pyramid") is None:
+        return False
+    ax, old = state["ax"], state["pcm"]
+    geometry = state["site"]
+    lod = choose_factors(geometry, view_extent(ax), raster_size(ax))
+    if lod == state["lod"]:
+        return False
+    x, y = geometry.coords(lod)
+    xlim, ylim = ax.get_xlim(), ax.get_ylim()
+    pcm = ax.pcolormesh(
+        x, y, state["pyramid"].level(lod),
+        shading="auto",
+        cmap=old.get_cmap(),
+        norm=old.norm,
+        transform=ax.projection,
+        zorder=old.get_zorder()
+    )
+    old.remove()
+    ax.set_xlim(xlim)
+    ax.set_ylim(ylim)
+    state["colorbar"].update_normal(pcm)
+    state["pcm"] = pcm
+    state["lod"] = lod
+    return True
+
+
+def refresh_view(state):
+    """平移、缩放后按当前视图刷新（栅格引擎重新采样，网格引擎切换细节层级）"""
+    return refresh_raster(state) or refresh_lod(state)
@@ -0,0 +1,110 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+
+# 栅格边长上下限（像素）
+MIN_RASTER_SIZE = 64
+MAX_RASTER_SIZE = 4096
+
+
+class PolarRaster:
+    """
+    极坐标场到屏幕栅格的查找表。
+    对固定的站点、仰角与库长，预先算出栅格每个像素对应的（径向，距离库）下标；
+    之后切换产品或时次只需一次 NumPy 花式索引，不再逐个变换、绘制距离库四边形。
+    """
+
+    def __init__(self, x, y, azimuth, max_tables=4):
+        """
+        :param x, y: 距离库中心在绘图投影下的坐标（米，形状 径向数 x 库数），投影以雷达站为中心
+        :param azimuth: 各径向方位角（弧度）
+        :param max_tables: 保留的查找表个数（对应不同的显示范围/栅格尺寸）
+        """
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        self.shape = x.shape
+        # 各库的地面距离（取所有径向的平均），相邻库中点作为边界
+        dist = np.nanmean(np.hypot(x, y), axis=0)
+        mid = (dist[1:] + dist[:-1]) / 2
+        first = dist[0] - (mid[0] - dist[0]) if mid.size else 0.0
+        last = dist[-1] + (dist[-1] - mid[-1]) if mid.size else dist[-1]
+        self.edges = np.concatenate([[max(first, 0.0)], mid, [last]])
+        self.max_range = float(last)
+
+        azimuth = np.asarray(azimuth, dtype=float) % (2 * np.pi)
+        self._az_order = np.argsort(azimuth)
+        self._az_sorted = azimuth[self._az_order]
+        self._tables = OrderedDict()
+        self._max_tables = max_tables
+        self._lock = threading.Lock()
+
+    def lookup(self, extent, size):
+        """
+        :param extent: 栅格覆盖范围 (xmin, xmax, ymin, ymax)，绘图投影坐标
+        :param size: 栅格尺寸 (高, 宽)
+        :return: (平铺下标数组, 有效像素掩码)，形状均为 (高, 宽)，第 0 行为上边缘
+        """
+        key = (tuple(round(float(v), 3) for v in extent), tuple(size))
+        with self._lock:
+            table = self._tables.get(key)
+            if table is not None:
+                self._tables.move_to_end(key)
+                return table
+
+        x0, x1, y0, y1 = extent
+        height, width = size
+        # 像素中心坐标
+        xs = x0 + (np.arange(width) + 0.5) * (x1 - x0) / width
+        ys = y1 - (np.arange(height) + 0.5) * (y1 - y0) / height
+        xx, yy = np.meshgrid(xs, ys)
+        dist = np.hypot(xx, yy)
+        gate = np.searchsorted(self.edges, dist, side="right") - 1
+        valid = (gate >= 0) & (gate < self.shape[1])
+
+        # 就近径向（方位角首尾相接）
+        az = np.arctan2(xx, yy) % (2 * np.pi)
+        n = self._az_sorted.size
+        pos = np.searchsorted(self._az_sorted, az) % n
+        prev = (pos - 1) % n
+        d_pos = np.abs((az - self._az_sorted[pos] + np.pi) % (2 * np.pi) - np.pi)
+        d_prev = np.abs((az - self._az_sorted[prev] + np.pi) % (2 * np.pi) - np.pi)
+        row = self._az_order[np.where(d_prev < d_pos, prev, pos)]
+
+        index = np.where(valid, row * self.shape[1] + np.clip(gate, 0, self.shape[1] - 1), 0).astype(np.intp)
+        table = (index, valid)
+        with self._lock:
+            self._tables[key] = table
+            while len(self._tables) > self._max_tables:
+                self._tables.popitem(last=False)
+        return table
+
+    def render(self, data, extent, size):
+        """
+        :param data: 极坐标数据（径向数 x 库数，径向顺序与构造时一致）
+        :return: 栅格（masked array，无效像素被屏蔽）
+        """
+        index, valid = self.lookup(extent, size)
+        values = np.ma.getdata(data)
+        mask = ~np.isfinite(values)
+        if np.ma.isMaskedArray(data):
+            mask |= np.ma.getmaskarray(data)
+        image = values.ravel().take(index).astype(float, copy=False)
+        return np.ma.array(image, mask=mask.ravel().take(index) | ~valid)
+
+
+def raster_size(ax):
+    """
+    :return: 坐标轴当前在屏幕上的像素尺寸 (高, 宽)
+    """
+    ax.apply_aspect()
+    bbox = ax.get_window_extent()
+    height = int(np.clip(round(bbox.height), MIN_RASTER_SIZE, MAX_RASTER_SIZE))
+    width = int(np.clip(round(bbox.width), MIN_RASTER_SIZE, MAX_RASTER_SIZE))
+    return height, width
+
+
+def view_extent(ax):
+    """:return: 坐标轴当前显示范围 (xmin, xmax, ymin, ymax)"""
+    x0, x1 = ax.get_xlim()
+    y0, y1 = ax.get_ylim()
+    return min(x0, x1), max(x0, x1), min(y0, y1), max(y0, y1)
@@ -0,0 +1,90 @@
+import math
+from collections import OrderedDict
+import numpy as np
+from iodata.read_radar import get_product_values
+
+# 标准大气折射下的等效地球半径（4/3 地球半径，米）
+EFFECTIVE_EARTH_RADIUS = 4.0 / 3.0 * 6371000.0
+
+
+def beam_height(slant_range, elevation):
+    """
+    波束中心相对雷达天线的高度（4/3 等效地球半径模型）。
+    :param slant_range: 斜距（米）
+    :param elevation: 仰角（度）
+    :return: 高度（米）
+    """
+    a = EFFECTIVE_EARTH_RADIUS
+    r = slant_range
+    return math.sqrt(r * r + a * a + 2 * r * a * math.sin(math.radians(elevation))) - a
+
+
+class GateReadout:
+    """
+    光标处的距离库读数：同一仰角所有产品在该库的值，以及距离、方位与波束高度。
+    建立时把各产品对齐到绘图几何的径向顺序，之后每次查询只由投影坐标算出下标再直接索引。
+    """
+
+    def __init__(self, geometry, fields):
+        """
+        :param geometry: 绘图使用的 SiteGeometry
+        :param fields: 有序 dict，产品名 -> 与 geometry 逐行对应的数组
+        """
+        self.geometry = geometry
+        self.fields = fields
+
+    @classmethod
+    def from_volume(cls, radar, tilt, drange, geometry, products=None):
+        """
+        取出体扫中一个仰角的所有产品（可在工作线程中执行）。
+        库数或径向分布与绘图几何不一致的产品跳过。
+        只取数值（不经 get_product 的记忆），不会挤掉正在显示的产品。
+        :param radar: StandardData 对象
+        :param tilt: 仰角索引
+        :param drange: 探测范围（km）
+        :param geometry: 绘图使用的 SiteGeometry
+        :param products: 产品列表，默认取该仰角全部产品
+        """
+        if products is None:
+            products = radar.available_product(tilt)
+        fields = OrderedDict()
+        for product in products:
+            try:
+                values, azimuth, _ = get_product_values(radar, tilt, drange, product)
+            except Exception:
+                continue
+            if values.shape != geometry.shape:
+                continue
+            rows = geometry.rows_for(azimuth)
+            if rows is not None:
+                fields[product] = values[rows]
+        return cls(geometry, fields)
+
+    def sample(self, x, y):
+        """
+        :param x, y: 绘图投影坐标（米）
+        :return: dict 包含 lon、lat；在探测范围内时另有 range（米）、azimuth（度）、height（米）与 values
+        """
+        geometry = self.geometry
+        lon, lat = geometry.lonlat_at(x, y)
+        result = {"lon": lon, "lat": lat}
+        index = geometry.gate_at(x, y)
+        if index is None:
+            return result
+        row, gate = index
+        slant = float(geometry.distance[gate])
+        result["range"] = slant
+        result["azimuth"] = math.degrees(math.atan2(x, y)) % 360
+        result["height"] = beam_height(slant, geometry.elevation)
+        result["values"] = OrderedDict((p, float(f[row, gate])) for p, f in self.fields.items())
+        return result
+
+    def describe(self, x, y):
+        """:return: 状态栏显示的读数文本"""
+        s = self.sample(x, y)
+        text = f"Lon: {s['lon']:.3f}°, Lat: {s['lat']:.3f}°"
+        if "range" not in s:
+            return text
+        text += f"  距离 {s['range'] / 1000:.2f} km  方位 {s['azimuth']:.1f}°  高度 {s['height'] / 1000:.2f} km"
+        values = "  ".join(f"{p} {v:.2f}" if np.isfinite(v) else f"{p} --" for p, v in s["values"].items())
+        return f"{text}  |  {values}" if values else text
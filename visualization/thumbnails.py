@@ -0,0 +1,73 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+import matplotlib.pyplot as plt
+from iodata.read_radar import get_product_values
+from visualization.raster import PolarRaster
+from visualization.plotter import color_scale
+
+# 缩略图边长（像素）
+THUMBNAIL_SIZE = 160
+
+
+def render_thumbnail(radar, tilt, product, drange, size=THUMBNAIL_SIZE):
+    """
+    低分辨率 PPI 缩略图（可在工作线程中执行）。
+    不做地图投影：距离库按斜距与方位角直接放到以雷达为中心的平面上，用栅格查找表一次索引，
+    再按产品色标着色为 RGBA，不经过 matplotlib 绘图。
+    数据经 get_product_values 取出，不计算经纬度网格，也不占用 get_product 的记忆（不会挤掉正在显示的产品）。
+    :param radar: StandardData 对象
+    :param tilt: 仰角索引
+    :param product: 产品名称
+    :param drange: 探测范围（km）
+    :param size: 缩略图边长（像素）
+    :return: (size, size, 4) 的 uint8 数组，无数据处透明
+    """
+    values, azimuth, distance = get_product_values(radar, tilt, drange, product)
+    azimuth = np.asarray(azimuth, dtype=float)
+    distance = np.asarray(distance, dtype=float) * 1000
+    x = np.outer(np.sin(azimuth), distance)
+    y = np.outer(np.cos(azimuth), distance)
+    reach = float(distance[-1])
+    image = PolarRaster(x, y, azimuth, max_tables=1).render(values, (-reach, reach, -reach, reach), (size, size))
+
+    # 与主视图使用同一色标
+    cmap, norm = color_scale(product)
+    if norm is None:
+        valid = image.compressed()
+        norm = plt.Normalize(valid.min(), valid.max()) if valid.size else plt.Normalize(0, 1)
+    rgba = cmap(norm(image.filled(np.nan)), bytes=True)
+    rgba[np.ma.getmaskarray(image)] = 0
+    return rgba
+
+
+class ThumbnailCache:
+    """
+    缩略图缓存：按体扫文件分组，保留最近 max_volumes 个体扫的缩略图。
+    组内键为 (仰角, 产品, 范围, 边长)。
+    """
+
+    def __init__(self, max_volumes=8):
+        self.max_volumes = max_volumes
+        self._volumes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, volume, key):
+        with self._lock:
+            images = self._volumes.get(volume)
+            if images is None:
+                return None
+            self._volumes.move_to_end(volume)
+            return images.get(key)
+
+    def put(self, volume, key, image):
+        with self._lock:
+            images = self._volumes.setdefault(volume, {})
+            self._volumes.move_to_end(volume)
+            images[key] = image
+            while len(self._volumes) > self.max_volumes:
+                self._volumes.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._volumes.clear()